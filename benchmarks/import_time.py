@@ -0,0 +1,67 @@
+"""Measure how long a fresh interpreter takes to import the tracker.
+
+Each run starts a new Python process so nothing is cached in
+sys.modules, and times the import with `-X importtime`. The script
+prints the median total and the slowest top-level imports. It exits
+with status 1 when the median exceeds the budget, so it can guard
+startup time in CI:
+
+    python benchmarks/import_time.py --runs 10 --budget-ms 300
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_STATEMENT = "from tracker.finance_tracker import FinanceTracker"
+DEFAULT_BUDGET_MS = 300
+
+
+def import_times(statement: str = DEFAULT_STATEMENT):
+    """Run `statement` in a fresh interpreter.
+
+    :return: (total µs, {module: cumulative µs} for the modules imported
+             directly by the top-level imports)
+    """
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", statement],
+                            cwd=ROOT, capture_output=True, text=True, check=True)
+    total, children = 0, {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if not cumulative.strip().isdigit():
+            continue  # the header line
+        # Nesting is shown by two spaces of indentation per level.
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        if depth == 0:
+            total += int(cumulative)
+        elif depth == 1:
+            children[name.strip()] = int(cumulative)
+    return total, children
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS)
+    parser.add_argument("--statement", default=DEFAULT_STATEMENT)
+    parser.add_argument("--top", type=int, default=10, help="number of slowest imports to list")
+    args = parser.parse_args(argv)
+
+    runs = [import_times(args.statement) for _ in range(args.runs)]
+    totals = [total / 1000 for total, _ in runs]
+    median = statistics.median(totals)
+    print(f"{args.statement}: median {median:.1f} ms over {args.runs} runs "
+          f"(min {min(totals):.1f}, max {max(totals):.1f}, budget {args.budget_ms:.0f})")
+    _, children = min(runs, key=lambda run: abs(run[0] / 1000 - median))
+    slowest = sorted(children.items(), key=lambda item: -item[1])[:args.top]
+    for name, microseconds in slowest:
+        print(f"  {microseconds / 1000:8.1f} ms  {name}")
+    return 0 if median <= args.budget_ms else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,145 @@
+"""Deterministic synthetic ledgers for benchmarks.
+
+The same (rows, seed) always produces the same transactions. Rows are
+drawn column-wise with numpy, so 10M rows take seconds rather than
+minutes. The distributions are meant to look like a real household
+ledger:
+
+- Categories follow skewed weights: groceries and dining are common,
+  travel and health rare.
+- Rent, salary and utilities recur monthly on a fixed day. Other
+  spending is spread over the days, with more on weekends.
+- Amounts are log-normal around a per-category median.
+- Each category has a few merchants and a small tag vocabulary.
+- A transaction carries zero to two tags.
+"""
+from typing import Dict, Iterator, List, Optional
+from datetime import date
+from itertools import combinations
+import csv
+import os
+import numpy as np
+
+SIZES = {'10k': 10_000, '100k': 100_000, '1m': 1_000_000, '10m': 10_000_000}
+
+# name, type, weight, median amount, sigma, monthly day (None: any day), merchants, tags
+CATEGORIES = [
+    ('Groceries', 'expense', 22, 45.0, 0.6, None,
+     ['Whole Foods', 'Trader Joes', 'Safeway', 'Costco', 'Aldi'], ['food', 'household', 'organic']),
+    ('Dining', 'expense', 18, 28.0, 0.7, None,
+     ['Chipotle', 'Starbucks', 'Local Diner', 'Sushi Bar', 'Pizza Place'], ['food', 'work', 'date-night']),
+    ('Transport', 'expense', 12, 18.0, 0.8, None,
+     ['Uber', 'Lyft', 'Shell', 'Metro Card', 'Parking'], ['commute', 'work', 'car']),
+    ('Shopping', 'expense', 10, 60.0, 1.0, None,
+     ['Amazon', 'Target', 'Best Buy', 'IKEA', 'Etsy'], ['household', 'gift', 'electronics', 'refund']),
+    ('Entertainment', 'expense', 7, 25.0, 0.8, None,
+     ['Netflix', 'Spotify', 'Cinema', 'Steam', 'Concert Hall'], ['subscription', 'date-night', 'games']),
+    ('Utilities', 'expense', 4, 120.0, 0.3, 10,
+     ['City Power', 'Water Works', 'Gas Co', 'Fiber Internet'], ['home', 'bills']),
+    ('Health', 'expense', 3, 80.0, 0.9, None,
+     ['Pharmacy', 'Dentist', 'Gym', 'Clinic'], ['medical', 'insurance', 'fitness']),
+    ('Travel', 'expense', 2, 350.0, 1.0, None,
+     ['Delta', 'Airbnb', 'Marriott', 'Expedia'], ['travel', 'work', 'vacation', 'refund']),
+    ('Rent', 'expense', 4, 1800.0, 0.05, 1,
+     ['Landlord'], ['home', 'bills']),
+    ('Salary', 'income', 4, 4200.0, 0.1, 25,
+     ['Employer Payroll'], ['work']),
+    ('Freelance', 'income', 2, 650.0, 0.6, None,
+     ['Client Invoice', 'Upwork', 'Consulting'], ['work', 'client']),
+    ('Refunds', 'income', 2, 40.0, 0.9, None,
+     ['Amazon', 'Target', 'Airline'], ['refund']),
+]
+WORDS = ['order', 'payment', 'purchase', 'subscription', 'visit', 'invoice', 'monthly', 'weekly', 'online', 'store']
+HEADER = ['Date', 'Type', 'Amount', 'Category', 'Description', 'Tags']
+
+
+def parse_size(size: str) -> int:
+    """'10k', '1m', '10m' or a plain number of rows."""
+    return SIZES[size.lower()] if size.lower() in SIZES else int(size)
+
+
+def _tag_choices(vocabulary: List[str]) -> List[str]:
+    """The tag strings a row of a category can carry: none, one or two tags."""
+    return [''] + vocabulary + [','.join(pair) for pair in combinations(vocabulary, 2)]
+
+
+def generate_columns(rows: int, seed: int = 0, years: int = 5, end: date = date(2024, 12, 31),
+                     batch_size: int = 500_000) -> Iterator[Dict[str, list]]:
+    """Yield the ledger as batches of columns (date strings, amounts, ...).
+
+    Rows are in no particular date order, like a ledger built from several
+    imports.
+    """
+    rng = np.random.default_rng(seed)
+    last_day = end.toordinal()
+    first_day = date(end.year - years + 1, 1, 1).toordinal()
+    day_strings = np.array([date.fromordinal(day).isoformat() for day in range(first_day, last_day + 1)],
+                           dtype=object)
+    # Weekends are half again as busy as weekdays.
+    day_weights = np.array([1.5 if date.fromordinal(day).weekday() >= 5 else 1.0
+                            for day in range(first_day, last_day + 1)])
+    day_weights /= day_weights.sum()
+    month_starts = np.array([date(year, month, 1).toordinal() - first_day
+                             for year in range(end.year - years + 1, end.year + 1) for month in range(1, 13)])
+
+    weights = np.array([category[2] for category in CATEGORIES], dtype=np.float64)
+    weights /= weights.sum()
+    names = np.array([category[0] for category in CATEGORIES], dtype=object)
+    types = np.array([category[1] for category in CATEGORIES], dtype=object)
+    log_medians = np.log([category[3] for category in CATEGORIES])
+    sigmas = np.array([category[4] for category in CATEGORIES])
+    tag_choices = [np.array(_tag_choices(category[7]), dtype=object) for category in CATEGORIES]
+    merchants = [np.array(category[6], dtype=object) for category in CATEGORIES]
+    words = np.array(WORDS, dtype=object)
+
+    for start in range(0, rows, batch_size):
+        count = min(batch_size, rows - start)
+        codes = rng.choice(len(CATEGORIES), size=count, p=weights)
+        days = rng.choice(len(day_strings), size=count, p=day_weights)
+        amounts = np.round(np.exp(rng.normal(log_medians[codes], sigmas[codes])), 2)
+        tags = np.empty(count, dtype=object)
+        descriptions = np.empty(count, dtype=object)
+        for code, category in enumerate(CATEGORIES):
+            selected = np.flatnonzero(codes == code)
+            if category[5] is not None:
+                # Monthly: the same day of a random month.
+                months = month_starts[rng.integers(0, len(month_starts), len(selected))]
+                days[selected] = np.minimum(months + category[5] - 1, len(day_strings) - 1)
+            choices = tag_choices[code]
+            # Half the rows are untagged; the rest pick a tag or a pair.
+            picks = rng.integers(0, len(choices), len(selected))
+            picks[rng.random(len(selected)) < 0.5] = 0
+            tags[selected] = choices[picks]
+            descriptions[selected] = (merchants[code][rng.integers(0, len(merchants[code]), len(selected))]
+                                      + ' ' + words[rng.integers(0, len(words), len(selected))])
+        yield {
+            'date': day_strings[days].tolist(),
+            'transaction_type': types[codes].tolist(),
+            'amount': amounts.tolist(),
+            'category': names[codes].tolist(),
+            'description': descriptions.tolist(),
+            'tags': tags.tolist(),
+        }
+
+
+def write_csv(path: str, rows: int, seed: int = 0, years: int = 5) -> str:
+    """Write a synthetic ledger as CSV in the export_to_csv layout."""
+    temp_path = path + '.tmp'
+    with open(temp_path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(HEADER)
+        for columns in generate_columns(rows, seed, years):
+            writer.writerows(zip(columns['date'], columns['transaction_type'], columns['amount'],
+                                 columns['category'], columns['description'], columns['tags']))
+    os.replace(temp_path, path)
+    return path
+
+
+def cached_csv(rows: int, seed: int = 0, directory: Optional[str] = None) -> str:
+    """Path of the synthetic CSV for (rows, seed), generating it on first use."""
+    directory = directory or os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache')
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f'ledger-{rows}-{seed}.csv')
+    if not os.path.exists(path):
+        write_csv(path, rows, seed)
+    return path
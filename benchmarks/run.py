@@ -0,0 +1,247 @@
+"""Benchmark the tracker on synthetic ledgers and compare runs.
+
+    python benchmarks/run.py --sizes 10k,1m --storage binary --output before.json
+    python benchmarks/run.py --sizes 10k,1m --storage binary --output after.json --compare before.json
+
+Each size and storage pair is one case. A case imports a synthetic
+ledger (see benchmarks/ledger.py), then times saving, loading, balances,
+searches, budgets, statistics, CSV export and reports on it. Every
+benchmark reports its first (cold) run, which includes building any
+index it needs, and the median of its warm runs. It also reports the
+peak memory it allocated, traced with tracemalloc in one extra run.
+Results are written as JSON. --compare flags the benchmarks that got
+slower, or allocated more, than the threshold, and exits with status 1
+if there are any.
+"""
+from typing import Callable, List, NamedTuple, Optional
+from contextlib import redirect_stdout
+from datetime import datetime
+import argparse
+import io
+import json
+import os
+import platform
+import resource
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+import numpy as np  # noqa: E402
+from benchmarks.ledger import cached_csv, parse_size  # noqa: E402
+from reports.report_generator import generate_report  # noqa: E402
+from tracker.finance_tracker import FinanceTracker  # noqa: E402
+
+# Differences below this many seconds are treated as noise by --compare.
+NOISE_SECONDS = 0.005
+
+
+class Benchmark(NamedTuple):
+    name: str
+    run: Callable[['Case'], object]
+    # Whether the benchmark can be run again on the same ledger.
+    repeatable: bool = True
+
+
+class Case:
+    """One ledger (size and storage) and the tracker open on it."""
+
+    def __init__(self, rows: int, storage: str, seed: int, directory: str, cache: Optional[str]):
+        self.rows = rows
+        self.storage = storage
+        self.directory = directory
+        self.source = cached_csv(rows, seed, cache)
+        suffix = {'json': 'json', 'binary': 'bin', 'sqlite': 'db'}[storage]
+        self.data_file = os.path.join(directory, f'ledger.{suffix}')
+        self.tracker = None
+
+    def open(self) -> FinanceTracker:
+        return FinanceTracker(self.data_file, storage=self.storage)
+
+
+def _import(case: Case):
+    case.tracker = case.open()
+    case.tracker.import_from_csv(case.source)
+
+
+def _load(case: Case):
+    case.tracker.close()
+    case.tracker = case.open()
+
+
+def _report(report_type: str):
+    def run(case: Case):
+        # generate_report writes into ./reports.
+        cwd = os.getcwd()
+        os.chdir(case.directory)
+        try:
+            return generate_report(case.tracker.transactions, report_type)
+        finally:
+            os.chdir(cwd)
+    return run
+
+
+def _set_budgets(case: Case):
+    for category, amount in (('Groceries', 600), ('Dining', 300), ('Travel', 1000)):
+        case.tracker.set_budget(category, amount)
+    case.tracker.check_budget_status()
+
+
+BENCHMARKS = [
+    Benchmark('import_csv', _import, repeatable=False),
+    Benchmark('save_data', lambda case: case.tracker.save_data()),
+    Benchmark('load_data', _load),
+    Benchmark('calculate_balance', lambda case: case.tracker.calculate_balance()),
+    Benchmark('calculate_balance_range',
+              lambda case: case.tracker.calculate_balance('2022-03-15', '2023-06-20')),
+    Benchmark('search_first_page',
+              lambda case: case.tracker.advanced_search(start_date='2023-01-01', category='Dining').page(20)),
+    Benchmark('search_amount_count',
+              lambda case: len(case.tracker.advanced_search(min_amount=500, max_amount=2000))),
+    Benchmark('search_tags_count',
+              lambda case: len(case.tracker.advanced_search(tags='work AND NOT refund'))),
+    Benchmark('search_text_page', lambda case: case.tracker.advanced_search(text='amaz order').page(20)),
+    Benchmark('check_budget_status', _set_budgets),
+    Benchmark('get_statistics', lambda case: case.tracker.get_statistics()),
+    Benchmark('export_to_csv', lambda case: case.tracker.export_to_csv(os.path.join(case.directory, 'out.csv'))),
+    Benchmark('report_summary', _report('summary')),
+    Benchmark('report_detailed', _report('detailed')),
+]
+
+
+def _timed(function, case) -> float:
+    start = time.perf_counter()
+    function(case)
+    return time.perf_counter() - start
+
+
+def _traced_peak(function, case) -> int:
+    tracemalloc.start()
+    try:
+        function(case)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def run_case(rows: int, storage: str, seed: int = 0, repeat: int = 3, memory: bool = True,
+             only: Optional[List[str]] = None, cache: Optional[str] = None) -> dict:
+    directory = tempfile.mkdtemp(prefix='finance-bench-')
+    results = {}
+    try:
+        case = Case(rows, storage, seed, directory, cache)
+        with redirect_stdout(io.StringIO()):
+            for benchmark in BENCHMARKS:
+                if only and benchmark.name not in only and benchmark.name != 'import_csv':
+                    continue
+                times = [_timed(benchmark.run, case)]
+                if benchmark.repeatable:
+                    times += [_timed(benchmark.run, case) for _ in range(repeat - 1)]
+                result = {'first': times[0], 'median': statistics.median(times[1:] or times), 'runs': len(times)}
+                if memory:
+                    if benchmark.repeatable:
+                        result['peak_bytes'] = _traced_peak(benchmark.run, case)
+                    else:
+                        # Trace a second import into a throwaway ledger.
+                        throwaway = Case(rows, storage, seed, os.path.join(directory, 'traced'), cache)
+                        os.makedirs(throwaway.directory)
+                        result['peak_bytes'] = _traced_peak(benchmark.run, throwaway)
+                        throwaway.tracker.close()
+                results[benchmark.name] = result
+            case.tracker.close()
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+    return {'rows': rows, 'storage': storage, 'benchmarks': results,
+            # Peak RSS of the whole run so far (cases run smallest first).
+            'max_rss_bytes': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024}
+
+
+def _metadata(seed: int) -> dict:
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {'timestamp': datetime.now().isoformat(timespec='seconds'), 'commit': commit, 'seed': seed,
+            'python': platform.python_version(), 'numpy': np.__version__,
+            'platform': platform.platform(), 'cpus': os.cpu_count()}
+
+
+def compare(baseline: dict, current: dict, threshold: float = 0.25) -> List[str]:
+    """Describe the benchmarks of `current` that regressed against `baseline`."""
+    regressions = []
+    for case_name, case in current['cases'].items():
+        base_case = baseline.get('cases', {}).get(case_name)
+        if not base_case:
+            continue
+        for name, result in case['benchmarks'].items():
+            base = base_case['benchmarks'].get(name)
+            if not base:
+                continue
+            for metric in ('first', 'median'):
+                old, new = base[metric], result[metric]
+                if new > old * (1 + threshold) and new - old > NOISE_SECONDS:
+                    regressions.append(f"{case_name} {name} {metric}: {old:.4f}s -> {new:.4f}s "
+                                       f"({new / old - 1:+.0%})")
+            if 'peak_bytes' in base and 'peak_bytes' in result:
+                old, new = base['peak_bytes'], result['peak_bytes']
+                if new > old * (1 + threshold) and new - old > 1 << 20:
+                    regressions.append(f"{case_name} {name} peak memory: {old / 2**20:.1f} MiB -> "
+                                       f"{new / 2**20:.1f} MiB ({new / old - 1:+.0%})")
+    return regressions
+
+
+def print_results(results: dict) -> None:
+    for case_name, case in results['cases'].items():
+        print(f"\n{case_name} ({case['rows']:,} rows, peak RSS {case['max_rss_bytes'] / 2**20:.0f} MiB)")
+        print(f"  {'benchmark':<24}{'first':>12}{'median':>12}{'peak MiB':>12}")
+        for name, result in case['benchmarks'].items():
+            peak = f"{result['peak_bytes'] / 2**20:.1f}" if 'peak_bytes' in result else '-'
+            print(f"  {name:<24}{result['first'] * 1000:>10.1f}ms{result['median'] * 1000:>10.1f}ms{peak:>12}")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', default='10k', help="comma-separated: 10k, 100k, 1m, 10m or row counts")
+    parser.add_argument('--storage', default='binary', help="comma-separated: json, binary, sqlite")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=3, help='runs per benchmark (the first is cold)')
+    parser.add_argument('--no-memory', dest='memory', action='store_false', help='skip tracemalloc runs')
+    parser.add_argument('--only', help='comma-separated benchmark names (the import always runs)')
+    parser.add_argument('--cache', help='directory for generated ledgers (default: benchmarks/.cache)')
+    parser.add_argument('--output', help='write the results to this JSON file')
+    parser.add_argument('--compare', help='results JSON to compare against')
+    parser.add_argument('--threshold', type=float, default=0.25, help='allowed slowdown, as a fraction')
+    args = parser.parse_args(argv)
+
+    results = {'meta': _metadata(args.seed), 'cases': {}}
+    only = args.only.split(',') if args.only else None
+    for size in sorted(args.sizes.split(','), key=parse_size):
+        for storage in args.storage.split(','):
+            name = f"{size}-{storage}"
+            print(f"running {name} ...", file=sys.stderr)
+            results['cases'][name] = run_case(parse_size(size), storage, args.seed, args.repeat, args.memory,
+                                              only, args.cache)
+    print_results(results)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(json.load(f), results, args.threshold)
+        print(f"\n{len(regressions)} regression(s) against {args.compare}")
+        for regression in regressions:
+            print(f"  {regression}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
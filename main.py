@@ -1,5 +1,7 @@
 from tracker.finance_tracker import FinanceTracker
-import argparse
+from tracker.query import DEFAULT_PAGE_SIZE
+from tracker import cli
+import sys
 
 def main_menu():
     tracker = FinanceTracker()
@@ -35,7 +37,11 @@ def main_menu():
             start_date = input("Enter start date (YYYY-MM-DD) or press enter to skip: ")
             end_date = input("Enter end date (YYYY-MM-DD) or press enter to skip: ")
             category = input("Enter category to filter by or press enter to skip: ")
-            tracker.view_transactions(start_date or None, end_date or None, category or None)
+            cursor = tracker.view_transactions(start_date or None, end_date or None, category or None,
+                                               limit=DEFAULT_PAGE_SIZE)
+            while cursor and not input("Press enter for more or type q to stop: "):
+                cursor = tracker.view_transactions(start_date or None, end_date or None, category or None,
+                                                   limit=DEFAULT_PAGE_SIZE, cursor=cursor)
         elif choice == "3":
             balance = tracker.calculate_balance()
             print(f"Current balance: ${balance:.2f}")
@@ -80,19 +86,26 @@ def main_menu():
             start_date = input("Enter start date (YYYY-MM-DD) or press enter to skip: ") or None
             end_date = input("Enter end date (YYYY-MM-DD) or press enter to skip: ") or None
             category = input("Enter category or press enter to skip: ") or None
-            tags = input("Enter tags (comma-separated) or press enter to skip: ")
-            tags = tags.split(',') if tags else None
+            tags = input("Enter tags (comma-separated, or an expression like 'travel AND NOT refund') "
+                         "or press enter to skip: ")
+            tags = (tags.split(',') if ',' in tags else tags) if tags.strip() else None
             min_amount = input("Enter minimum amount or press enter to skip: ")
             min_amount = float(min_amount) if min_amount else None
             max_amount = input("Enter maximum amount or press enter to skip: ")
             max_amount = float(max_amount) if max_amount else None
+            text = input("Enter words to find in the description or press enter to skip: ") or None
 
-            results = tracker.advanced_search(start_date, end_date, category, tags, min_amount, max_amount)
+            results = tracker.advanced_search(start_date, end_date, category, tags, min_amount, max_amount, text)
             
-            if results:
+            page = results.page(DEFAULT_PAGE_SIZE)
+            if page.items:
                 print("\nSearch Results:")
-                for transaction in results:
-                    print(transaction)
+                while True:
+                    for transaction in page.items:
+                        print(transaction)
+                    if not page.next_cursor or input("Press enter for more or type q to stop: "):
+                        break
+                    page = results.page(DEFAULT_PAGE_SIZE, cursor=page.next_cursor)
             else:
                 print("No transactions found matching the search criteria.")
             pass
@@ -102,4 +115,7 @@ def main_menu():
             print("Invalid choice, please try again.")
 
 if __name__ == "__main__":
+    # With arguments, run one command non-interactively (see tracker/cli.py).
+    if len(sys.argv) > 1:
+        sys.exit(cli.main())
     main_menu()
\ No newline at end of file
@@ -0,0 +1,308 @@
+from typing import Dict, List, NamedTuple, Optional, Sequence
+from concurrent.futures import Executor
+import os
+import numpy as np
+from tracker.cube import days_to_months
+from tracker.series import DEFAULT_PLOT_POINTS, balance_points
+from tracker.store import INCOME, TransactionStore, month_to_str, parse_day
+from tracker.transaction import CENTS
+
+FORMATS = ('png', 'svg', 'html')
+
+
+class ReportCancelled(Exception):
+    """Raised when a report bundle is cancelled; its files have been removed."""
+
+
+class Chart(NamedTuple):
+    """Everything needed to draw one chart, as plain picklable data.
+
+    `series` maps a label to its values along `x`. With `secondary` set,
+    the second series of a line chart gets its own y axis.
+    """
+    name: str
+    kind: str  # 'pie', 'bar' or 'line'
+    title: str
+    x: list
+    series: Dict[str, list]
+    xlabel: str = ''
+    ylabel: str = ''
+    secondary: bool = False
+
+
+class ReportData:
+    """The aggregates behind every report chart, collected in one pass.
+
+    The date, amount in cents, type and category of the matching
+    transactions are gathered once, and the totals, per-category and
+    per-month figures and the running balance are all reduced from those
+    columns. Sums are taken in whole cents and converted once, so they match
+    the store's own aggregates exactly.
+    """
+
+    def __init__(self, days: np.ndarray, cents: np.ndarray, income: np.ndarray,
+                 codes: np.ndarray, categories: Sequence[str], max_points: int = DEFAULT_PLOT_POINTS):
+        signed = np.where(income, cents, -cents)
+        self.income = int(cents[income].sum()) / CENTS
+        self.expense = int(cents[~income].sum()) / CENTS
+
+        size = len(categories)
+        income_totals = np.bincount(codes, weights=np.where(income, cents, 0), minlength=size)
+        expense_totals = np.bincount(codes, weights=np.where(income, 0, cents), minlength=size)
+        self.category_totals = {categories[code]: {'income': float(income_totals[code]) / CENTS,
+                                                   'expense': float(expense_totals[code]) / CENTS}
+                                for code in np.flatnonzero(np.bincount(codes, minlength=size)).tolist()}
+
+        self.monthly_totals = {}
+        self.balance = (np.empty(0, dtype='datetime64[D]'), np.empty(0))
+        if len(days):
+            months = days_to_months(days)
+            first_month = int(months.min())
+            offsets = months - first_month
+            monthly_income = np.bincount(offsets, weights=np.where(income, cents, 0)) / CENTS
+            monthly_expense = np.bincount(offsets, weights=np.where(income, 0, cents)) / CENTS
+            self.monthly_totals = {month_to_str(first_month + offset): {'income': float(monthly_income[offset]),
+                                                                        'expense': float(monthly_expense[offset])}
+                                   for offset in np.flatnonzero(np.bincount(offsets)).tolist()}
+
+            first_day = int(days.min())
+            offsets = days - first_day
+            net = np.bincount(offsets, weights=signed)
+            present = np.flatnonzero(np.bincount(offsets))
+            self.balance = balance_points(present + first_day, net[present] / CENTS, max_points)
+
+    @classmethod
+    def collect(cls, transactions, start_date=None, end_date=None,
+                max_points: int = DEFAULT_PLOT_POINTS) -> 'ReportData':
+        """Gather the columns of a store, or of any iterable of transactions."""
+        if isinstance(transactions, TransactionStore):
+            store = transactions
+            return store.read(cls._collect_store, store, start_date, end_date, max_points)
+        if hasattr(transactions, 'select'):
+            transactions = transactions.select(start_date, end_date)
+        start_day, end_day = parse_day(start_date or None), parse_day(end_date or None)
+        codes: Dict[str, int] = {}
+        columns = ([], [], [], [])
+        for t in transactions:
+            day = t.day
+            if (start_day is None or day >= start_day) and (end_day is None or day <= end_day):
+                for column, value in zip(columns, (day, t.cents, t.transaction_type == 'income',
+                                                   codes.setdefault(t.category, len(codes)))):
+                    column.append(value)
+        return cls(np.array(columns[0], dtype=np.int64), np.array(columns[1], dtype=np.int64),
+                   np.array(columns[2], dtype=bool), np.array(columns[3], dtype=np.int64), list(codes), max_points)
+
+    @classmethod
+    def _collect_store(cls, store, start_date, end_date, max_points) -> 'ReportData':
+        rows = np.flatnonzero(store._mask(start_date, end_date))
+        return cls(store._day[rows].astype(np.int64), store._cents[rows], store._type[rows] == INCOME,
+                   store._category[rows].astype(np.int64), list(store.categories.values), max_points)
+
+    def charts(self) -> List[Chart]:
+        """Every chart of the report bundle."""
+        return [summary_chart(self.income, self.expense),
+                category_breakdown_chart(self.category_totals),
+                category_expense_chart(self.category_totals),
+                category_comparison_chart(self.category_totals),
+                monthly_chart(self.monthly_totals),
+                balance_chart(*self.balance)]
+
+    def summary(self) -> str:
+        return f"""
+    Financial Summary Report
+    ------------------------
+    Total Income: ${self.income:.2f}
+    Total Expenses: ${self.expense:.2f}
+    Net Balance: ${self.income - self.expense:.2f}
+    """
+
+
+# -- chart definitions -----------------------------------------------------------
+
+def summary_chart(income: float, expense: float) -> Chart:
+    return Chart('financial_summary', 'pie', 'Income vs Expenses', ['Income', 'Expenses'],
+                 {'Amount': [income, expense]})
+
+
+def category_breakdown_chart(category_totals: Dict[str, Dict[str, float]]) -> Chart:
+    return Chart('category_breakdown', 'bar', 'Category Breakdown', list(category_totals),
+                 {'Net': [totals['income'] - totals['expense'] for totals in category_totals.values()]},
+                 'Category', 'Amount')
+
+
+def category_expense_chart(category_totals: Dict[str, Dict[str, float]]) -> Chart:
+    expenses = {category: totals['expense'] for category, totals in category_totals.items() if totals['expense']}
+    return Chart('expenses_by_category', 'pie', 'Expenses by Category', list(expenses),
+                 {'Expenses': list(expenses.values())})
+
+
+def category_comparison_chart(category_totals: Dict[str, Dict[str, float]]) -> Chart:
+    return Chart('category_comparison', 'bar', 'Category Comparison', list(category_totals),
+                 {'Income': [totals['income'] for totals in category_totals.values()],
+                  'Expenses': [totals['expense'] for totals in category_totals.values()]})
+
+
+def monthly_chart(monthly_totals: Dict[str, Dict[str, float]]) -> Chart:
+    return Chart('monthly_income_expenses', 'line', 'Monthly Income and Expenses', list(monthly_totals),
+                 {'Income': [totals['income'] for totals in monthly_totals.values()],
+                  'Expenses': [totals['expense'] for totals in monthly_totals.values()]},
+                 'Month', 'Amount', secondary=True)
+
+
+def balance_chart(dates: np.ndarray, balances: np.ndarray) -> Chart:
+    return Chart('balance_over_time', 'line', 'Balance Over Time', dates, {'Balance': balances},
+                 'Date', 'Balance')
+
+
+# -- rendering -------------------------------------------------------------------
+
+def plotly_figure(chart: Chart):
+    """Build the interactive plotly figure for a chart."""
+    import plotly.graph_objs as go
+    from plotly.subplots import make_subplots
+
+    if chart.kind == 'pie':
+        (values,) = chart.series.values()
+        fig = go.Figure(data=[go.Pie(labels=chart.x, values=values)])
+    elif chart.kind == 'bar':
+        fig = go.Figure(data=[go.Bar(name=label, x=chart.x, y=values) for label, values in chart.series.items()])
+        fig.update_layout(barmode='group')
+    else:
+        fig = make_subplots(specs=[[{"secondary_y": chart.secondary}]])
+        for i, (label, values) in enumerate(chart.series.items()):
+            fig.add_trace(go.Scatter(x=chart.x, y=values, mode='lines', name=label),
+                          secondary_y=chart.secondary and i > 0)
+    fig.update_layout(title=chart.title)
+    if chart.kind != 'pie':
+        fig.update_xaxes(title_text=chart.xlabel)
+        fig.update_yaxes(title_text=chart.ylabel)
+    return fig
+
+
+def _matplotlib_figure(chart: Chart):
+    # Drawn on a bare Figure rather than through pyplot, so no display or
+    # GUI backend is involved and figures are never kept in global state.
+    from matplotlib.figure import Figure
+
+    fig = Figure(figsize=(12, 6))
+    ax = fig.add_subplot()
+    if chart.kind == 'pie':
+        (values,) = chart.series.values()
+        if sum(values):
+            ax.pie(values, labels=chart.x, autopct='%1.1f%%')
+    elif chart.kind == 'bar':
+        positions = np.arange(len(chart.x))
+        width = 0.8 / max(len(chart.series), 1)
+        for i, (label, values) in enumerate(chart.series.items()):
+            ax.bar(positions + (i - (len(chart.series) - 1) / 2) * width, values, width, label=label)
+        ax.set_xticks(positions, chart.x, rotation=45, ha='right')
+    else:
+        axes = ax
+        for i, (label, values) in enumerate(chart.series.items()):
+            if chart.secondary and i == 1:
+                axes = ax.twinx()
+                axes.set_ylabel(chart.ylabel)
+            axes.plot(chart.x, values, label=label, color=f'C{i}')
+        fig.autofmt_xdate()
+    if len(chart.series) > 1:
+        fig.legend()
+    ax.set_title(chart.title)
+    ax.set_xlabel(chart.xlabel)
+    ax.set_ylabel(chart.ylabel)
+    fig.tight_layout()
+    return fig
+
+
+def render_chart(chart: Chart, path: str) -> str:
+    """Write a chart to `path`; the suffix picks HTML (plotly) or PNG/SVG (matplotlib)."""
+    if path.endswith('.html'):
+        # Scripts load plotly.js from next to the file (see `write_plotly_js`).
+        plotly_figure(chart).write_html(path, include_plotlyjs='directory')
+    elif path.endswith(('.png', '.svg')):
+        _matplotlib_figure(chart).savefig(path)
+    else:
+        raise ValueError(f"Unsupported chart format: {path}")
+    return path
+
+
+def write_plotly_js(directory: str) -> None:
+    """Write plotly.js once for all the HTML charts of a directory."""
+    path = os.path.join(directory, 'plotly.min.js')
+    if not os.path.exists(path):
+        from plotly.offline import get_plotlyjs
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(get_plotlyjs())
+
+
+def generate_report_bundle(transactions, output_dir: str, formats: Sequence[str] = FORMATS,
+                           start_date=None, end_date=None, workers: int = 0,
+                           max_points: int = DEFAULT_PLOT_POINTS,
+                           executor: Optional[Executor] = None, cancel=None) -> List[str]:
+    """
+    Render every report chart to files without displaying anything.
+
+    :param transactions: TransactionStore, SQLiteStore or list of transactions
+    :param output_dir: Directory to write the charts and summary.txt to
+    :param formats: Any of 'png', 'svg' and 'html'
+    :param start_date, end_date: Only report on this date range
+    :param workers: Render charts on this many processes (0: in-process)
+    :param max_points: Maximum number of points in the balance chart
+    :param executor: Pool to render on instead, e.g. one shared by many ledgers
+    :param cancel: Object with is_set() (e.g. threading.Event) checked between charts
+    :return: Paths of the files written
+    :raises ReportCancelled: If `cancel` was set; the files written so far are removed
+    """
+    unknown = set(formats) - set(FORMATS)
+    if unknown:
+        raise ValueError(f"Unsupported chart format(s): {', '.join(sorted(unknown))}")
+    os.makedirs(output_dir, exist_ok=True)
+    data = ReportData.collect(transactions, start_date, end_date, max_points)
+    summary_path = os.path.join(output_dir, 'summary.txt')
+    with open(summary_path, 'w') as f:
+        f.write(data.summary())
+    if 'html' in formats:
+        write_plotly_js(output_dir)
+
+    jobs = [(chart, os.path.join(output_dir, f'{chart.name}.{fmt}'))
+            for chart in data.charts() for fmt in formats]
+    try:
+        if executor is None and not workers:
+            paths = []
+            for chart, path in jobs:
+                _check_cancelled(cancel)
+                paths.append(render_chart(chart, path))
+            return [summary_path] + paths
+        return [summary_path] + _render_on_pool(jobs, workers, executor, cancel)
+    except ReportCancelled:
+        for path in [summary_path] + [path for _, path in jobs]:
+            if os.path.exists(path):
+                os.remove(path)
+        raise
+
+
+def _check_cancelled(cancel) -> None:
+    if cancel is not None and cancel.is_set():
+        raise ReportCancelled("report cancelled")
+
+
+def _render_on_pool(jobs, workers: int, executor: Optional[Executor], cancel) -> List[str]:
+    from concurrent.futures import ProcessPoolExecutor, wait  # loads multiprocessing; only needed here
+
+    pool = executor or ProcessPoolExecutor(max_workers=workers)
+    futures = []
+    try:
+        futures = [pool.submit(render_chart, chart, path) for chart, path in jobs]
+        paths = []
+        for future in futures:
+            _check_cancelled(cancel)
+            paths.append(future.result())
+        return paths
+    except BaseException:
+        for future in futures:
+            future.cancel()
+        # Charts already rendering finish before their files can be removed.
+        wait(futures)
+        raise
+    finally:
+        if executor is None:
+            pool.shutdown(cancel_futures=True)
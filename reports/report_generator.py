@@ -1,29 +1,42 @@
-import matplotlib.pyplot as plt
-import seaborn as sns
 import os
-from datetime import datetime
+from tracker.series import DEFAULT_PLOT_POINTS, running_balance
+from tracker.transaction import CENTS
 
-def generate_report(transactions, report_type="summary", start_date=None, end_date=None):
+def generate_report(transactions, report_type="summary", start_date=None, end_date=None,
+                    max_points=DEFAULT_PLOT_POINTS):
     if not os.path.exists('reports'):
         os.makedirs('reports')
     
-    # Filter transactions by date if specified
-    if start_date:
-        transactions = [t for t in transactions if t.date >= start_date]
-    if end_date:
-        transactions = [t for t in transactions if t.date <= end_date]
+    # A transaction store filters and aggregates itself; plain lists are
+    # filtered here.
+    if _is_store(transactions):
+        date_range = (start_date, end_date)
+    else:
+        date_range = (None, None)
+        if start_date:
+            transactions = [t for t in transactions if t.date >= start_date]
+        if end_date:
+            transactions = [t for t in transactions if t.date <= end_date]
     
     if report_type == "summary":
-        return generate_summary_report(transactions)
+        return generate_summary_report(transactions, *date_range)
     elif report_type == "detailed":
-        return generate_detailed_report(transactions)
+        return generate_detailed_report(transactions, *date_range, max_points=max_points)
     else:
         raise ValueError("Invalid report type. Choose 'summary' or 'detailed'.")
 
-def generate_summary_report(transactions):
-    income = sum(t.amount for t in transactions if t.transaction_type == 'income')
-    expenses = sum(t.amount for t in transactions if t.transaction_type == 'expense')
+def _is_store(transactions):
+    return hasattr(transactions, 'totals')
+
+def generate_summary_report(transactions, start_date=None, end_date=None):
+    if _is_store(transactions):
+        income, expenses = transactions.totals(start_date, end_date)
+    else:
+        income = sum(t.cents for t in transactions if t.transaction_type == 'income') / CENTS
+        expenses = sum(t.cents for t in transactions if t.transaction_type == 'expense') / CENTS
     
+    import matplotlib.pyplot as plt
+
     # Create pie chart
     plt.figure(figsize=(10, 6))
     plt.pie([income, expenses], labels=['Income', 'Expenses'], autopct='%1.1f%%')
@@ -46,21 +59,24 @@ def generate_summary_report(transactions):
     
     return report_path
 
-def generate_detailed_report(transactions):
+def generate_detailed_report(transactions, start_date=None, end_date=None,
+                             max_points=DEFAULT_PLOT_POINTS):
     categories = {}
-    dates = []
-    balances = []
-    running_balance = 0
     
-    for t in sorted(transactions, key=lambda x: x.date):
-        if t.category not in categories:
-            categories[t.category] = 0
-        categories[t.category] += t.amount if t.transaction_type == 'income' else -t.amount
-        
-        running_balance += t.amount if t.transaction_type == 'income' else -t.amount
-        dates.append(datetime.strptime(t.date, "%Y-%m-%d"))
-        balances.append(running_balance)
+    if _is_store(transactions):
+        categories = {category: totals['income'] - totals['expense']
+                      for category, totals in transactions.category_totals(start_date, end_date).items()}
+    else:
+        for t in transactions:
+            if t.category not in categories:
+                categories[t.category] = 0
+            categories[t.category] += t.cents if t.transaction_type == 'income' else -t.cents
+        categories = {category: cents / CENTS for category, cents in categories.items()}
+    
+    dates, balances = running_balance(transactions, start_date, end_date, max_points)
     
+    import matplotlib.pyplot as plt
+
     # Create category breakdown
     plt.figure(figsize=(12, 6))
     plt.bar(categories.keys(), categories.values())
@@ -0,0 +1,94 @@
+import asyncio
+import io
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from contextlib import redirect_stdout
+from tracker.async_tracker import AsyncFinanceTracker
+from tracker.exporter import read_columnar
+
+RECORDS = [
+    {"amount": 1000, "category": "Salary", "description": "Monthly pay", "date": "2024-07-01",
+     "transaction_type": "income", "tags": ["work"]},
+    {"amount": 200, "category": "Food", "description": "Groceries", "date": "2024-08-10",
+     "transaction_type": "expense", "tags": ["food"]},
+    {"amount": 40, "category": "Food", "description": "Lunch", "date": "2024-08-12",
+     "transaction_type": "expense", "tags": ["food", "work"]},
+] * 5
+
+
+class TestAsyncFinanceTracker(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.output = redirect_stdout(io.StringIO())
+        self.output.__enter__()
+        self.tracker = await AsyncFinanceTracker.open(self.path('ledger.bin'), storage='binary',
+                                                      max_concurrency=2)
+        await self.tracker.run(self.tracker.tracker.add_transactions_bulk, RECORDS)
+
+    async def asyncTearDown(self):
+        await self.tracker.close()
+        self.output.__exit__(None, None, None)
+        shutil.rmtree(self.directory)
+
+    def path(self, name):
+        return os.path.join(self.directory, name)
+
+    async def test_save_and_reopen(self):
+        await self.tracker.save()
+        async with await AsyncFinanceTracker.open(self.path('ledger.bin'), storage='binary') as reopened:
+            self.assertEqual(await reopened.balance(), 5 * 760)
+
+    async def test_async_iteration(self):
+        query = self.tracker.query(category='food', batch_size=4)
+        expected = [t.to_dict() for t in self.tracker.tracker.advanced_search(category='food')]
+        self.assertEqual([t.to_dict() async for t in query], expected)
+        self.assertEqual(await query.count(), 10)
+        self.assertEqual((await query.where(text='lunch').first()).description, 'Lunch')
+        page = await query.page(3)
+        self.assertEqual(len(page.items), 3)
+        self.assertIsNotNone(page.next_cursor)
+
+    async def test_export_and_report(self):
+        self.assertEqual(await self.tracker.export(self.path('food.csv'), category='food'), 10)
+        self.assertEqual(await self.tracker.export(self.path('all.npz'), columnar=True), 15)
+        self.assertEqual(len(read_columnar(self.path('all.npz'))['amount']), 15)
+        paths = await self.tracker.report(self.path('report'), formats=('svg',))
+        self.assertTrue(all(os.path.exists(path) for path in paths))
+
+    async def test_concurrency_is_bounded(self):
+        running, peak = [0], [0]
+        lock = threading.Lock()
+
+        def job():
+            with lock:
+                running[0] += 1
+                peak[0] = max(peak[0], running[0])
+            time.sleep(0.02)
+            with lock:
+                running[0] -= 1
+        await asyncio.gather(*[self.tracker.run(job) for _ in range(6)])
+        self.assertEqual(peak[0], 2)
+
+    async def test_cancel_stops_running_call(self):
+        started, cancel = threading.Event(), threading.Event()
+        finished = []
+
+        def job(cancel):
+            started.set()
+            cancel.wait(5)
+            finished.append(cancel.is_set())
+        task = asyncio.create_task(self.tracker.run(job, cancel=cancel))
+        await asyncio.get_running_loop().run_in_executor(None, started.wait)
+        task.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await task
+        # The call saw the request and had stopped before the cancellation was raised.
+        self.assertEqual(finished, [True])
+
+
+if __name__ == '__main__':
+    unittest.main()
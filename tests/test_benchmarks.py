@@ -0,0 +1,54 @@
+import os
+import tempfile
+import unittest
+from benchmarks.ledger import CATEGORIES, generate_columns, parse_size, write_csv
+from benchmarks.run import BENCHMARKS, compare, run_case
+from tracker.store import TransactionStore
+
+
+class TestSyntheticLedger(unittest.TestCase):
+    def test_deterministic(self):
+        self.assertEqual(list(generate_columns(500, seed=3)), list(generate_columns(500, seed=3)))
+        self.assertNotEqual(list(generate_columns(500, seed=3)), list(generate_columns(500, seed=4)))
+
+    def test_distributions(self):
+        columns = next(generate_columns(20000, batch_size=20000))
+        store = TransactionStore()
+        store.extend_columns(dict(columns, tags=[tags.split(',') if tags else [] for tags in columns['tags']]))
+        totals = store.category_totals()
+        self.assertEqual(set(totals), {category[0] for category in CATEGORIES})
+        counts = {name: columns['category'].count(name) for name in totals}
+        self.assertGreater(counts['Groceries'], 5 * counts['Travel'])
+        self.assertTrue(all(day.endswith('-25') for day, category in zip(columns['date'], columns['category'])
+                            if category == 'Salary'))
+        self.assertTrue(all(0 < amount for amount in columns['amount']))
+        self.assertGreater(len(store.search(tags='work AND NOT refund')), 0)
+        self.assertEqual(parse_size('1m'), 1_000_000)
+        self.assertEqual(parse_size('2500'), 2500)
+
+    def test_csv_round_trip(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = write_csv(os.path.join(directory, 'ledger.csv'), 1000)
+            with open(path) as f:
+                self.assertEqual(sum(1 for _ in f), 1001)
+
+
+class TestBenchmarkRunner(unittest.TestCase):
+    def test_run_case_and_compare(self):
+        with tempfile.TemporaryDirectory() as cache:
+            result = run_case(300, 'binary', repeat=1, cache=cache)
+        self.assertEqual(list(result['benchmarks']), [benchmark.name for benchmark in BENCHMARKS])
+        for benchmark in result['benchmarks'].values():
+            self.assertGreaterEqual(benchmark['peak_bytes'], 0)
+
+        baseline = {'cases': {'300-binary': result}}
+        slower = {'cases': {'300-binary': dict(result, benchmarks=dict(
+            result['benchmarks'], save_data=dict(result['benchmarks']['save_data'], first=10.0, median=10.0)))}}
+        self.assertEqual(compare(baseline, baseline), [])
+        regressions = compare(baseline, slower)
+        self.assertEqual(len(regressions), 2)
+        self.assertTrue(regressions[0].startswith('300-binary save_data first'))
+
+
+if __name__ == '__main__':
+    unittest.main()
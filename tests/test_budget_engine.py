@@ -0,0 +1,58 @@
+import unittest
+from datetime import date, datetime, timedelta
+from unittest.mock import patch
+from tracker.budget import Budget
+from tracker.budget_engine import BudgetEngine
+from tracker.store import TransactionStore
+from tracker.transaction import Transaction
+
+class TestBudgetWindow(unittest.TestCase):
+    def budget(self, period, start):
+        budget = Budget("Food", 100, period)
+        budget.start_date = start
+        return budget
+
+    def test_periods(self):
+        on = date(2024, 7, 17)
+        self.assertEqual(self.budget('daily', datetime(2024, 7, 1)).window(on), (on, on))
+        self.assertEqual(self.budget('weekly', datetime(2024, 7, 1)).window(on),
+                         (date(2024, 7, 15), date(2024, 7, 21)))
+        self.assertEqual(self.budget('monthly', datetime(2024, 7, 1)).window(on),
+                         (date(2024, 7, 1), date(2024, 7, 31)))
+        self.assertEqual(self.budget('monthly', datetime(2024, 1, 20)).window(on),
+                         (date(2024, 6, 20), date(2024, 7, 19)))
+        self.assertEqual(self.budget('monthly', datetime(2024, 1, 31)).window(date(2024, 2, 29)),
+                         (date(2024, 2, 29), date(2024, 3, 30)))
+
+    def test_invalid_period(self):
+        with self.assertRaises(ValueError):
+            Budget("Food", 100, "yearly")
+
+class TestBudgetEngine(unittest.TestCase):
+    def setUp(self):
+        today = date.today()
+        self.today = today
+        self.store = TransactionStore([
+            Transaction(30, "Food", "Lunch", today.isoformat(), "expense"),
+            Transaction(20, "Food", "Old", (today - timedelta(days=8)).isoformat(), "expense"),
+            Transaction(500, "Food", "Refund", today.isoformat(), "income"),
+            Transaction(40, "Fun", "Cinema", today.isoformat(), "expense"),
+        ])
+        self.budgets = {"Food": Budget("Food", 100, "weekly"), "Fun": Budget("Fun", 50, "daily")}
+        for budget in self.budgets.values():
+            budget.start_date = datetime.combine(today, datetime.min.time())
+        self.alerts = []
+        self.engine = BudgetEngine(self.store, self.budgets,
+                                   lambda budget, spent, level: self.alerts.append((budget.category, level)))
+
+    def test_spending_and_alerts(self):
+        self.assertEqual(self.engine.spending(self.today), {"Food": 30, "Fun": 40})
+        self.store.append(Transaction(65, "Food", "Dinner", self.today.isoformat(), "expense"))
+        self.assertEqual(self.alerts, [("Food", "warning")])
+        self.store.append(Transaction(20, "Fun", "Game", self.today.isoformat(), "expense"))
+        self.assertEqual(self.alerts[-1], ("Fun", "exceeded"))
+        self.store.pop(0)
+        self.assertEqual(self.engine.spending(self.today), {"Food": 65, "Fun": 60})
+
+if __name__ == '__main__':
+    unittest.main()
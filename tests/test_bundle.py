@@ -0,0 +1,90 @@
+import os
+import tempfile
+import threading
+import unittest
+from unittest.mock import patch
+from reports.bundle import ReportCancelled, ReportData, generate_report_bundle, render_chart, summary_chart
+from tracker.finance_tracker import FinanceTracker
+from tracker.series import running_balance
+from tracker.store import TransactionStore
+from tracker.transaction import Transaction
+
+TRANSACTIONS = [
+    Transaction(1000, "Salary", "Monthly", "2024-07-01", "income"),
+    Transaction(500, "Rent", "Monthly", "2024-07-05", "expense"),
+    Transaction(200, "Food", "Groceries", "2024-08-10", "expense"),
+    Transaction(40, "Food", "Lunch", "2024-08-12", "expense"),
+]
+
+
+class TestReportBundle(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.store = TransactionStore(TRANSACTIONS)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_collect_matches_store_aggregates(self):
+        for transactions in (self.store, TRANSACTIONS):
+            data = ReportData.collect(transactions, start_date="2024-07-02")
+            self.assertEqual((data.income, data.expense), self.store.totals("2024-07-02"))
+            self.assertEqual(data.category_totals, self.store.category_totals("2024-07-02"))
+            self.assertEqual(data.monthly_totals, self.store.monthly_totals("2024-07-02"))
+            self.assertEqual(data.balance[1].tolist(), [-500, -700, -740])
+
+    def test_collect_sums_in_cents(self):
+        store = TransactionStore([Transaction(0.1, "Food", "Snack", f"2024-08-{day:02d}", "income")
+                                  for day in range(1, 29)])
+        data = ReportData.collect(store)
+        dates, balances = running_balance(store)
+        self.assertEqual(data.balance[1].tolist(), balances.tolist())
+        self.assertEqual(data.balance[1][-1], 2.8)
+        self.assertEqual(data.monthly_totals, store.monthly_totals())
+
+    def test_bundle_renders_every_chart(self):
+        output = os.path.join(self.directory.name, "bundle")
+        paths = generate_report_bundle(self.store, output, formats=('png', 'svg', 'html'))
+        self.assertEqual(len(paths), 1 + 6 * 3)
+        for path in paths:
+            self.assertTrue(os.path.getsize(path) > 0, path)
+        self.assertTrue(os.path.exists(os.path.join(output, 'plotly.min.js')))
+
+    def test_bundle_on_process_pool(self):
+        serial = generate_report_bundle(self.store, os.path.join(self.directory.name, "a"), formats=('svg',))
+        parallel = generate_report_bundle(self.store, os.path.join(self.directory.name, "b"), formats=('svg',),
+                                          workers=2)
+        self.assertEqual([os.path.basename(path) for path in serial],
+                         [os.path.basename(path) for path in parallel])
+
+    def test_cancel_removes_files(self):
+        output = os.path.join(self.directory.name, "cancelled")
+        cancel = threading.Event()
+        with patch('reports.bundle.render_chart', side_effect=lambda chart, path: cancel.set()):
+            with self.assertRaises(ReportCancelled):
+                generate_report_bundle(self.store, output, formats=('svg',), cancel=cancel)
+        self.assertEqual(os.listdir(output), [])
+
+    def test_empty_and_invalid(self):
+        paths = generate_report_bundle([], self.directory.name, formats=('png',))
+        self.assertEqual(len(paths), 7)
+        with self.assertRaises(ValueError):
+            generate_report_bundle(self.store, self.directory.name, formats=('pdf',))
+        with self.assertRaises(ValueError):
+            render_chart(summary_chart(1, 1), os.path.join(self.directory.name, "chart.pdf"))
+
+    def test_tracker_writes_instead_of_showing(self):
+        with patch.object(FinanceTracker, 'load_data'):
+            tracker = FinanceTracker()
+        tracker.transactions = TRANSACTIONS
+        path = os.path.join(self.directory.name, "monthly.png")
+        with patch('plotly.graph_objs.Figure.show') as show:
+            self.assertEqual(tracker.generate_monthly_report(output=path), path)
+            tracker.generate_category_comparison("2024-07-01", "2024-08-31",
+                                                 output=os.path.join(self.directory.name, "comparison.svg"))
+            show.assert_not_called()
+        self.assertTrue(os.path.getsize(path) > 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
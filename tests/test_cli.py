@@ -0,0 +1,100 @@
+import io
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+from tracker import cli
+
+RECORDS = [
+    {"amount": 12.5, "category": "Food", "description": "Lunch out", "date": "2024-07-01",
+     "transaction_type": "expense", "tags": ["work"]},
+    {"amount": 900, "category": "Rent", "description": "July rent", "date": "2024-07-02",
+     "transaction_type": "expense"},
+    {"amount": 3000, "category": "Salary", "description": "Pay", "date": "2024-07-25",
+     "transaction_type": "income"},
+]
+
+
+class TestCli(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.data_file = os.path.join(self.directory, 'ledger.json')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def run_cli(self, *argv, stdin='', fmt='json', status=0):
+        out = io.StringIO()
+        with patch('sys.stderr', new_callable=io.StringIO):
+            self.assertEqual(cli.main(['--data-file', self.data_file, '--format', fmt, *argv],
+                                      stdin=io.StringIO(stdin), stdout=out), status)
+        return out.getvalue()
+
+    def results(self, *argv, **kwargs):
+        return json.loads(self.run_cli(*argv, **kwargs))['results']
+
+    def load_records(self):
+        return self.results('add', stdin=''.join(json.dumps(record) + '\n' for record in RECORDS))
+
+    def test_add_and_balance(self):
+        self.assertEqual(self.load_records(), [{'added': 3, 'skipped': 0}])
+        self.assertEqual(self.results('add', '--amount', '7.5', '--category', 'Food', '--date', '2024-07-03'),
+                         [{'added': 1, 'skipped': 0}])
+        self.assertEqual(self.results('balance'), [{'income': 3000.0, 'expense': 920.0, 'balance': 2080.0}])
+        self.assertEqual(self.results('balance', '--end', '2024-07-02')[0]['balance'], -912.5)
+
+    def test_invalid_input_fails(self):
+        self.run_cli('add', '--amount', '5', status=2)
+        self.run_cli('add', stdin='{"amount": "x"}\n', status=2)
+        self.assertEqual(self.results('add', stdin=json.dumps(RECORDS[0]) + '\n{"amount": "x"}\n'),
+                         [{'added': 1, 'skipped': 1}])
+        self.run_cli('import', os.path.join(self.directory, 'missing.csv'), status=2)
+
+    def test_query_formats_and_pages(self):
+        self.load_records()
+        page = json.loads(self.run_cli('query', '--limit', '2'))
+        self.assertEqual([t['description'] for t in page['results']], ['Lunch out', 'July rent'])
+        rest = json.loads(self.run_cli('query', '--limit', '2', '--cursor', page['next_cursor']))
+        self.assertEqual([t['description'] for t in rest['results']], ['Pay'])
+        self.assertIsNone(rest['next_cursor'])
+        lines = self.run_cli('query', '--text', 'rent', fmt='jsonl').splitlines()
+        self.assertEqual([json.loads(line)['category'] for line in lines], ['Rent'])
+
+        # CSV output can be imported again.
+        exported = self.run_cli('query', '--tags', 'work', fmt='csv')
+        self.assertEqual(exported.splitlines()[0], 'Date,Type,Amount,Category,Description,Tags')
+        self.assertEqual(self.results('import', '-', stdin=exported), [{'added': 1, 'skipped': 0}])
+        self.assertEqual(len(self.results('query', '--category', 'food')), 2)
+
+    def test_budget_persists(self):
+        self.load_records()
+        self.results('budget', 'set', 'Food', '100', '--period', 'weekly')
+        status = self.results('budget', 'status')
+        self.assertEqual([(s['category'], s['period'], s['amount']) for s in status], [('Food', 'weekly', 100.0)])
+        self.assertEqual(self.run_cli('budget', 'status', fmt='csv').splitlines()[0],
+                         'category,period,amount,spent,remaining,exceeded')
+
+    def test_export_reports_the_path_written(self):
+        self.load_records()
+        target = os.path.join(self.directory, 'out.csv.zst')
+        with patch('tracker.exporter._zstd_compress', None):
+            results = self.results('export', target)
+        self.assertEqual(results, [{'file': target[:-len('.zst')] + '.gz', 'rows': 3}])
+        self.assertTrue(os.path.exists(results[0]['file']))
+        with patch('tracker.finance_tracker.FinanceTracker.export_to_csv', return_value=None):
+            self.run_cli('export', target, status=2)
+
+    def test_export_report_and_recurring(self):
+        self.load_records()
+        target = os.path.join(self.directory, 'out.csv')
+        self.assertEqual(self.results('export', target, '--category', 'Rent'), [{'file': target, 'rows': 1}])
+        files = self.results('report', '--output-dir', os.path.join(self.directory, 'report'), '--formats', 'svg')
+        self.assertEqual(len(files), 7)
+        self.run_cli('report', '--formats', 'pdf', status=2)
+        self.assertEqual(self.results('process-recurring', '--today', '2024-08-01'), [{'added': 0}])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,182 @@
+import io
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import unittest
+from contextlib import redirect_stdout
+from unittest.mock import patch
+from tracker.finance_tracker import FinanceTracker
+from tracker.indexes import SearchPlan
+from tracker.sqlite_store import SQLiteStore
+from tracker.store import TransactionStore
+from tracker.transaction import Transaction
+
+CATEGORIES = ["Food", "Rent", "Travel", "Fun"]
+
+
+def ledger(rows):
+    return [Transaction(1 + i % 7, CATEGORIES[i % 4], f"item {i}", f"2024-{1 + i % 12:02d}-{1 + i % 28:02d}",
+                        "expense" if i % 3 else "income", ["even" if i % 2 else "odd"])
+            for i in range(rows)]
+
+
+class TestSnapshotReads(unittest.TestCase):
+    def setUp(self):
+        self.store = TransactionStore(ledger(200))
+
+    def test_read_retries_when_a_write_is_published(self):
+        calls = []
+
+        def count_twice():
+            calls.append(1)
+            before = len(self.store)
+            if len(calls) == 1:
+                writer = threading.Thread(target=self.store.append, args=(ledger(1)[0],))
+                writer.start()
+                writer.join()
+            return before, len(self.store)
+
+        self.assertEqual(self.store.read(count_twice), (201, 201))
+        self.assertEqual(len(calls), 2)
+
+    def test_query_iterates_the_version_it_started_with(self):
+        for sort_limit in (SearchPlan.SORT_LIMIT, 0):
+            with self.subTest(sort_limit=sort_limit), patch.object(SearchPlan, 'SORT_LIMIT', sort_limit):
+                query = self.store.query(category="food")
+                expected = [t.description for t in query]
+                items = iter(query)
+                first = next(items)
+                self.store.update(1, category="Food", description="moved")
+                self.store.pop(0)
+                self.store.append(Transaction(5, "Food", "late", "2024-01-01", "expense"))
+                self.assertEqual([first.description] + [t.description for t in items], expected)
+
+    def test_iteration_survives_edits(self):
+        expected = [t.description for t in self.store]
+        items = iter(self.store)
+        first = next(items)
+        self.store.pop(5)
+        self.store.update(0, description="edited")
+        self.assertEqual([first.description] + [t.description for t in items], expected)
+
+    def test_clear_during_iteration_raises(self):
+        items = iter(self.store.query())
+        next(items)
+        self.store.clear()
+        with self.assertRaises(RuntimeError):
+            next(items)
+
+
+class TestConcurrentAccess(unittest.TestCase):
+    def setUp(self):
+        self.interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-5)
+
+    def tearDown(self):
+        sys.setswitchinterval(self.interval)
+
+    def run_threads(self, *targets):
+        errors = []
+
+        def guarded(target):
+            try:
+                target()
+            except Exception as e:
+                errors.append(e)
+        threads = [threading.Thread(target=guarded, args=(target,)) for target in targets]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        if errors:
+            raise errors[0]
+
+    def test_readers_never_see_half_applied_edits(self):
+        store = TransactionStore(ledger(2000))
+        totals = store.totals()
+        count = len(store.query(min_amount=0))
+        done = threading.Event()
+
+        def writer():
+            try:
+                for i in range(300):
+                    # Amounts stay put, so every aggregate is invariant.
+                    store.update(i * 7 % 2000, category=CATEGORIES[i % 4], description=f"edit {i}")
+            finally:
+                done.set()
+
+        def reader():
+            while not done.is_set():
+                self.assertEqual(store.totals(), totals)
+                self.assertEqual(sum(cell['expense'] for cell in store.category_totals().values()), totals[1])
+                self.assertEqual(len(store.query(min_amount=0)), count)
+                self.assertEqual(len(list(store.query(start_date="2024-06-01"))),
+                                 len(store.search(start_date="2024-06-01")))
+
+        with patch.object(SearchPlan, 'SORT_LIMIT', 16):
+            self.run_threads(writer, reader, reader, reader)
+        self.assertEqual(len(store), 2000)
+
+    def test_first_use_builds_once(self):
+        store = TransactionStore(ledger(5000))
+        results = []
+
+        def reader():
+            results.append((store.totals(), len(store.search(category="rent", tags=["odd"])),
+                            len(store.query(text="item")), tuple(store.monthly_totals())))
+        self.run_threads(*[reader] * 4)
+        self.assertEqual(len(set(results)), 1)
+
+    def test_concurrent_writers(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        with redirect_stdout(io.StringIO()):
+            tracker = FinanceTracker(os.path.join(directory, 'ledger.json'), journal=True)
+
+        def writer():
+            for i in range(50):
+                tracker.add_transaction(10, "Food", f"meal {i}", "expense")
+        with patch('builtins.print'):
+            self.run_threads(*[writer] * 4)
+            self.assertEqual(len(tracker.transactions), 200)
+            tracker.close()
+            reopened = FinanceTracker(os.path.join(directory, 'ledger.json'), journal=True)
+        self.assertEqual(len(reopened.transactions), 200)
+        self.assertEqual(reopened.calculate_balance(), -2000)
+
+
+class TestSQLiteConcurrency(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.store = SQLiteStore(os.path.join(self.directory, 'ledger.db'))
+        self.store.extend(ledger(100))
+
+    def tearDown(self):
+        self.store.close()
+        shutil.rmtree(self.directory)
+
+    def test_reads_from_other_threads(self):
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(self.store.totals())) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results, [self.store.totals()] * 3)
+
+    def test_read_sees_one_committed_version(self):
+        def count_twice():
+            before = len(self.store)
+            writer = threading.Thread(target=self.store.append, args=(ledger(1)[0],))
+            writer.start()
+            writer.join()
+            return before, len(self.store)
+
+        self.assertEqual(self.store.read(count_twice), (100, 100))
+        self.assertEqual(len(self.store), 101)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+import os
+import random
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+import numpy as np
+from tracker.finance_tracker import FinanceTracker
+from tracker.store import TransactionStore
+from tracker.transaction import Transaction
+
+class TestAggregateCube(unittest.TestCase):
+    def setUp(self):
+        rng = random.Random(7)
+        self.store = TransactionStore([
+            Transaction(rng.randint(1, 500), rng.choice(["Food", "Rent", "Fun"]), "Row",
+                        f"2024-{rng.randint(1, 6):02d}-{rng.randint(1, 28):02d}",
+                        rng.choice(["income", "expense"]))
+            for _ in range(300)
+        ])
+
+    def scan(self, start_date=None, end_date=None):
+        totals = {}
+        for t in self.store:
+            if (start_date is None or t.date >= start_date) and (end_date is None or t.date <= end_date):
+                totals.setdefault(t.category, {'income': 0, 'expense': 0})[t.transaction_type] += t.amount
+        return totals
+
+    def test_matches_scan(self):
+        for start_date, end_date in [(None, None), ("2024-02-01", "2024-04-30"), ("2024-02-15", "2024-05-03"),
+                                     ("2024-03-04", "2024-03-20"), (None, "2024-03-10"), ("2024-04-30", None)]:
+            self.assertEqual(self.store.category_totals(start_date, end_date), self.scan(start_date, end_date))
+
+    def test_maintained_on_writes(self):
+        self.store.category_totals()
+        self.store.append(Transaction(99, "Travel", "Train", "2024-03-02", "expense"))
+        self.store.update(0, category="Travel")
+        self.store.pop(5)
+        self.assertEqual(self.store.category_totals(), self.scan())
+        months = self.store.monthly_totals()
+        self.assertEqual(list(months), ["2024-01", "2024-02", "2024-03", "2024-04", "2024-05", "2024-06"])
+        self.assertAlmostEqual(sum(m['expense'] for m in months.values()), self.store.totals()[1])
+
+    def test_persisted_with_binary_snapshot(self):
+        directory = tempfile.mkdtemp()
+        try:
+            path = os.path.join(directory, 'ledger.ftsnap')
+            with patch('builtins.print'):
+                tracker = FinanceTracker(path, storage='binary')
+                tracker.transactions = list(self.store)
+                tracker.save_data()
+                reopened = FinanceTracker(path, storage='binary')
+            self.assertIsNotNone(reopened._store.cube._cells)
+            self.assertEqual(reopened._store.category_totals(), self.scan())
+        finally:
+            shutil.rmtree(directory)
+
+if __name__ == '__main__':
+    unittest.main()
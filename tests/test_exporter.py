@@ -0,0 +1,105 @@
+import csv
+import gzip
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from unittest.mock import patch
+from tracker.exporter import ExportCancelled, export_columnar, export_csv, read_columnar, resolve_compression
+from tracker.sqlite_store import SQLiteStore
+from tracker.store import TransactionStore
+from tracker.transaction import Transaction
+
+class TestExporter(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.store = TransactionStore(
+            Transaction(i + 0.5, 'Food' if i % 3 else 'Rent', f'item "{i}", x', f'2024-{i % 12 + 1:02d}-01',
+                        'expense' if i % 4 else 'income', ['weekly'] if i % 5 == 0 else [])
+            for i in range(120))
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def path(self, name):
+        return os.path.join(self.directory, name)
+
+    def read(self, path, opener=open):
+        with opener(path, 'rt', newline='') as f:
+            return list(csv.reader(f))
+
+    def test_filters_and_progress(self):
+        calls = []
+        path, count = export_csv(self.store, self.path('food.csv'), '2024-03-01', '2024-06-30', 'food',
+                                 chunk_size=7, progress=lambda done, total: calls.append((done, total)))
+        expected = self.store.search('2024-03-01', '2024-06-30', 'food')
+        rows = self.read(path)
+        self.assertEqual(rows[0], ['Date', 'Type', 'Amount', 'Category', 'Description', 'Tags'])
+        self.assertEqual(count, len(expected))
+        self.assertEqual(rows[1:], [[t.date, t.transaction_type, str(t.amount), t.category, t.description,
+                                     ','.join(t.tags)] for t in expected])
+        self.assertEqual(calls[-1], (count, count))
+
+        _, count = export_csv(self.store, self.path('tagged.csv'), tags=['weekly'])
+        self.assertEqual(count, 24)
+
+    def test_gzip_serial_and_parallel_match(self):
+        plain, _ = export_csv(self.store, self.path('all.csv'))
+        serial, _ = export_csv(self.store, self.path('serial.csv.gz'), chunk_size=10)
+        parallel, _ = export_csv(self.store, self.path('parallel.csv'), compression='gzip',
+                                 chunk_size=10, workers=2)
+        self.assertEqual(self.read(serial, gzip.open), self.read(plain))
+        self.assertEqual(self.read(parallel, gzip.open), self.read(plain))
+
+    def test_zstd_falls_back_to_gzip(self):
+        with patch('tracker.exporter._zstd_compress', None), patch('builtins.print'):
+            self.assertEqual(resolve_compression('out.csv.zst'), ('out.csv.gz', 'gzip'))
+
+    def test_cancel_leaves_no_file(self):
+        cancel = threading.Event()
+        path = self.path('cancelled.csv.gz')
+        with self.assertRaises(ExportCancelled):
+            export_csv(self.store, path, chunk_size=10, cancel=cancel,
+                       progress=lambda done, total: cancel.set())
+        self.assertFalse(os.path.exists(path))
+
+    def test_cancel_keeps_an_existing_file(self):
+        cancel = threading.Event()
+        for name, export in (('kept.csv', export_csv), ('kept.npz', export_columnar)):
+            path = self.path(name)
+            with open(path, 'w') as f:
+                f.write('previous export')
+            cancel.set()
+            with self.subTest(name=name), self.assertRaises(ExportCancelled):
+                export(self.store, path, cancel=cancel)
+            with open(path) as f:
+                self.assertEqual(f.read(), 'previous export')
+            self.assertFalse(os.path.exists(path + '.tmp'))
+
+    def test_other_stores_are_paged(self):
+        store = SQLiteStore(self.path('ledger.db'))
+        try:
+            store.extend(self.store)
+            calls = []
+            with patch.object(SQLiteStore, 'search', side_effect=AssertionError("loads every row")):
+                path, count = export_csv(store, self.path('food.csv'), category='food', chunk_size=16,
+                                         progress=lambda done, total: calls.append((done, total)))
+        finally:
+            store.close()
+        expected = self.store.search(category='food')
+        self.assertEqual(count, 80)
+        self.assertEqual(calls[:2], [(16, 80), (32, 80)])
+        self.assertEqual(sorted(self.read(path)[1:]), sorted([t.date, t.transaction_type, str(t.amount), t.category,
+                                                              t.description, ','.join(t.tags)] for t in expected))
+
+    def test_columnar_round_trip(self):
+        path, count = export_columnar(self.store, self.path('rent.npz'), category='Rent')
+        columns = read_columnar(path)
+        copy = TransactionStore()
+        copy.extend_columns(columns)
+        self.assertEqual(count, 40)
+        self.assertEqual([t.to_dict() for t in copy], [t.to_dict() for t in self.store.select(category='Rent')])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,34 @@
+import unittest
+import numpy as np
+from tracker.fenwick import FenwickTree
+from tracker.store import TransactionStore
+from tracker.transaction import Transaction
+
+class TestFenwickTree(unittest.TestCase):
+    def test_prefix_and_update(self):
+        values = np.array([3.0, 1.0, 4.0, 1.0, 5.0, 9.0, 2.0])
+        tree = FenwickTree(values)
+        for start in range(len(values) + 1):
+            for stop in range(start, len(values) + 1):
+                self.assertAlmostEqual(tree.range_sum(start, stop), values[start:stop].sum())
+        tree.add(2, -4.0)
+        self.assertAlmostEqual(tree.prefix(7), 21.0)
+
+class TestDailyTotals(unittest.TestCase):
+    def test_maintained_on_writes(self):
+        store = TransactionStore([
+            Transaction(1000, "Salary", "Monthly", "2024-07-01", "income"),
+            Transaction(500, "Rent", "Monthly", "2024-07-05", "expense")
+        ])
+        self.assertEqual(store.balance("2024-07-02", "2024-07-31"), -500)
+        store.append(Transaction(50, "Food", "Dinner", "2024-07-20", "expense"))
+        store.append(Transaction(70, "Gift", "Old", "2019-01-01", "income"))
+        store.update(1, amount=450)
+        store.pop(0)
+        self.assertEqual(store.totals(), (70, 500))
+        self.assertEqual(store.balance("2024-07-06"), -50)
+        self.assertEqual(store.balance(end_date="2020-01-01"), 70)
+        self.assertEqual(store.balance("2025-01-01", "2024-01-01"), 0)
+
+if __name__ == '__main__':
+    unittest.main()
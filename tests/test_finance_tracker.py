@@ -87,9 +87,11 @@ class TestFinanceTracker(unittest.TestCase):
         t = Transaction(amount=100, category="Test", description="CSV test")
         self.tracker.transactions = [t]
         
-        with patch('builtins.open', new_callable=mock_open) as mock_file:
+        with patch('builtins.open', new_callable=mock_open) as mock_file, patch('os.replace') as mock_replace:
             self.tracker.export_to_csv('test.csv')
-            mock_file.assert_called_once_with('test.csv', 'w', newline='')
+            # Written beside the target, then moved onto it.
+            mock_file.assert_called_once_with('test.csv.tmp', 'w', newline='')
+            mock_replace.assert_called_once_with('test.csv.tmp', 'test.csv')
             mock_csv_writer.assert_called_once()
 
     def test_get_statistics(self):
@@ -0,0 +1,85 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+from tracker.finance_tracker import FinanceTracker
+from tracker.importer import records_to_columns, validate_columns
+from tracker.transaction import Transaction
+
+class TestImporter(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        with patch('builtins.print'):
+            self.tracker = FinanceTracker(os.path.join(self.directory, 'transactions.json'))
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_validate_columns(self):
+        valid, errors = validate_columns(records_to_columns([
+            {'amount': '12.5', 'category': ' Food ', 'description': 'Lunch', 'date': '2024-07-01',
+             'transaction_type': 'Expense', 'tags': 'a, b,'},
+            {'amount': 'abc', 'category': 'Food', 'description': '', 'date': '2024-07-01',
+             'transaction_type': 'expense'},
+            {'amount': 1, 'category': 'Food', 'date': '2024-13-01', 'transaction_type': 'expense'},
+            {'amount': 1, 'category': 'Food', 'transaction_type': 'transfer'},
+            {'category': 'Food', 'transaction_type': 'income'},
+            Transaction(3, 'Pay', 'Salary', '2024-07-02', 'income'),
+        ]))
+        self.assertEqual({field: values[0] for field, values in valid.items()},
+                         {'amount': 12.5, 'category': 'Food', 'description': 'Lunch', 'date': '2024-07-01',
+                          'transaction_type': 'expense', 'tags': ['a', 'b']})
+        self.assertEqual(valid['description'], ['Lunch', 'Salary'])
+        self.assertEqual([error.row for error in errors], [2, 3, 4, 5])
+        self.assertIn("missing field 'amount'", str(errors[-1]))
+
+    def test_bulk_add_batches(self):
+        records = [{'amount': i, 'category': 'Bulk', 'description': str(i), 'date': '2024-07-01',
+                    'transaction_type': 'expense'} for i in range(2500)]
+        records[1234]['transaction_type'] = 'bogus'
+        added, errors = self.tracker.add_transactions_bulk(records, batch_size=1000)
+        self.assertEqual(added, 2499)
+        self.assertEqual([error.row for error in errors], [1235])
+        self.assertEqual(len(self.tracker.advanced_search(category='Bulk', min_amount=2000)), 500)
+
+    def test_csv_round_trip(self):
+        self.tracker.transactions = [
+            Transaction(100, 'Salary', 'Pay, July', '2024-07-01', 'income', ['work', 'salary']),
+            Transaction(40, 'Food', 'Lunch', '2024-07-02', 'expense'),
+        ]
+        path = os.path.join(self.directory, 'export.csv')
+        with patch('builtins.print'):
+            self.tracker.export_to_csv(path)
+            self.tracker.clear_transactions()
+            added, errors = self.tracker.import_from_csv(path)
+        self.assertEqual((added, errors), (2, []))
+        self.assertEqual(self.tracker.transactions[0].to_dict(),
+                         {'amount': 100, 'category': 'Salary', 'description': 'Pay, July', 'date': '2024-07-01',
+                          'transaction_type': 'income', 'tags': ['work', 'salary']})
+
+    def test_jsonl(self):
+        path = os.path.join(self.directory, 'import.jsonl')
+        with open(path, 'w') as f:
+            f.write('{"amount": 5, "category": "Food", "description": "Tea", "date": "2024-07-01", '
+                    '"transaction_type": "expense"}\n{not json}\n')
+        with patch('builtins.print'):
+            added, errors = self.tracker.import_from_jsonl(path)
+        self.assertEqual(added, 1)
+        self.assertEqual(errors[0].row, 2)
+
+    def test_bulk_import_is_journaled(self):
+        path = os.path.join(self.directory, 'journaled.json')
+        with patch('builtins.print'):
+            tracker = FinanceTracker(path, journal=True)
+            tracker.add_transactions_bulk([{'amount': 7, 'category': 'Food', 'description': 'Soup',
+                                            'date': '2024-07-03', 'transaction_type': 'expense',
+                                            'tags': ['lunch']}])
+            tracker.close()
+            reopened = FinanceTracker(path, journal=True)
+        self.assertEqual(reopened.transactions[0].to_dict()['tags'], ['lunch'])
+        self.assertEqual(reopened.calculate_balance(), -7)
+        reopened.close()
+
+if __name__ == '__main__':
+    unittest.main()
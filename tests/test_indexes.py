@@ -0,0 +1,75 @@
+import unittest
+import numpy as np
+from tracker.indexes import _difference, _intersect, _union
+from tracker.store import TransactionStore
+from tracker.tag_query import parse_tag_query
+from tracker.transaction import Transaction
+
+class TestSearchIndexes(unittest.TestCase):
+    def setUp(self):
+        self.store = TransactionStore([
+            Transaction(1000, "Salary", "Monthly", "2024-07-01", "income", ["work"]),
+            Transaction(500, "Rent", "Monthly", "2024-07-05", "expense", ["home"]),
+            Transaction(200, "Food", "Groceries", "2024-08-10", "expense", ["food"]),
+            Transaction(40, "Food", "Lunch", "2024-08-12", "expense", ["food", "work"])
+        ])
+
+    def descriptions(self, **predicates):
+        return [t.description for t in self.store.search(**predicates)]
+
+    def test_predicates(self):
+        self.assertEqual(self.descriptions(start_date="2024-08-01"), ["Groceries", "Lunch"])
+        self.assertEqual(self.descriptions(end_date="2024-07-05"), ["Monthly", "Monthly"])
+        self.assertEqual(self.descriptions(category="food", max_amount=100), ["Lunch"])
+        self.assertEqual(self.descriptions(min_amount=200, max_amount=500), ["Monthly", "Groceries"])
+        self.assertEqual(self.descriptions(tags=["WORK"]), ["Monthly", "Lunch"])
+        self.assertEqual(self.descriptions(category="Travel"), [])
+
+    def test_maintained_on_writes(self):
+        self.store.append(Transaction(75, "Food", "Dinner", "2024-08-20", "expense"))
+        self.store.update(2, amount=20)
+        self.store.pop(0)
+        self.assertEqual(self.descriptions(category="Food", max_amount=50), ["Lunch", "Groceries"])
+        self.assertEqual(self.descriptions(min_amount=1000), [])
+        self.store.clear()
+        self.assertEqual(self.descriptions(category="Food"), [])
+
+    def test_many_inserts_merge(self):
+        for i in range(3000):
+            self.store.append(Transaction(i, "Bulk", "Row", "2024-09-01", "expense"))
+        self.assertEqual(len(self.store.search(category="Bulk", min_amount=10, max_amount=19)), 10)
+        self.assertEqual(len(self.store.search(start_date="2024-09-01")), 3000)
+
+    def test_tag_expressions(self):
+        self.assertEqual(self.descriptions(tags="food AND work"), ["Lunch"])
+        self.assertEqual(self.descriptions(tags="food OR home"), ["Monthly", "Groceries", "Lunch"])
+        self.assertEqual(self.descriptions(tags="NOT work"), ["Monthly", "Groceries"])
+        self.assertEqual(self.descriptions(tags="work and not food"), ["Monthly"])
+        self.assertEqual(self.descriptions(tags="NOT (work OR food)", category="Rent"), ["Monthly"])
+        self.assertEqual(self.descriptions(tags="(NOT food) OR work", min_amount=600), ["Monthly"])
+        with self.assertRaises(ValueError):
+            parse_tag_query("food AND (work")
+
+    def test_sparse_and_dense_set_operations_agree(self):
+        a = np.array([1, 4, 7, 9], dtype=np.int64)
+        b = np.array([2, 4, 9, 11], dtype=np.int64)
+        for size in (12, 1 << 20):
+            self.assertEqual(_intersect(a, b, size).tolist(), [4, 9])
+            self.assertEqual(_union(a, b, size).tolist(), [1, 2, 4, 7, 9, 11])
+            self.assertEqual(_difference(a, b, size).tolist(), [1, 7])
+
+    def test_tags_are_normalized(self):
+        self.store.append(Transaction(9, "Food", "Snack", "2024-08-13", "expense", [" Food", "Treat ", ""]))
+        self.assertEqual(self.store[-1].tags, ["food", "treat"])
+        self.assertEqual(self.descriptions(tags="FOOD and treat"), ["Snack"])
+
+    def test_tag_index_follows_edits_and_deletes(self):
+        self.store.search(tags=["food"])
+        self.store.update(3, tags=["travel"])
+        self.store.pop(2)
+        self.assertEqual(self.descriptions(tags="food"), [])
+        self.assertEqual(self.descriptions(tags="travel OR home"), ["Monthly", "Lunch"])
+        self.assertEqual(self.descriptions(tags="NOT travel"), ["Monthly", "Monthly"])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,147 @@
+import io
+import json
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from contextlib import redirect_stdout
+from unittest.mock import patch
+from tracker import cli
+from tracker.finance_tracker import FinanceTracker
+from tracker.instrumentation import INSTRUMENTATION, OperationStats, SamplingProfiler
+
+RECORDS = [
+    {"amount": 200, "category": "Food", "description": "Groceries", "date": "2024-08-10",
+     "transaction_type": "expense", "tags": ["food"]},
+    {"amount": 1000, "category": "Salary", "description": "Monthly pay", "date": "2024-07-01",
+     "transaction_type": "income", "tags": ["work"]},
+    {"amount": 40, "category": "Food", "description": "Lunch", "date": "2024-08-12",
+     "transaction_type": "expense", "tags": ["food", "work"]},
+]
+
+
+class TestOperationStats(unittest.TestCase):
+    def test_histogram_percentiles(self):
+        stats = OperationStats()
+        for seconds in [0.001] * 90 + [0.1] * 10:
+            stats.add(seconds, {'rows_scanned': 2})
+        self.assertEqual(stats.calls, 100)
+        self.assertEqual(stats.counters['rows_scanned'], 200)
+        # Buckets are powers of two microseconds: 1ms falls under 1.024ms.
+        self.assertEqual(stats.percentile(0.5), 1024 / 1e6)
+        self.assertEqual(stats.percentile(0.99), 0.1)
+        summary = stats.summary()
+        self.assertEqual((summary['p50_ms'], summary['max_ms']), (1.024, 100.0))
+
+    def test_round_trip_and_merge(self):
+        stats = OperationStats()
+        stats.add(0.002, {'bytes_read': 10})
+        merged = OperationStats.from_dict(json.loads(json.dumps(stats.to_dict())))
+        merged.merge(stats)
+        self.assertEqual((merged.calls, merged.counters['bytes_read']), (2, 20))
+        self.assertEqual(merged.histogram, [2 * count for count in stats.histogram])
+
+
+class TestInstrumentation(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        INSTRUMENTATION.reset()
+
+    def tearDown(self):
+        INSTRUMENTATION.disable()
+        INSTRUMENTATION.reset()
+        shutil.rmtree(self.directory)
+
+    def open(self, **kwargs):
+        with redirect_stdout(io.StringIO()):
+            return FinanceTracker(os.path.join(self.directory, 'ledger.json'), **kwargs)
+
+    def test_disabled_records_nothing(self):
+        tracker = self.open()
+        with redirect_stdout(io.StringIO()):
+            tracker.add_transactions_bulk(RECORDS)
+            tracker.calculate_balance()
+        self.assertEqual(tracker.stats(), {})
+
+    def test_operations_and_counters(self):
+        tracker = self.open(instrument=True)
+        with redirect_stdout(io.StringIO()):
+            tracker.add_transactions_bulk(RECORDS + [{"amount": "x"}])
+            tracker.calculate_balance()
+            page = tracker.advanced_search(category='food').page(1)
+            self.assertEqual(len(list(tracker.advanced_search(start_date='2024-08-01'))), 2)
+            tracker.save_data()
+        stats = tracker.stats()
+        self.assertEqual(stats['add_transactions_bulk']['rows_scanned'], 4)
+        self.assertEqual(stats['add_transactions_bulk']['rows_returned'], 3)
+        self.assertEqual(stats['calculate_balance']['calls'], 1)
+        self.assertEqual(stats['query.page']['rows_returned'], len(page.items))
+        self.assertEqual(stats['query.iterate']['rows_returned'], 2)
+        self.assertGreaterEqual(stats['query.iterate']['rows_scanned'], 2)
+        self.assertEqual(stats['save_data']['bytes_written'],
+                         os.path.getsize(os.path.join(self.directory, 'ledger.json')))
+
+        reopened = self.open(storage='json')
+        self.assertEqual(reopened.stats()['load_data']['bytes_read'], stats['save_data']['bytes_written'])
+
+    def test_failed_calls_are_counted(self):
+        tracker = self.open(instrument=True)
+        with self.assertRaises(ValueError):
+            tracker.advanced_search().page(0)
+        self.assertEqual(tracker.stats()['query.page']['errors'], 1)
+
+    def test_stats_file_aggregates_runs(self):
+        path = os.path.join(self.directory, 'stats.jsonl')
+        INSTRUMENTATION.enable()
+        with INSTRUMENTATION.operation('calculate_balance'):
+            INSTRUMENTATION.count(rows_scanned=5)
+        INSTRUMENTATION.append_to(path)
+        INSTRUMENTATION.append_to(path)
+        merged = INSTRUMENTATION.merge_file(path)
+        self.assertEqual((merged['calculate_balance'].calls, merged['calculate_balance'].counters['rows_scanned']),
+                         (2, 10))
+
+    def test_sampling_profiler(self):
+        INSTRUMENTATION.enable()
+        samples = []
+        with SamplingProfiler(interval=0.001, hook=lambda operation, frame: samples.append(operation)):
+            with INSTRUMENTATION.operation('busy'):
+                deadline = time.perf_counter() + 0.05
+                while time.perf_counter() < deadline:
+                    pass
+        self.assertIn('busy', samples)
+
+        with SamplingProfiler(interval=0.001) as profiler:
+            with INSTRUMENTATION.operation('busy'):
+                deadline = time.perf_counter() + 0.05
+                while time.perf_counter() < deadline:
+                    pass
+        self.assertTrue(any(line.startswith('busy;') for line in profiler.folded()))
+
+    def test_cli_stats(self):
+        data_file = os.path.join(self.directory, 'ledger.json')
+        stats_file = os.path.join(self.directory, 'stats.jsonl')
+
+        def run(*argv, stdin=''):
+            out = io.StringIO()
+            with patch('sys.stderr', new_callable=io.StringIO):
+                self.assertEqual(cli.main(['--data-file', data_file, '--stats-file', stats_file, *argv],
+                                          stdin=io.StringIO(stdin), stdout=out), 0)
+            return json.loads(out.getvalue())['results']
+
+        run('add', stdin=''.join(json.dumps(record) + '\n' for record in RECORDS))
+        run('balance')
+        run('query', '--category', 'food')
+        stats = {record['operation']: record for record in run('stats')}
+        self.assertEqual(stats['load_data']['calls'], 3)
+        self.assertEqual(stats['add_transactions_bulk']['rows_returned'], 3)
+        self.assertEqual(stats['calculate_balance']['calls'], 1)
+        self.assertEqual(stats['query.iterate']['rows_returned'], 2)
+        self.assertFalse(INSTRUMENTATION.enabled)
+        self.assertEqual(run('stats', '--reset'), [])
+        self.assertEqual(run('stats'), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+import os
+import json
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+from tracker.finance_tracker import FinanceTracker
+from tracker.journal import Journal
+
+class TestJournal(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.data_file = os.path.join(self.directory, 'transactions.json')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def open_tracker(self):
+        with patch('builtins.print'):
+            return FinanceTracker(self.data_file, journal=True, compact_every=100)
+
+    def test_replay_after_restart(self):
+        tracker = self.open_tracker()
+        with patch('builtins.print'):
+            tracker.add_transaction(100, 'Salary', 'Pay', 'income', ['work'])
+            tracker.add_transaction(30, 'Food', 'Lunch', 'expense')
+            tracker.add_transaction(20, 'Food', 'Coffee', 'expense')
+            with patch('builtins.input', side_effect=['45', '', '', '', '']):
+                tracker.edit_transaction(1)
+            tracker.delete_transaction(2)
+            tracker.save_data()
+        tracker.close()
+        self.assertFalse(os.path.exists(self.data_file))
+
+        reopened = self.open_tracker()
+        self.assertEqual([t.description for t in reopened.transactions], ['Pay', 'Lunch'])
+        self.assertEqual(reopened.calculate_balance(), 55)
+        reopened.close()
+
+    def test_compaction(self):
+        tracker = self.open_tracker()
+        with patch('builtins.print'):
+            for i in range(100):
+                tracker.add_transaction(1, 'Misc', f'Item {i}', 'expense')
+            tracker.save_data()
+        tracker.close()
+        with open(self.data_file) as f:
+            data = json.load(f)
+        self.assertEqual((len(data['transactions']), data['journal_seq']), (100, 100))
+        self.assertEqual(os.path.getsize(self.data_file + '.journal'), 0)
+        reopened = self.open_tracker()
+        self.assertEqual(len(reopened.transactions), 100)
+        reopened.close()
+
+    def test_crash_before_journal_is_emptied(self):
+        for storage in ('json', 'binary'):
+            with self.subTest(storage=storage):
+                data_file = os.path.join(self.directory, f'crash-{storage}')
+                with patch('builtins.print'):
+                    tracker = FinanceTracker(data_file, journal=True, storage=storage)
+                    tracker.add_transaction(1, 'Misc', 'One', 'expense')
+                    tracker.add_transaction(2, 'Misc', 'Two', 'expense')
+                    tracker.add_transaction(3, 'Misc', 'Three', 'expense')
+                    tracker.delete_transaction(0)
+                    # The process dies after the snapshot is replaced, before the journal is emptied.
+                    with patch.object(Journal, 'truncate', side_effect=OSError("crash")):
+                        with self.assertRaises(OSError):
+                            tracker.compact()
+                    tracker.close()
+                    reopened = FinanceTracker(data_file, journal=True, storage=storage)
+                    self.assertEqual([t.amount for t in reopened.transactions], [2, 3])
+                    reopened.add_transaction(4, 'Misc', 'Four', 'expense')
+                    reopened.close()
+                    again = FinanceTracker(data_file, journal=True, storage=storage)
+                self.assertEqual([t.amount for t in again.transactions], [2, 3, 4])
+                again.close()
+
+    def test_torn_record_is_dropped(self):
+        path = self.data_file + '.journal'
+        with open(path, 'w') as f:
+            f.write('{"op":"clear"}\n{"op":"add","da')
+        self.assertEqual(list(Journal.replay(path)), [{'op': 'clear'}])
+        journal = Journal(path)
+        journal.append({'op': 'clear'})
+        journal.close()
+        self.assertEqual(len(list(Journal.replay(path))), 2)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,118 @@
+import io
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from datetime import date
+from tracker.ledgers import LedgerManager
+from tracker.store import TransactionStore
+
+HOUSEHOLDS = {
+    'smith': [
+        {"amount": 3000, "category": "Salary", "description": "Pay", "date": "2023-12-28",
+         "transaction_type": "income", "tags": ["work"]},
+        {"amount": 120, "category": "Food", "description": "Groceries", "date": "2023-12-30",
+         "transaction_type": "expense", "tags": ["food"]},
+        {"amount": 80, "category": "Food", "description": "Dinner", "date": "2024-01-02",
+         "transaction_type": "expense", "tags": ["food"]},
+        {"amount": 900, "category": "Rent", "description": "January", "date": "2024-01-05",
+         "transaction_type": "expense", "tags": ["home"]},
+    ],
+    'jones': [
+        {"amount": 2500, "category": "Salary", "description": "Pay", "date": "2024-01-28",
+         "transaction_type": "income", "tags": ["work"]},
+        {"amount": 60, "category": "food", "description": "Lunch", "date": "2024-02-03",
+         "transaction_type": "expense", "tags": []},
+    ],
+}
+
+
+def reference(*ledgers):
+    return TransactionStore([record for ledger in ledgers for record in HOUSEHOLDS[ledger]])
+
+
+class TestLedgerManager(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.output = redirect_stdout(io.StringIO())
+        self.output.__enter__()
+
+    def tearDown(self):
+        self.output.__exit__(None, None, None)
+        shutil.rmtree(self.directory)
+
+    def manager(self, **options):
+        manager = LedgerManager(os.path.join(self.directory, 'ledgers'), **options)
+        self.addCleanup(manager.close)
+        return manager
+
+    def fill(self, manager):
+        for ledger, records in HOUSEHOLDS.items():
+            added, errors = manager.add_transactions(ledger, records + [{"amount": "x"}])
+            self.assertEqual((added, len(errors)), (len(records), 1))
+
+    def test_partitions_by_year(self):
+        manager = self.manager()
+        self.fill(manager)
+        self.assertEqual(manager.ledgers(), ['jones', 'smith'])
+        self.assertEqual(manager.years('smith'), [2023, 2024])
+        self.assertEqual(manager.years('jones'), [2024])
+        self.assertEqual(len(manager.open('smith', 2024).transactions), 2)
+        manager.add_transactions('smith', [dict(HOUSEHOLDS['smith'][0], date="2024-06-28")])
+        self.assertEqual(len(manager.open('smith', 2024).transactions), 3)
+
+    def test_aggregates_match_one_store(self):
+        for storage in ('binary', 'json', 'sqlite'):
+            with self.subTest(storage=storage):
+                manager = LedgerManager(os.path.join(self.directory, storage), storage=storage)
+                self.fill(manager)
+                store = reference('smith', 'jones')
+                self.assertEqual(manager.totals(), store.totals())
+                self.assertEqual(manager.balance(start_date="2023-12-29", end_date="2024-01-31"),
+                                 store.balance("2023-12-29", "2024-01-31"))
+                self.assertEqual(manager.monthly_totals(), store.monthly_totals())
+                self.assertEqual(manager.category_totals(ledgers=['smith'], start_date="2024-01-01"),
+                                 reference('smith').category_totals("2024-01-01"))
+                self.assertEqual(manager.balance(by_ledger=True),
+                                 {'smith': reference('smith').balance(), 'jones': reference('jones').balance()})
+
+    def test_process_pool_gives_same_results(self):
+        serial = self.manager()
+        self.fill(serial)
+        parallel = self.manager(workers=2)
+        self.assertEqual(parallel.category_totals(by_ledger=True), serial.category_totals(by_ledger=True))
+        self.assertEqual(parallel.monthly_totals(), serial.monthly_totals())
+
+    def test_budget_status_spans_partitions(self):
+        manager = self.manager()
+        self.fill(manager)
+        manager.set_budget('smith', 'Food', 150, 'weekly')
+        manager.set_budget('jones', 'Food', 100)
+        budgets = manager.budgets('smith')
+        budgets['Food'].start_date = date(2023, 12, 28)
+        with open(manager.budgets_file('smith'), 'w') as f:
+            json.dump([budget.to_dict() for budget in budgets.values()], f)
+
+        status = manager.budget_status(today=date(2024, 1, 2))
+        # The week of 2023-12-28 to 2024-01-03 falls in two partitions.
+        self.assertEqual(status['smith']['Food']['spent'], 200)
+        self.assertTrue(status['smith']['Food']['exceeded'])
+        self.assertEqual(status['jones']['Food']['spent'], 0)
+
+    def test_paths_and_import(self):
+        source = os.path.join(self.directory, 'transactions.json')
+        with open(source, 'w') as f:
+            json.dump(HOUSEHOLDS['smith'], f)
+        elsewhere = os.path.join(self.directory, 'elsewhere')
+        manager = self.manager(paths={'smith': elsewhere})
+        self.assertEqual(manager.import_ledger('smith', source), (4, []))
+        self.assertEqual(sorted(os.listdir(elsewhere))[:2], ['2023.bin', '2023.bin.cube.json'])
+        self.assertEqual(manager.totals(), reference('smith').totals())
+        with self.assertRaises(ValueError):
+            manager.ledger_dir('../escape')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,148 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+from tracker.finance_tracker import FinanceTracker
+from tracker.partitioned_store import PartitionedStore
+from tracker.partitions import period_bounds
+from tracker.store import TransactionStore
+from tracker.transaction import Transaction
+
+TRANSACTIONS = [
+    Transaction(1000, "Salary", "Monthly", "2024-07-01", "income", ["work"]),
+    Transaction(500, "Rent", "Monthly", "2024-07-05", "expense", ["home"]),
+    Transaction(200, "Food", "Groceries", "2024-08-10", "expense", ["food"]),
+    Transaction(40, "Food", "Lunch", "2024-08-12", "expense", ["food", "work"]),
+    Transaction(75, "Fun", "Concert", "2023-12-31", "expense", ["fun"]),
+]
+
+
+class TestPartitionedStore(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'ledger')
+        self.store = PartitionedStore(self.path)
+        self.store.extend(TRANSACTIONS)
+        self.store.save()
+        self.reference = TransactionStore(TRANSACTIONS)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def reopen(self, **options):
+        return PartitionedStore(self.path, **options)
+
+    def test_period_bounds(self):
+        self.assertEqual(period_bounds('2024-02'), (period_bounds('2024')[0] + 31, period_bounds('2024')[0] + 59))
+        self.assertEqual(period_bounds('2024-12')[1], period_bounds('2024')[1])
+
+    def test_partitions_and_manifest(self):
+        partitions = self.store.partitions()
+        self.assertEqual(list(partitions), ['2023-12', '2024-07', '2024-08'])
+        self.assertEqual((partitions['2024-08']['rows'], partitions['2024-08']['min_date'],
+                          partitions['2024-08']['max_date']), (2, '2024-08-10', '2024-08-12'))
+        self.assertEqual(partitions['2024-08']['categories'], {'Food': {'income': 0.0, 'expense': 240.0}})
+        self.assertEqual(self.reopen(granularity='year').granularity, 'month')
+
+    def test_queries_match_one_store(self):
+        store = self.reopen()
+        for start, end in ((None, None), ("2024-07-03", None), ("2024-01-01", "2024-08-10"), ("2025-01-01", None)):
+            with self.subTest(start=start, end=end):
+                self.assertEqual(store.totals(start, end), self.reference.totals(start, end))
+                self.assertEqual(store.category_totals(start, end), self.reference.category_totals(start, end))
+                self.assertEqual(store.monthly_totals(start, end), self.reference.monthly_totals(start, end))
+                self.assertEqual([t.to_dict() for t in store.query(start, end)],
+                                 [t.to_dict() for t in self.reference.query(start, end)])
+                self.assertEqual(len(store.query(start, end)), len(self.reference.query(start, end)))
+                days, net = store.daily_net(start, end)
+                expected_days, expected_net = self.reference.daily_net(start, end)
+                self.assertEqual((days.tolist(), net.tolist()), (expected_days.tolist(), expected_net.tolist()))
+        self.assertEqual([t.description for t in store.search(tags="food AND work")], ["Lunch"])
+        self.assertEqual([t.description for t in store.query(category="food", text="lunch")], ["Lunch"])
+
+    def test_pruning_opens_only_overlapping_partitions(self):
+        store = self.reopen()
+        self.assertEqual(store.balance("2024-07-01", "2024-07-31"), 500)
+        # Every partition was covered entirely: answered from the manifest.
+        self.assertEqual(list(store._open), [])
+        self.assertEqual([t.description for t in store.query("2024-08-11")], ["Lunch"])
+        self.assertEqual(list(store._open), ['2024-08'])
+
+    def test_pages_resume_across_partitions(self):
+        store = self.reopen()
+        first = store.query().page(2)
+        second = store.query().page(2, cursor=first.next_cursor)
+        self.assertEqual([t.description for t in first.items + second.items],
+                         ["Concert", "Monthly", "Monthly", "Groceries"])
+
+    def test_writes_are_saved_to_new_files(self):
+        store = self.reopen(cache_size=1)
+        old_file = store.partitions()['2024-08']['file']
+        store.append(Transaction(10, "Food", "Snack", "2024-08-20", "expense"))
+        store.update(0, date="2024-08-01")
+        # The moved row now ends the August partition.
+        self.assertEqual(store.pop(-1).description, "Concert")
+        self.assertEqual([t.description for t in store], ["Monthly", "Monthly", "Groceries", "Lunch", "Snack"])
+        store.save()
+        reopened = self.reopen()
+        self.assertEqual(reopened.partitions()['2024-08']['rows'], 3)
+        self.assertNotIn('2023-12', reopened.partitions())
+        self.assertFalse(os.path.exists(os.path.join(self.path, old_file)))
+        self.assertEqual(sorted(name for name in os.listdir(self.path) if name.endswith('.bin')),
+                         sorted(meta['file'] for meta in reopened.partitions().values()))
+
+    def test_edits_through_views_are_saved(self):
+        store = self.reopen(cache_size=1)
+        lunch = store[-1]
+        self.assertEqual(store[0].description, "Concert")
+        # Lunch's partition has been evicted in the meantime.
+        lunch.amount = 99
+        store[0].date = "2024-07-10"
+        self.assertEqual(lunch.amount, 99)
+        store.save()
+        reopened = self.reopen()
+        self.assertEqual([(t.description, t.amount) for t in reopened.query("2024-08-12")], [("Lunch", 99)])
+        self.assertEqual(reopened[2].description, "Concert")
+        reopened.seal("2024-08-01")
+        with self.assertRaises(ValueError):
+            reopened[0].amount = 1
+        with patch('builtins.print'):
+            tracker = FinanceTracker(self.path, storage='partitioned')
+        tracker.transactions[-1].amount = 10
+        tracker.save_data()
+        self.assertEqual(self.reopen()[-1].amount, 10)
+
+    def test_sealed_partitions_are_read_only(self):
+        store = self.reopen()
+        self.assertEqual(store.seal("2024-08-01"), ['2023-12', '2024-07'])
+        with self.assertRaises(ValueError):
+            store.extend([Transaction(1, "Food", "Late", "2024-08-15", "expense"),
+                          Transaction(1, "Food", "Late", "2024-07-15", "expense")])
+        self.assertEqual(len(store), 5)
+        with self.assertRaises(ValueError):
+            store.update(4, date="2024-07-30")
+        store.update(4, amount=50)
+        self.assertEqual(self.reopen().sealed(), ['2023-12', '2024-07'])
+        store.unseal('2024-07')
+        store.append(Transaction(1, "Food", "Late", "2024-07-15", "expense"))
+        self.assertEqual(len(store), 6)
+
+    def test_tracker_partitioned_storage(self):
+        with patch('builtins.print'):
+            tracker = FinanceTracker(self.path, storage='partitioned')
+            tracker.add_transactions_bulk([{"amount": 60, "category": "Food", "description": "Dinner",
+                                            "date": "2024-09-02", "transaction_type": "expense"}])
+            tracker.set_budget("Food", 100)
+            tracker.save_data()
+            tracker.compact()
+            reopened = FinanceTracker(self.path, storage='partitioned')
+            reopened.view_transactions("2024-08-11")
+        self.assertEqual(len(reopened.transactions), 6)
+        self.assertEqual(reopened.calculate_balance("2024-08-01"), -300)
+        self.assertEqual(reopened._store.sealed(), ['2023-12', '2024-07', '2024-08', '2024-09'])
+        self.assertIn("Food", reopened.budget_status())
+
+
+if __name__ == '__main__':
+    unittest.main()
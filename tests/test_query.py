@@ -0,0 +1,123 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+from tracker.finance_tracker import FinanceTracker
+from tracker.indexes import SearchPlan
+from tracker.sqlite_store import SQLiteStore
+from tracker.store import TransactionStore
+from tracker.transaction import Transaction
+
+TRANSACTIONS = [
+    Transaction(200, "Food", "Groceries", "2024-08-10", "expense", ["food"]),
+    Transaction(1000, "Salary", "Monthly pay", "2024-07-01", "income", ["work"]),
+    Transaction(40, "Food", "Lunch", "2024-08-12", "expense", ["food", "work"]),
+    Transaction(500, "Rent", "Monthly rent", "2024-07-05", "expense", ["home"]),
+    Transaction(15, "Food", "Coffee", "2024-07-05", "expense", ["food"]),
+]
+
+
+class QueryTests:
+    """Behaviour shared by the in-memory and SQLite query results."""
+
+    def descriptions(self, result):
+        return [t.description for t in result]
+
+    def test_date_order(self):
+        self.assertEqual(self.descriptions(self.store.query()),
+                         ["Monthly pay", "Monthly rent", "Coffee", "Groceries", "Lunch"])
+        self.assertEqual(self.descriptions(self.store.query(category="food", min_amount=20)),
+                         ["Groceries", "Lunch"])
+
+    def test_pages_follow_cursor(self):
+        result = self.store.query(tags="food OR home")
+        first = result.page(2)
+        self.assertEqual(self.descriptions(first.items), ["Monthly rent", "Coffee"])
+        second = result.page(2, cursor=first.next_cursor)
+        self.assertEqual(self.descriptions(second.items), ["Groceries", "Lunch"])
+        self.assertIsNone(second.next_cursor)
+        self.assertEqual(self.descriptions(result.page(3, offset=1).items), ["Coffee", "Groceries", "Lunch"])
+        self.assertEqual([len(page.items) for page in result.pages(3)], [3, 1])
+
+    def test_where_composes_lazily(self):
+        result = self.store.query(start_date="2024-07-02").where(tags="food", end_date="2024-08-10")
+        self.assertEqual(self.descriptions(result), ["Coffee", "Groceries"])
+        self.assertEqual(len(result), 2)
+        self.assertEqual(self.descriptions(result.where(tags="NOT work", max_amount=100)), ["Coffee"])
+        self.assertFalse(result.where(category="Food").where(category="Rent"))
+
+    def test_text_results_are_ranked_and_paged(self):
+        result = self.store.query(text="monthly")
+        self.assertEqual(len(result), 2)
+        first = result.page(1)
+        self.assertEqual(len(first.items), 1)
+        rest = result.page(5, cursor=first.next_cursor)
+        self.assertEqual(len(rest.items), 1)
+        self.assertNotEqual(first.items[0].description, rest.items[0].description)
+        self.assertEqual(self.descriptions(result.where(text="rent")), ["Monthly rent"])
+
+    def test_sequence_access(self):
+        result = self.store.query(category="Food")
+        self.assertEqual(result[1].description, "Groceries")
+        self.assertEqual(self.descriptions(result[1:3]), ["Groceries", "Lunch"])
+        self.assertEqual(result[-1].description, "Lunch")
+        with self.assertRaises(IndexError):
+            result[3]
+
+
+class TestStoreQuery(QueryTests, unittest.TestCase):
+    def setUp(self):
+        self.store = TransactionStore(TRANSACTIONS)
+
+    def test_reflects_later_writes(self):
+        result = self.store.query(category="Food")
+        self.store.append(Transaction(5, "Food", "Snack", "2024-07-01", "expense"))
+        self.store.pop(0)
+        self.assertEqual(self.descriptions(result), ["Snack", "Coffee", "Lunch"])
+
+    def test_streams_large_results(self):
+        with patch.object(SearchPlan, 'SORT_LIMIT', 2):
+            self.test_date_order()
+            self.test_pages_follow_cursor()
+            self.test_where_composes_lazily()
+        store = TransactionStore(Transaction(i, "Bulk", f"Row {i}", f"2024-{1 + i % 12:02d}-01", "expense")
+                                 for i in range(100000))
+        page = store.query(min_amount=99990).page(3)
+        self.assertEqual([t.amount for t in page.items], [99996, 99997, 99998])
+        self.assertEqual(len(store.query(start_date="2024-12-01").page(1000).items), 1000)
+
+
+class TestSQLiteQuery(QueryTests, unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.store = SQLiteStore(os.path.join(self.directory.name, "ledger.db"))
+        self.store.extend(TRANSACTIONS)
+
+    def tearDown(self):
+        self.store.close()
+        self.directory.cleanup()
+
+
+class TestTrackerPaging(unittest.TestCase):
+    def setUp(self):
+        with patch.object(FinanceTracker, 'load_data'):
+            self.tracker = FinanceTracker()
+        self.tracker.transactions = TRANSACTIONS
+
+    @patch('builtins.print')
+    def test_view_transactions_pages(self, mock_print):
+        cursor = self.tracker.view_transactions(category="Food", limit=2)
+        self.assertEqual([call.args[0].description for call in mock_print.call_args_list], ["Coffee", "Groceries"])
+        mock_print.reset_mock()
+        self.assertIsNone(self.tracker.view_transactions(category="Food", limit=2, cursor=cursor))
+        self.assertEqual([call.args[0].description for call in mock_print.call_args_list], ["Lunch"])
+
+    def test_advanced_search_is_lazy(self):
+        result = self.tracker.advanced_search(category="Food")
+        self.tracker.add_transaction(3, "Food", "Gum", "expense", [])
+        self.assertEqual(len(result), 4)
+        self.assertEqual(result[-1].description, "Gum")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+import os
+import shutil
+import tempfile
+import unittest
+from datetime import date
+from unittest.mock import patch
+from tracker.finance_tracker import FinanceTracker
+from tracker.recurring import RecurringScheduler
+from tracker.transaction import Transaction
+
+class TestRecurringScheduler(unittest.TestCase):
+    def test_catch_up_exactly_once(self):
+        scheduler = RecurringScheduler()
+        scheduler.add(Transaction(10, 'Gym', 'Weekly', transaction_type='expense'), 'weekly', date(2024, 1, 1))
+        scheduler.add(Transaction(5, 'Coffee', 'Daily', transaction_type='expense'), 'daily', date(2024, 1, 13))
+        occurrences = scheduler.due(date(2024, 1, 15))
+        self.assertEqual([(t.category, t.date) for t in occurrences],
+                         [('Gym', '2024-01-01'), ('Gym', '2024-01-08'), ('Coffee', '2024-01-13'),
+                          ('Coffee', '2024-01-14'), ('Gym', '2024-01-15'), ('Coffee', '2024-01-15')])
+        self.assertIsNot(occurrences[0], occurrences[1])
+        self.assertEqual(scheduler.due(date(2024, 1, 15)), [])
+
+    def test_monthly_keeps_day_of_month(self):
+        scheduler = RecurringScheduler()
+        scheduler.add(Transaction(900, 'Rent', 'Rent'), 'monthly', date(2024, 1, 31))
+        self.assertEqual([t.date for t in scheduler.due(date(2024, 4, 30))],
+                         ['2024-01-31', '2024-02-29', '2024-03-31', '2024-04-30'])
+
+    def test_upcoming_reads_heap(self):
+        scheduler = RecurringScheduler()
+        for day in (20, 3, 9, 15, 1):
+            scheduler.add(Transaction(day, 'Bill', str(day)), 'monthly', date(2024, 5, day))
+        upcoming = scheduler.upcoming(date(2024, 5, 10))
+        self.assertEqual([due.day for due, _ in upcoming], [1, 3, 9])
+        self.assertEqual(upcoming[0][1].date, '2024-05-01')
+        self.assertEqual(len(scheduler.due(date(2024, 4, 30))), 0)
+
+class TestRecurringTracker(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'transactions.json')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_next_due_dates_survive_restart(self):
+        with patch('builtins.print'):
+            tracker = FinanceTracker(self.path, journal=True)
+            tracker.add_transaction(50, 'Savings', 'Transfer', 'expense', recurring=True, frequency='daily')
+            today = date.today()
+            self.assertEqual(tracker.process_recurring_transactions(today), 1)
+            tracker.close()
+
+            reopened = FinanceTracker(self.path, journal=True)
+            self.assertEqual(reopened.process_recurring_transactions(today), 0)
+            self.assertEqual(len(reopened.transactions), 1)
+            self.assertEqual(reopened.transactions[0].date, today.isoformat())
+            reopened.compact()
+            reopened.close()
+
+            compacted = FinanceTracker(self.path)
+        self.assertEqual([frequency for _, frequency in compacted.recurring_transactions], ['daily'])
+        self.assertEqual(compacted.process_recurring_transactions(today), 0)
+
+if __name__ == '__main__':
+    unittest.main()
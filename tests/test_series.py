@@ -0,0 +1,35 @@
+import unittest
+import numpy as np
+from tracker.series import downsample, running_balance
+from tracker.store import TransactionStore
+from tracker.transaction import Transaction
+
+class TestRunningBalance(unittest.TestCase):
+    def setUp(self):
+        # Deliberately out of date order.
+        self.transactions = [
+            Transaction(200, "Food", "Groceries", "2024-07-10", "expense"),
+            Transaction(1000, "Salary", "Monthly", "2024-07-01", "income"),
+            Transaction(500, "Rent", "Monthly", "2024-07-05", "expense"),
+            Transaction(50, "Food", "Lunch", "2024-07-10", "expense")
+        ]
+
+    def test_list_and_store_agree(self):
+        for source in (self.transactions, TransactionStore(self.transactions)):
+            dates, balances = running_balance(source)
+            self.assertEqual([str(d) for d in dates], ["2024-07-01", "2024-07-05", "2024-07-10"])
+            self.assertEqual(balances.tolist(), [1000, 500, 250])
+
+    def test_date_range(self):
+        dates, balances = running_balance(TransactionStore(self.transactions), start_date="2024-07-05")
+        self.assertEqual(balances.tolist(), [-500, -750])
+
+    def test_downsample(self):
+        x = np.arange(10000)
+        xs, ys = downsample(x, x * 2, 100)
+        self.assertLessEqual(len(xs), 100)
+        self.assertEqual((xs[0], xs[-1]), (0, 9999))
+        self.assertEqual(len(downsample(x[:5], x[:5], 100)[0]), 5)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+from tracker.finance_tracker import FinanceTracker
+from tracker.snapshot import COLUMNS, is_snapshot, load_snapshot, write_snapshot
+from tracker.store import TransactionStore
+from tracker.transaction import Transaction
+
+class TestSnapshot(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'ledger.ftsnap')
+        self.store = TransactionStore([
+            Transaction(1000, "Salary", "Monthly", "2024-07-01", "income", ["work"]),
+            Transaction(500, "Rent", "Monthly", "2024-07-05", "expense"),
+            Transaction(12.5, "Food", "Café crème", "2024-08-10", "expense", ["food", "coffee"])
+        ])
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_round_trip(self):
+        self.store.pop(1)
+        write_snapshot(self.store, self.path)
+        self.assertTrue(is_snapshot(self.path))
+        loaded = TransactionStore()
+        load_snapshot(loaded, self.path)
+        self.assertEqual(list(loaded.to_dicts()), list(self.store.to_dicts()))
+        self.assertEqual(loaded.balance(), 987.5)
+        self.assertEqual(len(loaded.search(category="food")), 1)
+
+    def test_writes_after_mapping(self):
+        write_snapshot(self.store, self.path)
+        loaded = TransactionStore()
+        load_snapshot(loaded, self.path)
+        loaded.append(Transaction(3, "Food", "Tea", "2024-08-11", "expense", ["coffee"]))
+        loaded.update(0, description="Pay")
+        loaded.pop(1)
+        self.assertEqual([t.description for t in loaded], ["Pay", "Café crème", "Tea"])
+        self.assertEqual(loaded[2].tags, ["coffee"])
+
+    def test_reads_float_amount_snapshots(self):
+        # Snapshots used to hold amounts as float64 rather than cents.
+        legacy = {('_amount' if name == '_cents' else name): ('<f8' if name == '_cents' else dtype)
+                  for name, dtype in COLUMNS.items()}
+        self.store._amount = self.store._cents / 100
+        with patch('tracker.snapshot.COLUMNS', legacy):
+            write_snapshot(self.store, self.path)
+        loaded = TransactionStore()
+        load_snapshot(loaded, self.path)
+        self.assertEqual(list(loaded.to_dicts()), list(self.store.to_dicts()))
+        self.assertEqual(loaded._cents.tolist(), [100000, 50000, 1250])
+
+    def test_tracker_binary_storage(self):
+        with patch('builtins.print'):
+            tracker = FinanceTracker(self.path, storage='binary')
+            tracker.transactions = list(self.store)
+            tracker.save_data()
+            reopened = FinanceTracker(self.path, storage='binary')
+        self.assertEqual(len(reopened.transactions), 3)
+        self.assertEqual(reopened.calculate_balance(), 487.5)
+
+    def test_tracker_reads_either_format(self):
+        with patch('builtins.print'):
+            tracker = FinanceTracker(self.path, storage='json')
+            tracker.transactions = list(self.store)
+            tracker.save_data()
+            self.assertFalse(is_snapshot(self.path))
+            # Switching to binary storage reads the JSON file and saves a snapshot.
+            binary = FinanceTracker(self.path, storage='binary')
+            self.assertEqual(binary.calculate_balance(), 487.5)
+            binary.save_data()
+            self.assertTrue(is_snapshot(self.path))
+            reopened = FinanceTracker(self.path, storage='json')
+        self.assertEqual(len(reopened.transactions), 3)
+
+if __name__ == '__main__':
+    unittest.main()
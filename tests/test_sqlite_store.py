@@ -0,0 +1,90 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+from unittest.mock import patch
+from tracker.finance_tracker import FinanceTracker
+from tracker.sqlite_store import SQLiteStore
+from tracker.store import TransactionStore
+from tracker.transaction import Transaction
+
+class TestSQLiteStore(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'ledger.db')
+        self.store = SQLiteStore(self.path)
+        self.store.extend([
+            Transaction(1000, "Salary", "Monthly", "2024-07-01", "income", ["work"]),
+            Transaction(500, "Rent", "Monthly", "2024-07-05", "expense", ["home"]),
+            Transaction(200, "Food", "Groceries", "2024-08-10", "expense", ["food"]),
+            Transaction(40, "Food", "Lunch", "2024-08-12", "expense", ["food", "work"])
+        ])
+
+    def tearDown(self):
+        self.store.close()
+        shutil.rmtree(self.directory)
+
+    def test_sequence(self):
+        self.assertEqual(len(self.store), 4)
+        self.assertEqual(self.store[-1].tags, ["food", "work"])
+        self.store.update(0, amount=1200, tags=["bonus"])
+        self.assertEqual(self.store[0].amount, 1200)
+        self.assertEqual(self.store[0].tags, ["bonus"])
+        self.assertEqual(self.store.pop(1).category, "Rent")
+        self.assertEqual([t.description for t in self.store], ["Monthly", "Groceries", "Lunch"])
+
+    def test_pushed_down_queries(self):
+        self.assertEqual(self.store.balance(), 260)
+        self.assertEqual(self.store.balance("2024-08-01", "2024-08-31"), -240)
+        self.assertEqual(self.store.totals(), (1000, 740))
+        self.assertEqual(self.store.category_totals(start_date="2024-08-01"),
+                         {"Food": {"income": 0, "expense": 240}})
+        self.assertEqual(list(self.store.monthly_totals()), ["2024-07", "2024-08"])
+        self.assertEqual([t.description for t in self.store.select(category="food")], ["Groceries", "Lunch"])
+        self.assertEqual([t.description for t in self.store.search(tags=["work"], max_amount=100)], ["Lunch"])
+        self.assertEqual([t.description for t in self.store.search(tags="work AND NOT food")], ["Monthly"])
+        self.assertEqual([t.description for t in self.store.search(tags="home OR (food AND work)")],
+                         ["Monthly", "Lunch"])
+
+    def test_sums_match_transaction_store(self):
+        transactions = [Transaction(0.1, "Food", "Tea", "2024-09-01", "expense"),
+                        Transaction(0.2, "Food", "Tea", "2024-09-01", "expense")]
+        self.store.extend(transactions)
+        reference = TransactionStore(self.store)
+        self.assertEqual(self.store.totals("2024-09-01"), (0, 0.3))
+        self.assertEqual(self.store.balance(), reference.balance())
+        self.assertEqual(self.store.category_totals(), reference.category_totals())
+        self.assertEqual(self.store.monthly_totals(), reference.monthly_totals())
+        self.assertEqual(self.store.daily_net()[1].tolist(), reference.daily_net()[1].tolist())
+        self.assertEqual([t.description for t in self.store.search(min_amount=0.2, max_amount=0.2)], ["Tea"])
+
+    def test_real_amounts_are_migrated(self):
+        self.store.close()
+        path = os.path.join(self.directory, 'old.db')
+        conn = sqlite3.connect(path)
+        conn.execute("CREATE TABLE transactions (id INTEGER PRIMARY KEY, date TEXT NOT NULL, "
+                     "transaction_type TEXT NOT NULL, amount REAL NOT NULL, category TEXT NOT NULL, "
+                     "description TEXT NOT NULL)")
+        conn.execute("CREATE INDEX idx_transactions_amount ON transactions(amount)")
+        conn.executemany("INSERT INTO transactions (date, transaction_type, amount, category, description) "
+                         "VALUES (?, ?, ?, ?, ?)", [("2024-09-01", "expense", 0.1, "Food", "Tea"),
+                                                    ("2024-09-02", "expense", 0.2, "Food", "Coffee")])
+        conn.commit()
+        conn.close()
+        self.store = SQLiteStore(path)
+        self.assertEqual([t.amount for t in self.store], [0.1, 0.2])
+        self.assertEqual(self.store.totals(), (0, 0.3))
+        self.assertEqual([t.description for t in self.store.search(text="coffee")], ["Coffee"])
+
+    def test_tracker_sqlite_storage(self):
+        with patch('builtins.print'):
+            tracker = FinanceTracker(self.path, storage='sqlite')
+            tracker.add_transaction(60, 'Food', 'Dinner', 'expense')
+            tracker.save_data()
+        self.assertEqual(len(tracker.transactions), 5)
+        self.assertEqual(tracker.calculate_balance(), 200)
+        tracker.close()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,40 @@
+import os
+import subprocess
+import sys
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PLOTTING_MODULES = ('matplotlib', 'plotly', 'seaborn', 'pandas')
+
+
+def modules_loaded_by(statement):
+    """Top-level packages in sys.modules after running `statement` in a fresh interpreter."""
+    script = f"import sys\n{statement}\nprint(' '.join(sorted({{m.split('.')[0] for m in sys.modules}})))"
+    result = subprocess.run([sys.executable, "-c", script], cwd=ROOT, capture_output=True, text=True, check=True)
+    return set(result.stdout.split())
+
+
+class TestStartup(unittest.TestCase):
+    def test_import_does_not_load_plotting(self):
+        loaded = modules_loaded_by("from tracker.finance_tracker import FinanceTracker")
+        self.assertFalse(loaded & set(PLOTTING_MODULES), loaded & set(PLOTTING_MODULES))
+        self.assertNotIn('multiprocessing', loaded)
+
+    def test_balance_does_not_load_plotting(self):
+        loaded = modules_loaded_by(
+            "import tempfile, os\n"
+            "from tracker.finance_tracker import FinanceTracker\n"
+            "tracker = FinanceTracker(os.path.join(tempfile.mkdtemp(), 'ledger.json'))\n"
+            "tracker.calculate_balance()")
+        self.assertFalse(loaded & set(PLOTTING_MODULES), loaded & set(PLOTTING_MODULES))
+
+    def test_report_loads_plotting_on_demand(self):
+        loaded = modules_loaded_by(
+            "from reports.bundle import render_chart, summary_chart\n"
+            "import tempfile, os\n"
+            "render_chart(summary_chart(1, 2), os.path.join(tempfile.mkdtemp(), 'chart.png'))")
+        self.assertIn('matplotlib', loaded)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+import unittest
+from tracker.store import TransactionStore, TransactionView
+from tracker.transaction import Transaction
+
+class TestTransactionStore(unittest.TestCase):
+    def setUp(self):
+        self.store = TransactionStore([
+            Transaction(1000, "Salary", "Monthly", "2024-07-01", "income", ["work"]),
+            Transaction(500, "Rent", "Monthly", "2024-07-05", "expense", ["home"]),
+            Transaction(200, "Food", "Groceries", "2024-08-10", "expense", ["food", "weekly"])
+        ])
+
+    def test_views(self):
+        self.assertEqual(len(self.store), 3)
+        t = self.store[2]
+        self.assertIsInstance(t, TransactionView)
+        self.assertEqual(t.to_dict(), {"amount": 200, "category": "Food", "description": "Groceries",
+                                       "date": "2024-08-10", "transaction_type": "expense",
+                                       "tags": ["food", "weekly"]})
+        self.assertEqual([t.category for t in self.store], ["Salary", "Rent", "Food"])
+
+    def test_update_and_pop(self):
+        self.store.update(0, amount=1200, tags=["bonus"])
+        self.assertEqual(self.store[0].amount, 1200)
+        self.assertEqual(self.store[0].tags, ["bonus"])
+        self.store[1].category = "Housing"
+        self.assertEqual(self.store[1].category, "Housing")
+        removed = self.store.pop(1)
+        self.assertEqual(removed.category, "Housing")
+        self.assertEqual([t.category for t in self.store], ["Salary", "Food"])
+
+    def test_amounts_sum_exactly(self):
+        store = TransactionStore([Transaction(0.1, "Food", "Snack", f"2024-08-{day:02d}", "expense")
+                                  for day in range(1, 11)])
+        store.extend_columns({'amount': [0.2], 'category': ["Food"], 'description': ["Tea"],
+                              'date': ["2024-08-12"], 'transaction_type': ["expense"], 'tags': [[]]})
+        self.assertEqual(store.totals(), (0, 1.2))
+        self.assertEqual(store.category_totals(), {"Food": {"income": 0, "expense": 1.2}})
+        self.assertEqual(store.monthly_totals("2024-08-01"), {"2024-08": {"income": 0, "expense": 1.2}})
+        self.assertEqual(store.balance(), -1.2)
+        self.assertEqual(len(store.search(min_amount=0.2, max_amount=0.2)), 1)
+
+    def test_aggregates(self):
+        self.assertEqual(self.store.balance(), 300)
+        self.assertEqual(self.store.balance("2024-07-01", "2024-07-31"), 500)
+        self.assertEqual(self.store.totals(), (1000, 700))
+        self.assertEqual(self.store.category_totals(start_date="2024-08-01"),
+                         {"Food": {"income": 0, "expense": 200}})
+        self.assertEqual(list(self.store.monthly_totals()), ["2024-07", "2024-08"])
+        self.assertEqual(len(self.store.select(category="food")), 1)
+
+    def test_invalid_type(self):
+        with self.assertRaises(ValueError):
+            self.store.append(Transaction(1, "X", "Y", "2024-07-01", "transfer"))
+
+if __name__ == '__main__':
+    unittest.main()
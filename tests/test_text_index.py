@@ -0,0 +1,84 @@
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+from unittest.mock import patch
+from tracker.finance_tracker import FinanceTracker
+from tracker.sqlite_store import SQLiteStore
+from tracker.store import TransactionStore
+from tracker.transaction import Transaction
+
+TRANSACTIONS = [
+    Transaction(30, "Shopping", "Amazon order: headphones", "2024-07-01"),
+    Transaction(30, "Shopping", "Amazon refund", "2024-07-09", "income"),
+    Transaction(12, "Food", "Lunch near the amazonite store", "2024-07-10"),
+    Transaction(900, "Rent", "July rent", "2024-07-01"),
+]
+
+class TestTextIndex(unittest.TestCase):
+    def setUp(self):
+        self.store = TransactionStore(TRANSACTIONS)
+
+    def descriptions(self, **predicates):
+        return [t.description for t in self.store.search(**predicates)]
+
+    def test_prefix_matching_and_ranking(self):
+        self.assertEqual(self.descriptions(text="amazon refund"), ["Amazon refund"])
+        self.assertEqual(self.descriptions(text="AMAZ REF"), ["Amazon refund"])
+        # Exact word matches outrank prefix matches.
+        self.assertEqual(self.descriptions(text="amazon"),
+                         ["Amazon refund", "Amazon order: headphones", "Lunch near the amazonite store"])
+        self.assertEqual(self.descriptions(text="amazon", category="food"), ["Lunch near the amazonite store"])
+        self.assertEqual(self.descriptions(text="paypal"), [])
+
+    def test_maintained_on_writes(self):
+        self.store.search(text="rent")
+        self.store.append(Transaction(5, "Fees", "Rental car deposit", "2024-07-12"))
+        self.store.update(3, description="August housing")
+        self.assertEqual(self.descriptions(text="rent"), ["Rental car deposit"])
+        self.assertEqual(self.descriptions(text="housing"), ["August housing"])
+
+    def test_persisted_with_binary_snapshot(self):
+        directory = tempfile.mkdtemp()
+        try:
+            path = os.path.join(directory, 'ledger.bin')
+            with patch('builtins.print'):
+                tracker = FinanceTracker(path, storage='binary')
+                tracker.transactions = TRANSACTIONS
+                tracker.delete_transaction(0)
+                tracker.save_data()
+                with patch('tracker.text_index.TextIndex.build', side_effect=AssertionError("rebuilt")):
+                    reopened = FinanceTracker(path, storage='binary')
+                    self.assertEqual([t.description for t in reopened.advanced_search(text="amaz")],
+                                     ["Amazon refund", "Lunch near the amazonite store"])
+                    reopened.add_transaction(3, "Shopping", "Amazon Prime", "expense")
+                    self.assertEqual([t.description for t in reopened.advanced_search(text="prime")],
+                                     ["Amazon Prime"])
+                with patch('tracker.text_index.TextIndex.build', side_effect=AssertionError("rebuilt")), \
+                        patch('tracker.text_index.np.load', wraps=np.load) as load:
+                    # Read only on first use, picking up rows added before then.
+                    reopened = FinanceTracker(path, storage='binary')
+                    reopened.add_transaction(3, "Shopping", "Amazon Prime", "expense")
+                    load.assert_not_called()
+                    self.assertEqual([t.description for t in reopened.advanced_search(text="prime")],
+                                     ["Amazon Prime"])
+                    load.assert_called_once()
+        finally:
+            shutil.rmtree(directory)
+
+    def test_sqlite_full_text(self):
+        directory = tempfile.mkdtemp()
+        store = SQLiteStore(os.path.join(directory, 'ledger.db'))
+        try:
+            store.extend(TRANSACTIONS)
+            self.assertEqual([t.description for t in store.search(text="amaz ref")], ["Amazon refund"])
+            store.update(1, description="Store credit")
+            self.assertEqual([t.description for t in store.search(text="amazon", start_date="2024-07-05")],
+                             ["Lunch near the amazonite store"])
+        finally:
+            store.close()
+            shutil.rmtree(directory)
+
+if __name__ == '__main__':
+    unittest.main()
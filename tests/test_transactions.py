@@ -42,5 +42,29 @@ class TestTransaction(unittest.TestCase):
         t = Transaction(100, "Food", "Dinner", "2024-07-24", "expense")
         self.assertEqual(str(t), "2024-07-24 - Expense: $100.00 (Food) - Dinner")
 
+    def test_compact_fields(self):
+        t = Transaction(19.99, "Food", "Dinner", "2024-07-24", "expense", ["restaurant"])
+        other = Transaction.from_dict(dict(t.to_dict(), category="".join(["Fo", "od"]), tags=["restaurant"]))
+        self.assertFalse(hasattr(t, '__dict__'))
+        self.assertEqual((t.cents, t.amount), (1999, 19.99))
+        self.assertIs(other.category, t.category)
+        self.assertIs(other._tags, t._tags)
+        self.assertEqual(t.day, other.day)
+        t.date = "2024-07-25"
+        t.amount = "0.29"
+        self.assertEqual((t.date, t.cents), ("2024-07-25", 29))
+        with self.assertRaises(ValueError):
+            Transaction(1, "Food", "Dinner", "not a date")
+
+    def test_tags_edited_in_place(self):
+        t = Transaction(10, "Food", "Lunch", "2024-07-24", "expense", ["food"])
+        other = Transaction(12, "Food", "Lunch", "2024-07-25", "expense", ["food"])
+        t.tags.append("work")
+        t.tags.remove("food")
+        self.assertEqual(t.tags, ["work"])
+        self.assertEqual(t.to_dict()["tags"], ["work"])
+        self.assertEqual(other.tags, ["food"])
+        self.assertIs(other.description, t.description)
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,193 @@
+from typing import List, Optional
+from concurrent.futures import Executor, ThreadPoolExecutor
+from functools import partial
+from itertools import islice
+import asyncio
+import threading
+from .finance_tracker import FinanceTracker
+from .query import Page, QueryResult
+from reports.bundle import FORMATS
+
+# Transactions fetched per trip to a worker thread when iterating a query.
+DEFAULT_BATCH_SIZE = 256
+
+
+class AsyncFinanceTracker:
+    """asyncio front end to a `FinanceTracker`.
+
+    File I/O, exports and report rendering run on a thread pool, so they
+    never block the event loop, and at most `max_concurrency` of them run
+    at once; the rest wait their turn without taking a thread. With
+    `processes` set, CSV encoding and chart rendering also share one
+    process pool instead of each starting their own.
+
+    Cancelling a call stops it as soon as it safely can: an export or
+    report that has not started is dropped, one that is running is told to
+    stop and its partial files are removed before the cancellation is
+    raised. A save or load always runs to completion once started.
+
+        async with await AsyncFinanceTracker.open('data/ledger.bin', storage='binary') as tracker:
+            async for transaction in tracker.query(category='food'):
+                ...
+            await tracker.export('food.csv.gz', category='food')
+            await tracker.save()
+    """
+
+    def __init__(self, tracker: FinanceTracker, threads: int = 4, processes: int = 0,
+                 max_concurrency: Optional[int] = None):
+        """
+        :param tracker: Tracker to run the operations of
+        :param threads: Size of the thread pool blocking calls run on
+        :param processes: Size of the process pool for encoding and rendering (0: none)
+        :param max_concurrency: Blocking calls allowed to run at once (default: threads)
+        """
+        self.tracker = tracker
+        self.processes = processes
+        self._threads = ThreadPoolExecutor(max_workers=threads, thread_name_prefix='finance-io')
+        self._process_pool: Optional[Executor] = None
+        self._slots = asyncio.Semaphore(max_concurrency or threads)
+
+    @classmethod
+    async def open(cls, data_file: str = 'data/transactions.json', threads: int = 4, processes: int = 0,
+                   max_concurrency: Optional[int] = None, **options) -> 'AsyncFinanceTracker':
+        """Open a ledger, loading it off the event loop; `options` go to `FinanceTracker`."""
+        tracker = await asyncio.get_running_loop().run_in_executor(
+            None, partial(FinanceTracker, data_file, **options))
+        return cls(tracker, threads, processes, max_concurrency)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    @property
+    def _pool(self) -> Optional[Executor]:
+        if self.processes and self._process_pool is None:
+            from concurrent.futures import ProcessPoolExecutor  # loads multiprocessing; only needed here
+            self._process_pool = ProcessPoolExecutor(max_workers=self.processes)
+        return self._process_pool
+
+    async def run(self, function, *args, cancel: Optional[threading.Event] = None, **kwargs):
+        """Run a blocking call on the thread pool and wait for its result.
+
+        :param cancel: Event passed on to the call as its `cancel` argument; it
+                       is set if the caller is cancelled while the call runs,
+                       and the call is then waited for before the cancellation
+                       is raised
+        """
+        if cancel is not None:
+            kwargs['cancel'] = cancel
+        async with self._slots:
+            job = self._threads.submit(function, *args, **kwargs)
+            done = asyncio.wrap_future(job)
+            try:
+                return await asyncio.shield(done)
+            except asyncio.CancelledError:
+                if not job.cancel():
+                    if cancel is not None:
+                        cancel.set()
+                    # Already running: let it stop and clean up after itself first.
+                    await asyncio.wait([done])
+                    if not done.cancelled():
+                        done.exception()
+                raise
+
+    # -- storage -----------------------------------------------------------------
+
+    async def save(self) -> None:
+        await self.run(self.tracker.save_data)
+
+    async def load(self) -> None:
+        await self.run(self.tracker.load_data)
+
+    async def close(self) -> None:
+        """Close the ledger and shut the pools down."""
+        await self.run(self.tracker.close)
+        self._threads.shutdown(wait=False)
+        if self._process_pool is not None:
+            self._process_pool.shutdown(wait=False, cancel_futures=True)
+            self._process_pool = None
+
+    # -- exports and reports -------------------------------------------------------
+
+    async def export(self, filename: str, start_date: Optional[str] = None, end_date: Optional[str] = None,
+                     category: Optional[str] = None, tags: Optional[List[str]] = None,
+                     compression: Optional[str] = None, columnar: bool = False) -> Optional[int]:
+        """
+        Export transactions to CSV, or as compressed columns with `columnar`.
+
+        :return: Number of transactions exported (see FinanceTracker.export_to_csv)
+        """
+        cancel = threading.Event()
+        if columnar:
+            return await self.run(self.tracker.export_columnar, filename, start_date, end_date, category, tags,
+                                  cancel=cancel)
+        return await self.run(self.tracker.export_to_csv, filename, start_date, end_date, category, tags,
+                              compression=compression, workers=self.processes, executor=self._pool,
+                              cancel=cancel)
+
+    async def report(self, output_dir: str, formats=FORMATS, start_date: Optional[str] = None,
+                     end_date: Optional[str] = None) -> Optional[List[str]]:
+        """
+        Render every report chart to files (see FinanceTracker.generate_report_bundle).
+
+        :return: Paths of the files written
+        """
+        return await self.run(self.tracker.generate_report_bundle, output_dir, formats, start_date, end_date,
+                              executor=self._pool, cancel=threading.Event())
+
+    # -- queries -------------------------------------------------------------------
+
+    async def balance(self, start_date: Optional[str] = None, end_date: Optional[str] = None) -> float:
+        return await self.run(self.tracker.calculate_balance, start_date, end_date)
+
+    def query(self, start_date=None, end_date=None, category=None, tags=None, min_amount=None, max_amount=None,
+              text=None, batch_size: int = DEFAULT_BATCH_SIZE) -> 'AsyncQuery':
+        """Search transactions (see FinanceTracker.advanced_search); iterate with `async for`."""
+        return AsyncQuery(self, self.tracker.advanced_search(start_date, end_date, category, tags,
+                                                             min_amount, max_amount, text), batch_size)
+
+
+class AsyncQuery:
+    """A `QueryResult` read off the event loop.
+
+    `async for` fetches the transactions a batch at a time on the thread
+    pool; like iterating the result directly, it sees one version of the
+    ledger however many changes are made meanwhile.
+    """
+
+    def __init__(self, tracker: AsyncFinanceTracker, result: QueryResult, batch_size: int = DEFAULT_BATCH_SIZE):
+        self.tracker = tracker
+        self.result = result
+        self.batch_size = batch_size
+
+    def where(self, **filters) -> 'AsyncQuery':
+        return AsyncQuery(self.tracker, self.result.where(**filters), self.batch_size)
+
+    async def count(self) -> int:
+        return await self.tracker.run(len, self.result)
+
+    async def first(self):
+        return await self.tracker.run(self.result.first)
+
+    async def page(self, limit: int, offset: int = 0, cursor: Optional[str] = None) -> Page:
+        return await self.tracker.run(self.result.page, limit, offset, cursor)
+
+    async def to_list(self) -> list:
+        return [transaction async for transaction in self]
+
+    async def __aiter__(self):
+        transactions = iter(self.result)
+        try:
+            while True:
+                batch = await self.tracker.run(list, islice(transactions, self.batch_size))
+                for transaction in batch:
+                    yield transaction
+                if len(batch) < self.batch_size:
+                    return
+        finally:
+            transactions.close()
+
+    def __repr__(self):
+        return f"Async{self.result!r}"
@@ -1,14 +1,55 @@
-from datetime import datetime
+from datetime import datetime, date, timedelta
+import calendar
+
+PERIODS = ('daily', 'weekly', 'monthly')
+
+def _add_months(day: date, months: int, anchor: int) -> date:
+    month_index = day.year * 12 + day.month - 1 + months
+    year, month = divmod(month_index, 12)
+    return date(year, month + 1, min(anchor, calendar.monthrange(year, month + 1)[1]))
 
 class Budget:
     def __init__(self, category, amount, period='monthly'):
+        if period not in PERIODS:
+            raise ValueError("Budget period must be 'daily', 'weekly' or 'monthly'")
         self.category = category
         self.amount = amount
         self.period = period
         self.start_date = datetime.now().replace(day=1)
 
+    def to_dict(self) -> dict:
+        start = self.start_date.date() if isinstance(self.start_date, datetime) else self.start_date
+        return {"category": self.category, "amount": self.amount, "period": self.period,
+                "start_date": start.isoformat()}
+
+    @staticmethod
+    def from_dict(data: dict) -> 'Budget':
+        budget = Budget(data["category"], data["amount"], data.get("period", 'monthly'))
+        if data.get("start_date"):
+            budget.start_date = date.fromisoformat(data["start_date"])
+        return budget
+
     def is_exceeded(self, spent_amount):
         return spent_amount > self.amount
 
     def remaining(self, spent_amount):
-        return self.amount - spent_amount
\ No newline at end of file
+        return self.amount - spent_amount
+
+    def window(self, on: date = None):
+        """Return the first and last day of the budget period containing `on`.
+
+        Periods are counted from `start_date`: every day, every 7 days, or
+        every month on the start date's day of the month.
+        """
+        on = on or date.today()
+        start = self.start_date.date() if isinstance(self.start_date, datetime) else self.start_date
+        if self.period == 'daily':
+            return on, on
+        if self.period == 'weekly':
+            first = start + timedelta(days=(on - start).days // 7 * 7)
+            return first, first + timedelta(days=6)
+        months = (on.year - start.year) * 12 + on.month - start.month
+        first = _add_months(start, months, start.day)
+        if first > on:
+            first = _add_months(start, months - 1, start.day)
+        return first, _add_months(first, 1, start.day) - timedelta(days=1)
@@ -0,0 +1,137 @@
+from typing import Callable, Dict, Optional, Tuple
+from datetime import date
+import numpy as np
+from .budget import Budget
+from .transaction import CENTS
+
+WARNING_RATIO = 0.9
+
+
+class BudgetEngine:
+    """Tracks spending against every budget's current period.
+
+    All budgets are evaluated together: one vectorized pass over the rows in
+    the union of the budgets' current windows gives every category's spend.
+    After that the engine listens to the store and adjusts the running
+    counters per added or retired row, calling `on_alert` when a write takes
+    a budget over 90% or over its limit. Stores that cannot be subscribed to
+    (such as `SQLiteStore`) are asked for each budget's total instead.
+    """
+
+    def __init__(self, store, budgets: Dict[str, Budget],
+                 on_alert: Optional[Callable[[Budget, float, str], None]] = None):
+        self.store = store
+        self.budgets = budgets
+        self.on_alert = on_alert
+        self._today: Optional[date] = None
+        self._windows: Dict[str, Tuple[int, int]] = {}
+        self._spent: Dict[str, float] = {}
+        if hasattr(store, 'subscribe'):
+            store.subscribe(self)
+
+    def invalidate(self) -> None:
+        self._today = None
+
+    reset = invalidate
+
+    def _refresh(self, today: date) -> None:
+        if self._fresh(today):
+            return
+        self._windows = {}
+        for category, budget in self.budgets.items():
+            first, last = budget.window(today)
+            self._windows[category] = (first.toordinal(), last.toordinal())
+        self._spent = self._evaluate()
+        self._today = today
+
+    def _evaluate(self) -> Dict[str, float]:
+        store = self.store
+        if not self._windows:
+            return {}
+        if not hasattr(store, 'indexes'):
+            return {category: store.category_totals(date.fromordinal(low), date.fromordinal(high),
+                                                    category).get(category, {}).get('expense', 0.0)
+                    for category, (low, high) in self._windows.items()}
+
+        # Per-category window bounds, looked up by category code.
+        size = len(store.categories)
+        low_by_code = np.full(size + 1, np.iinfo(np.int32).max, dtype=np.int64)
+        high_by_code = np.full(size + 1, np.iinfo(np.int32).min, dtype=np.int64)
+        codes_to_category = {}
+        for category, (low, high) in self._windows.items():
+            for code in store.categories.lookup(category):
+                low_by_code[code], high_by_code[code] = low, high
+                codes_to_category[code] = category
+
+        spent = {category: 0.0 for category in self._windows}
+        if not codes_to_category:
+            return spent
+        rows = store.indexes.search(min(low for low, _ in self._windows.values()),
+                                    max(high for _, high in self._windows.values()))
+        codes = store._category[rows]
+        days = store._day[rows]
+        keep = (store._type[rows] == 2) & (days >= low_by_code[codes]) & (days <= high_by_code[codes])
+        totals = np.bincount(codes[keep], weights=store._cents[rows][keep], minlength=size)
+        for code, category in codes_to_category.items():
+            spent[category] += float(totals[code]) / CENTS
+        return spent
+
+    def _apply(self, rows: np.ndarray, sign: float) -> None:
+        if self._today is None or not self._windows:
+            return
+        counted = False
+        if self._today != date.today():
+            # A new period may have started; re-evaluate, which already
+            # includes these rows.
+            self._refresh(date.today())
+            counted = True
+        store = self.store
+        for row in rows.tolist():
+            if store._type[row] != 2:
+                continue
+            category = store.categories[int(store._category[row])]
+            window = self._windows.get(category)
+            if window is None or not window[0] <= store._day[row] <= window[1]:
+                continue
+            amount = sign * int(store._cents[row]) / CENTS
+            if counted:
+                after = self._spent[category]
+                before = after - amount
+            else:
+                before = self._spent[category]
+                self._spent[category] = after = before + amount
+            if sign > 0 and self.on_alert:
+                limit = self.budgets[category].amount
+                if before <= limit < after:
+                    self.on_alert(self.budgets[category], after, 'exceeded')
+                elif before <= limit * WARNING_RATIO < after:
+                    self.on_alert(self.budgets[category], after, 'warning')
+
+    def rows_added(self, rows: np.ndarray) -> None:
+        if len(rows) > 1024:
+            self.invalidate()
+        else:
+            self._apply(rows, 1.0)
+
+    def rows_retired(self, rows: np.ndarray) -> None:
+        self._apply(rows, -1.0)
+
+    def _fresh(self, today: date) -> bool:
+        return self._today == today and self._windows.keys() == self.budgets.keys()
+
+    def spending(self, today: Optional[date] = None) -> Dict[str, float]:
+        """Amount spent in each budgeted category during its current period.
+
+        Re-evaluating writes to the engine, so it is done under the store's
+        writer lock; reading the running counters is not.
+        """
+        today = today or date.today()
+        if not hasattr(self.store, 'subscribe'):
+            with self.store.lock:
+                self._today = None
+                self._refresh(today)
+                return dict(self._spent)
+        if not self._fresh(today):
+            with self.store.lock:
+                self._refresh(today)
+        return dict(self._spent)
@@ -0,0 +1,321 @@
+"""Non-interactive command line interface.
+
+    python main.py [--data-file PATH] [--storage json|binary|sqlite|partitioned] [--format json|jsonl|csv] COMMAND ...
+
+Every command writes machine-readable output to stdout. The tracker's own
+progress messages go to stderr. Commands that change the ledger save it
+before exiting. Batch input is read from stdin: `add` with no --amount
+reads JSON Lines, and `import -` reads CSV or, with --input-format jsonl,
+JSON Lines.
+
+With --stats-file (or FINANCE_STATS_FILE set), each run records how long
+its operations took and how much they read and wrote, and appends that
+to the file; `stats` sums every run recorded there. --profile samples
+the run's stacks into a folded-stack file for flame graph tools.
+"""
+from typing import Iterable, List, Optional
+from contextlib import redirect_stdout
+from datetime import date
+from itertools import islice
+import argparse
+import csv
+import json
+import os
+import sys
+from .budget import PERIODS
+from .exporter import HEADER, resolve_compression
+from .finance_tracker import FinanceTracker
+from .importer import read_jsonl
+from .instrumentation import INSTRUMENTATION, SamplingProfiler
+
+FORMATS = ('json', 'jsonl', 'csv')
+
+
+class CommandError(Exception):
+    """A command could not run; reported on stderr with exit status 2."""
+
+
+def _add_filters(parser: argparse.ArgumentParser, amounts: bool = True, text: bool = True) -> None:
+    parser.add_argument('--start', dest='start_date', help='earliest date (YYYY-MM-DD)')
+    parser.add_argument('--end', dest='end_date', help='latest date (YYYY-MM-DD)')
+    parser.add_argument('--category')
+    parser.add_argument('--tags', help="tag expression, e.g. 'travel AND NOT refund'")
+    if amounts:
+        parser.add_argument('--min-amount', type=float)
+        parser.add_argument('--max-amount', type=float)
+    if text:
+        parser.add_argument('--text', help='words to find in the description')
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog='finance', description='Finance Tracker command line interface.')
+    parser.add_argument('--data-file', default='data/transactions.json', help='ledger to open')
+    parser.add_argument('--storage', choices=('json', 'binary', 'sqlite', 'partitioned'), default='json')
+    parser.add_argument('--journal', action='store_true', help='log changes to a journal instead of rewriting')
+    parser.add_argument('--format', choices=FORMATS, default='json', help='output format')
+    parser.add_argument('--stats-file', default=os.environ.get('FINANCE_STATS_FILE'),
+                        help='record operation stats, appending them to this file')
+    parser.add_argument('--profile', help='write sampled stacks of this run to this file')
+    commands = parser.add_subparsers(dest='command', metavar='COMMAND', required=True)
+
+    add = commands.add_parser('add', help='add a transaction, or JSON Lines records from stdin')
+    add.add_argument('--amount', type=float)
+    add.add_argument('--category')
+    add.add_argument('--description', default='')
+    add.add_argument('--type', dest='transaction_type', choices=('income', 'expense'), default='expense')
+    add.add_argument('--date', help='YYYY-MM-DD (default: today)')
+    add.add_argument('--tags', default='', help='comma-separated tags')
+
+    import_ = commands.add_parser('import', help='import a CSV or JSON Lines file (- for stdin)')
+    import_.add_argument('file')
+    import_.add_argument('--input-format', choices=('csv', 'jsonl'),
+                         help='default: from the file suffix, CSV for stdin')
+
+    query = commands.add_parser('query', help='list matching transactions in date order')
+    _add_filters(query)
+    query.add_argument('--limit', type=int, help='page size')
+    query.add_argument('--offset', type=int, default=0)
+    query.add_argument('--cursor', help='next_cursor of the previous page')
+
+    balance = commands.add_parser('balance', help='income, expenses and balance')
+    balance.add_argument('--start', dest='start_date')
+    balance.add_argument('--end', dest='end_date')
+
+    report = commands.add_parser('report', help='render every report chart to files')
+    report.add_argument('--output-dir', default='reports')
+    report.add_argument('--formats', default='png,html', help='comma-separated: png, svg, html')
+    report.add_argument('--start', dest='start_date')
+    report.add_argument('--end', dest='end_date')
+    report.add_argument('--workers', type=int, default=0, help='rendering processes (0: in-process)')
+
+    budget = commands.add_parser('budget', help='set budgets or show their status')
+    budget_commands = budget.add_subparsers(dest='budget_command', metavar='ACTION', required=True)
+    budget_set = budget_commands.add_parser('set', help='set the budget of a category')
+    budget_set.add_argument('category')
+    budget_set.add_argument('amount', type=float)
+    budget_set.add_argument('--period', choices=PERIODS, default='monthly')
+    budget_commands.add_parser('status', help='spending against each budget')
+
+    export = commands.add_parser('export', help='export matching transactions to a CSV file')
+    export.add_argument('file', help="target path; '.gz' or '.zst' compresses")
+    _add_filters(export, amounts=False, text=False)
+    export.add_argument('--compression', choices=('gzip', 'zstd'))
+    export.add_argument('--workers', type=int, default=0)
+
+    recurring = commands.add_parser('process-recurring', help='add recurring transactions that are due')
+    recurring.add_argument('--today', help='process up to this date (default: today)')
+
+    stats = commands.add_parser('stats', help='call counts, latencies and work of the recorded runs')
+    stats.add_argument('--reset', action='store_true', help='discard the recorded runs')
+    return parser
+
+
+# -- output ----------------------------------------------------------------------
+
+def transaction_row(transaction) -> list:
+    """A transaction in the export_to_csv layout, so CSV output can be imported again."""
+    return [transaction.date, transaction.transaction_type, transaction.amount, transaction.category,
+            transaction.description, ','.join(transaction.tags)]
+
+
+def write_records(records: Iterable[dict], fmt: str, out, header: Optional[List[str]] = None,
+                  rows: Optional[Iterable[list]] = None, meta: Optional[dict] = None) -> None:
+    """Write records as one JSON document, JSON Lines or CSV.
+
+    JSON Lines and CSV are written as the records are produced. `rows` and
+    `header` give the CSV form when it differs from the records' values.
+    `meta` (e.g. a next-page cursor) is merged into the JSON document and
+    reported on stderr for the streaming formats.
+    """
+    if fmt == 'json':
+        document = {'results': list(records)}
+        document.update(meta or {})
+        json.dump(document, out)
+        out.write('\n')
+    elif fmt == 'jsonl':
+        for record in records:
+            out.write(json.dumps(record) + '\n')
+    else:
+        writer = csv.writer(out)
+        if rows is None:
+            records = iter(records)
+            first = next(records, None)
+            if first is None:
+                return
+            writer.writerow(header or list(first))
+            writer.writerow(list(first.values()))
+            writer.writerows(list(record.values()) for record in records)
+        else:
+            writer.writerow(header)
+            writer.writerows(rows)
+    if fmt != 'json':
+        for key, value in (meta or {}).items():
+            if value is not None:
+                print(f"{key}: {value}", file=sys.stderr)
+
+
+# -- commands --------------------------------------------------------------------
+
+def _added(added: int, errors) -> List[dict]:
+    """Result of a command adding transactions; fails if every row was invalid."""
+    if errors and not added:
+        raise CommandError(str(errors[0]) if len(errors) == 1 else f"all {len(errors)} rows were invalid")
+    return [{'added': added, 'skipped': len(errors)}]
+
+
+def cmd_add(tracker, args, stdin, out):
+    if args.amount is None:
+        if args.category:
+            raise CommandError("--category needs --amount")
+        records = read_jsonl(stdin)
+    else:
+        if not args.category:
+            raise CommandError("--amount needs --category")
+        records = [{'amount': args.amount, 'category': args.category, 'description': args.description,
+                    'date': args.date or date.today().isoformat(), 'transaction_type': args.transaction_type,
+                    'tags': args.tags.split(',') if args.tags else []}]
+    added, errors = tracker.add_transactions_bulk(records)
+    for error in errors[:10]:
+        print(f"  {error}")
+    tracker.save_data()
+    return _added(added, errors)
+
+
+def cmd_import(tracker, args, stdin, out):
+    source = stdin if args.file == '-' else args.file
+    input_format = args.input_format
+    if input_format is None:
+        input_format = 'jsonl' if args.file.endswith(('.jsonl', '.ndjson')) else 'csv'
+    if source is not stdin and not os.path.exists(source):
+        raise CommandError(f"no such file: {source}")
+    if input_format == 'jsonl':
+        added, errors = tracker.import_from_jsonl(source)
+    else:
+        added, errors = tracker.import_from_csv(source)
+    tracker.save_data()
+    return _added(added, errors)
+
+
+def cmd_query(tracker, args, stdin, out):
+    result = tracker.advanced_search(args.start_date, args.end_date, args.category, args.tags,
+                                     args.min_amount, args.max_amount, args.text)
+    meta = None
+    if args.limit is not None or args.cursor:
+        page = result.page(args.limit or 100, args.offset, args.cursor)
+        transactions, meta = page.items, {'next_cursor': page.next_cursor}
+    else:
+        transactions = islice(result, args.offset, None)
+    if args.format == 'csv':
+        write_records((), 'csv', out, HEADER, (transaction_row(t) for t in transactions), meta)
+    else:
+        write_records((t.to_dict() for t in transactions), args.format, out, meta=meta)
+    return None
+
+
+def cmd_balance(tracker, args, stdin, out):
+    with INSTRUMENTATION.operation('calculate_balance'):
+        income, expense = tracker.transactions.totals(args.start_date, args.end_date)
+    return [{'income': income, 'expense': expense, 'balance': income - expense}]
+
+
+def cmd_report(tracker, args, stdin, out):
+    formats = [fmt.strip() for fmt in args.formats.split(',') if fmt.strip()]
+    try:
+        paths = tracker.generate_report_bundle(args.output_dir, formats, args.start_date, args.end_date,
+                                               args.workers)
+    except ValueError as e:
+        raise CommandError(str(e))
+    return [{'file': path} for path in paths]
+
+
+def cmd_budget(tracker, args, stdin, out):
+    if args.budget_command == 'set':
+        tracker.set_budget(args.category, args.amount, args.period)
+        tracker.save_data()
+    return [dict(category=category, **status) for category, status in tracker.budget_status().items()]
+
+
+def cmd_export(tracker, args, stdin, out):
+    # Resolved up front, so the path reported is the one written (zstd may fall back to gzip).
+    filename, compression = resolve_compression(args.file, args.compression)
+    count = tracker.export_to_csv(filename, args.start_date, args.end_date, args.category,
+                                  args.tags, compression=compression, workers=args.workers)
+    if count is None:
+        raise CommandError("export cancelled")
+    return [{'file': filename, 'rows': count}]
+
+
+def cmd_process_recurring(tracker, args, stdin, out):
+    added = tracker.process_recurring_transactions(date.fromisoformat(args.today) if args.today else None)
+    tracker.save_data()
+    return [{'added': added}]
+
+
+def cmd_stats(args) -> List[dict]:
+    """Stats summed over the runs recorded in the stats file, slowest operation first."""
+    if not args.stats_file:
+        raise CommandError("no stats file: pass --stats-file or set FINANCE_STATS_FILE")
+    if args.reset:
+        if os.path.exists(args.stats_file):
+            os.remove(args.stats_file)
+        return []
+    if not os.path.exists(args.stats_file):
+        return []
+    merged = INSTRUMENTATION.merge_file(args.stats_file)
+    return [dict(operation=name, **stats.summary())
+            for name, stats in sorted(merged.items(), key=lambda item: -item[1].total_seconds)]
+
+
+COMMANDS = {
+    'add': cmd_add,
+    'import': cmd_import,
+    'query': cmd_query,
+    'balance': cmd_balance,
+    'report': cmd_report,
+    'budget': cmd_budget,
+    'export': cmd_export,
+    'process-recurring': cmd_process_recurring,
+}
+
+
+def _run(args, stdin, out):
+    """Open the ledger and run a command on it, recording stats if asked."""
+    recording = bool(args.stats_file or args.profile)
+    if recording:
+        INSTRUMENTATION.reset()
+        INSTRUMENTATION.enable()
+    profiler = SamplingProfiler().start() if args.profile else None
+    try:
+        # Keep stdout for results: the tracker's messages go to stderr.
+        with redirect_stdout(sys.stderr):
+            tracker = FinanceTracker(args.data_file, journal=args.journal, storage=args.storage)
+            try:
+                return COMMANDS[args.command](tracker, args, stdin, out)
+            finally:
+                tracker.close()
+    finally:
+        if profiler:
+            profiler.stop()
+            profiler.write_folded(args.profile)
+        if recording:
+            INSTRUMENTATION.disable()
+            if args.stats_file:
+                INSTRUMENTATION.append_to(args.stats_file, command=args.command)
+
+
+def main(argv: Optional[List[str]] = None, stdin=None, stdout=None) -> int:
+    """Run one command; return the process exit status."""
+    args = build_parser().parse_args(argv)
+    stdin = stdin or sys.stdin
+    out = stdout or sys.stdout
+    try:
+        if args.command == 'stats':
+            records = cmd_stats(args)
+        else:
+            records = _run(args, stdin, out)
+    except (CommandError, ValueError, OSError) as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 2
+    if records is not None:
+        write_records(records, args.format, out)
+    return 0
@@ -0,0 +1,152 @@
+from typing import Dict, List, Optional, Tuple
+from datetime import date
+from functools import lru_cache
+import json
+import os
+import numpy as np
+from .snapshot import snapshot_fingerprint
+
+INCOME_SLOT, EXPENSE_SLOT, COUNT_SLOT = 0, 1, 2
+_EPOCH_YEAR = 1970
+_EPOCH_ORDINAL = date(_EPOCH_YEAR, 1, 1).toordinal()
+
+
+def days_to_months(days: np.ndarray) -> np.ndarray:
+    """Map day ordinals to months since 1970-01 (vectorized)."""
+    return (days - _EPOCH_ORDINAL).astype('datetime64[D]').astype('datetime64[M]').astype(np.int64)
+
+
+@lru_cache(maxsize=4096)
+def day_to_month(day: int) -> int:
+    d = date.fromordinal(day)
+    return (d.year - _EPOCH_YEAR) * 12 + d.month - 1
+
+
+def month_start(month: int) -> int:
+    """Day ordinal of the first day of a month (months since 1970-01)."""
+    return date(_EPOCH_YEAR + month // 12, month % 12 + 1, 1).toordinal()
+
+
+class AggregateCube:
+    """Materialized month x category x type totals for a `TransactionStore`.
+
+    Each cell holds [income, expense, count] for one (month, category code),
+    with amounts in cents.
+    The cube is built with one vectorized pass on first use, updated row by
+    row as transactions are added, edited and deleted, and can be saved next
+    to a snapshot so reopening a ledger does not have to rebuild it.
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self._cells: Optional[Dict[Tuple[int, int], List[int]]] = None
+        store.subscribe(self)
+
+    @property
+    def cells(self) -> Dict[Tuple[int, int], List[int]]:
+        if self._cells is None:
+            with self.store.lock:
+                if self._cells is None:
+                    self.build()
+        return self._cells
+
+    def reset(self) -> None:
+        self._cells = None
+
+    def build(self) -> None:
+        store = self.store
+        live = store._live[:store._rows]
+        if not live.any():
+            self._cells = {}
+            return
+        months = days_to_months(store._day[:store._rows][live])
+        codes = store._category[:store._rows][live].astype(np.int64)
+        cents = store._cents[:store._rows][live]
+        income = store._type[:store._rows][live] == 1
+        keys, inverse = np.unique(months * (len(store.categories) + 1) + codes, return_inverse=True)
+        income_totals = np.bincount(inverse, weights=np.where(income, cents, 0))
+        expense_totals = np.bincount(inverse, weights=np.where(income, 0, cents))
+        counts = np.bincount(inverse)
+        width = len(store.categories) + 1
+        self._cells = {(key // width, key % width): [int(income_totals[i]), int(expense_totals[i]),
+                                                     int(counts[i])]
+                       for i, key in enumerate(keys.tolist())}
+
+    def _apply(self, rows: np.ndarray, sign: int) -> None:
+        if self._cells is None:
+            return
+        store = self.store
+        for day, code, cents, kind in zip(store._day[rows].tolist(), store._category[rows].tolist(),
+                                          store._cents[rows].tolist(), store._type[rows].tolist()):
+            key = (day_to_month(day), code)
+            cell = self._cells.get(key)
+            if cell is None:
+                cell = self._cells[key] = [0, 0, 0]
+            cell[INCOME_SLOT if kind == 1 else EXPENSE_SLOT] += sign * cents
+            cell[COUNT_SLOT] += sign
+            if not cell[COUNT_SLOT]:
+                del self._cells[key]
+
+    def rows_added(self, rows: np.ndarray) -> None:
+        if len(rows) > 1024:
+            self.reset()
+        else:
+            self._apply(rows, 1)
+
+    def rows_retired(self, rows: np.ndarray) -> None:
+        self._apply(rows, -1)
+
+    # -- queries ---------------------------------------------------------------
+
+    def category_totals(self, first_month: Optional[int] = None,
+                        last_month: Optional[int] = None) -> Dict[int, List[int]]:
+        """Sum the cells per category code over an inclusive month range."""
+        totals: Dict[int, List[int]] = {}
+        for (month, code), cell in self.cells.items():
+            if (first_month is None or month >= first_month) and (last_month is None or month <= last_month):
+                total = totals.setdefault(code, [0, 0, 0])
+                total[INCOME_SLOT] += cell[INCOME_SLOT]
+                total[EXPENSE_SLOT] += cell[EXPENSE_SLOT]
+                total[COUNT_SLOT] += cell[COUNT_SLOT]
+        return totals
+
+    def monthly_totals(self) -> Dict[int, List[int]]:
+        totals: Dict[int, List[int]] = {}
+        for (month, _), cell in self.cells.items():
+            total = totals.setdefault(month, [0, 0, 0])
+            total[INCOME_SLOT] += cell[INCOME_SLOT]
+            total[EXPENSE_SLOT] += cell[EXPENSE_SLOT]
+            total[COUNT_SLOT] += cell[COUNT_SLOT]
+        return totals
+
+    # -- persistence -------------------------------------------------------------
+
+    def save(self, path: str, snapshot_path: str) -> None:
+        """Persist the cube, tied to the snapshot it was computed alongside."""
+        categories = self.store.categories
+        data = {
+            'snapshot': snapshot_fingerprint(snapshot_path),
+            'unit': 'cents',
+            'cells': [[month, categories[code], *cell] for (month, code), cell in self.cells.items()],
+        }
+        temp_path = path + '.tmp'
+        with open(temp_path, 'w') as f:
+            json.dump(data, f)
+        os.replace(temp_path, path)
+
+    def load(self, path: str, snapshot_path: str) -> bool:
+        """Adopt a saved cube if it matches the snapshot; return whether it did."""
+        try:
+            with open(path, 'r') as f:
+                data = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return False
+        if not isinstance(data, dict) or data.get('snapshot') != snapshot_fingerprint(snapshot_path):
+            return False
+        if data.get('unit') != 'cents':
+            # Saved before amounts were kept in cents: rebuild instead.
+            return False
+        intern = self.store.categories.intern
+        self._cells = {(month, intern(category)): [income, expense, count]
+                       for month, category, income, expense, count in data['cells']}
+        return True
@@ -0,0 +1,293 @@
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+from collections import deque
+from itertools import islice
+from concurrent.futures import Executor
+import csv
+import gzip
+import io
+import os
+import numpy as np
+from .snapshot import _pack_strings
+from .store import EPOCH_ORDINAL, TYPE_NAMES, TransactionStore, day_to_str
+from .transaction import CENTS
+
+HEADER = ['Date', 'Type', 'Amount', 'Category', 'Description', 'Tags']
+COMPRESSIONS = ('gzip', 'zstd')
+_SUFFIXES = {'.gz': 'gzip', '.zst': 'zstd'}
+
+try:
+    from compression import zstd as _zstd  # Python 3.14+
+
+    def _zstd_compress(data: bytes, level: int) -> bytes:
+        return _zstd.compress(data, level)
+except ImportError:
+    try:
+        import zstandard as _zstd
+
+        def _zstd_compress(data: bytes, level: int) -> bytes:
+            return _zstd.ZstdCompressor(level=level).compress(data)
+    except ImportError:
+        _zstd_compress = None
+
+
+class ExportCancelled(Exception):
+    """Raised when an export is cancelled; its partial file has been removed."""
+
+
+def resolve_compression(filename: str, compression: Optional[str] = None) -> Tuple[str, Optional[str]]:
+    """Pick the compression for `filename` and the path that will be written.
+
+    Without an explicit `compression` it is inferred from the suffix. zstd
+    falls back to the standard library's gzip when no zstd module is
+    available, and a '.zst' suffix becomes '.gz' to match.
+    """
+    if compression is None:
+        compression = _SUFFIXES.get(os.path.splitext(filename)[1].lower())
+    elif compression not in COMPRESSIONS:
+        raise ValueError(f"compression must be one of {', '.join(COMPRESSIONS)}")
+    if compression == 'zstd' and _zstd_compress is None:
+        print("zstd is not available; writing gzip instead.")
+        compression = 'gzip'
+        root, suffix = os.path.splitext(filename)
+        if suffix.lower() == '.zst':
+            filename = root + '.gz'
+    return filename, compression
+
+
+def _compress(data: bytes, compression: Optional[str], level: Optional[int]) -> bytes:
+    if compression == 'gzip':
+        return gzip.compress(data, compresslevel=6 if level is None else level)
+    if compression == 'zstd':
+        return _zstd_compress(data, 3 if level is None else level)
+    return data
+
+
+def encode_chunk(rows: List[list], compression: Optional[str] = None, level: Optional[int] = None) -> bytes:
+    """Format rows as CSV and compress them as one self-contained member.
+
+    gzip members and zstd frames can be concatenated, so chunks encoded
+    independently (and in parallel) still form one valid file.
+    """
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    return _compress(buffer.getvalue().encode('utf-8'), compression, level)
+
+
+def _select(store, start_date=None, end_date=None, category=None, tags=None) -> Tuple[TransactionStore, np.ndarray]:
+    """The store to read and the matching row ids in list order.
+
+    Other stores' matches are copied into a TransactionStore, for the
+    columnar export, which writes whole columns at once.
+    """
+    if not isinstance(store, TransactionStore):
+        store = TransactionStore(store.search(start_date, end_date, category, tags))
+        return store, store.order()
+    if not (start_date or end_date or category or tags):
+        return store, store.order()
+    # The order and the matches from the same version; rows never change,
+    # so the chunks can then be read while writes go on.
+    order, matches = store.read(lambda: (store.order(), store.search_rows(start_date, end_date, category, tags)))
+    return store, order[np.isin(order, matches)]
+
+
+def _chunk_rows(store: TransactionStore, rows: np.ndarray) -> List[list]:
+    """CSV rows for a chunk of row ids, gathered column by column."""
+    categories, tag_names = store.categories, store.tags
+    counts = store._tag_count[rows]
+    if counts.any():
+        starts = np.repeat(store._tag_start[rows], counts)
+        offsets = np.arange(int(counts.sum())) - np.repeat(np.cumsum(counts) - counts, counts)
+        names = [tag_names[code] for code in store._tag_pool[starts + offsets].tolist()]
+        bounds = np.cumsum(counts).tolist()
+        tags = [','.join(names[stop - count:stop]) if count else ''
+                for stop, count in zip(bounds, counts.tolist())]
+    else:
+        tags = [''] * len(rows)
+    return list(zip([day_to_str(day) for day in store._day[rows].tolist()],
+                    [TYPE_NAMES[kind] for kind in store._type[rows].tolist()],
+                    (store._cents[rows] / CENTS).tolist(),
+                    [categories[code] for code in store._category[rows].tolist()],
+                    [store._descriptions[row] for row in rows.tolist()],
+                    tags))
+
+
+def _chunks(store: TransactionStore, rows: np.ndarray, chunk_size: int,
+            cancel=None) -> Iterator[List[list]]:
+    for start in range(0, len(rows), chunk_size):
+        if cancel is not None and cancel.is_set():
+            raise ExportCancelled("export cancelled")
+        yield _chunk_rows(store, rows[start:start + chunk_size])
+
+
+def _query_chunks(query, chunk_size: int, cancel=None) -> Iterator[List[list]]:
+    """CSV rows of a lazy query (see `QueryResult`), read `chunk_size` transactions at a time."""
+    transactions = iter(query)
+    while True:
+        if cancel is not None and cancel.is_set():
+            raise ExportCancelled("export cancelled")
+        batch = TransactionStore(islice(transactions, chunk_size))
+        if not len(batch):
+            return
+        yield _chunk_rows(batch, batch.order())
+
+
+def _write_through(filename: str, write) -> None:
+    """Call `write` with a temporary file, then move it onto `filename`.
+
+    A failed or cancelled export removes only its temporary file, never a
+    file already at `filename`.
+    """
+    temp_file = filename + '.tmp'
+    try:
+        write(temp_file)
+        os.replace(temp_file, filename)
+    except BaseException:
+        # Covers ExportCancelled and KeyboardInterrupt as well as errors.
+        if os.path.exists(temp_file):
+            os.remove(temp_file)
+        raise
+
+
+def export_csv(store, filename: str, start_date=None, end_date=None, category=None, tags=None,
+               compression: Optional[str] = None, level: Optional[int] = None, workers: int = 0,
+               chunk_size: int = 50000, progress: Optional[Callable[[int, int], None]] = None,
+               cancel=None, executor: Optional[Executor] = None) -> Tuple[str, int]:
+    """Stream the matching transactions to a CSV file, a chunk at a time.
+
+    :param store: TransactionStore, SQLiteStore or PartitionedStore to export from;
+                  the last two are read in date order, a chunk at a time
+    :param filename: Target path; '.gz' or '.zst' select compression
+    :param start_date, end_date, category, tags: Filters, as for advanced_search
+    :param compression: 'gzip', 'zstd' or None to infer from the suffix
+    :param level: Compression level (codec default if None)
+    :param workers: Encode and compress chunks on this many processes (0: in-process)
+    :param chunk_size: Rows per chunk
+    :param progress: Called with (rows written, total rows) after each chunk
+    :param cancel: Object with is_set() (e.g. threading.Event) checked between chunks
+    :param executor: Process pool to encode on instead of starting one; `workers`
+                     then only bounds the chunks in flight
+    :return: (path written, number of rows)
+    """
+    filename, compression = resolve_compression(filename, compression)
+    if isinstance(store, TransactionStore):
+        store, rows = _select(store, start_date, end_date, category, tags)
+        total, chunks = len(rows), _chunks(store, rows, chunk_size, cancel)
+    else:
+        query = store.query(start_date, end_date, category, tags)
+        total, chunks = len(query), _query_chunks(query, chunk_size, cancel)
+    written = 0
+
+    def write(path):
+        nonlocal written
+        if compression is None and not workers and executor is None:
+            with open(path, 'w', newline='') as f:
+                writer = csv.writer(f)
+                writer.writerow(HEADER)
+                for chunk in chunks:
+                    writer.writerows(chunk)
+                    written += len(chunk)
+                    if progress:
+                        progress(written, total)
+        else:
+            with open(path, 'wb') as f:
+                f.write(encode_chunk([HEADER], compression, level))
+                for data, count in _encoded_chunks(chunks, compression, level, workers, executor):
+                    f.write(data)
+                    written += count
+                    if progress:
+                        progress(written, total)
+
+    _write_through(filename, write)
+    return filename, written
+
+
+def _encoded_chunks(chunks, compression, level, workers, executor=None) -> Iterator[Tuple[bytes, int]]:
+    if not workers and executor is None:
+        for chunk in chunks:
+            yield encode_chunk(chunk, compression, level), len(chunk)
+        return
+    if executor is not None:
+        yield from _pooled_chunks(executor, chunks, compression, level, max(workers, 1))
+        return
+    from concurrent.futures import ProcessPoolExecutor  # loads multiprocessing; only needed here
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        yield from _pooled_chunks(pool, chunks, compression, level, workers)
+
+
+def _pooled_chunks(pool, chunks, compression, level, workers) -> Iterator[Tuple[bytes, int]]:
+    # Keep a bounded number of chunks in flight so memory stays flat, and
+    # write them back in submission order.
+    pending = deque()
+    try:
+        for chunk in chunks:
+            pending.append((pool.submit(encode_chunk, chunk, compression, level), len(chunk)))
+            if len(pending) >= 2 * workers:
+                future, count = pending.popleft()
+                yield future.result(), count
+        while pending:
+            future, count = pending.popleft()
+            yield future.result(), count
+    finally:
+        for future, _ in pending:
+            future.cancel()
+
+
+# -- columnar output -------------------------------------------------------------
+
+def export_columnar(store, filename: str, start_date=None, end_date=None, category=None, tags=None,
+                    cancel=None) -> Tuple[str, int]:
+    """Write the matching transactions as compressed, dictionary-encoded columns.
+
+    The file is a NumPy .npz archive with one array per column, close to
+    what Parquet stores: dates as datetime64, categories and tags as codes
+    into value tables, and descriptions packed as UTF-8 offsets and a blob.
+    Read it back with `read_columnar`.
+    """
+    store, rows = _select(store, start_date, end_date, category, tags)
+    counts = store._tag_count[rows]
+    starts = np.repeat(store._tag_start[rows], counts)
+    offsets = np.arange(int(counts.sum())) - np.repeat(np.cumsum(counts) - counts, counts)
+    tag_offsets = np.zeros(len(rows) + 1, dtype=np.int64)
+    np.cumsum(counts, out=tag_offsets[1:])
+    descriptions = _pack_strings(store._descriptions[row] for row in rows.tolist())
+    columns = {
+        'date': (store._day[rows].astype(np.int64) - EPOCH_ORDINAL).astype('datetime64[D]'),
+        'transaction_type': store._type[rows],
+        'amount': store._cents[rows] / CENTS,
+        'category': store._category[rows],
+        'category_values': np.array(store.categories.values, dtype=str),
+        'description_offsets': descriptions['offsets'],
+        'description_blob': descriptions['blob'],
+        'tags': store._tag_pool[starts + offsets],
+        'tag_offsets': tag_offsets,
+        'tag_values': np.array(store.tags.values, dtype=str),
+    }
+    if cancel is not None and cancel.is_set():
+        raise ExportCancelled("export cancelled")
+
+    def write(path):
+        with open(path, 'wb') as f:
+            np.savez_compressed(f, **columns)
+
+    _write_through(filename, write)
+    return filename, len(rows)
+
+
+def read_columnar(filename: str) -> Dict[str, list]:
+    """Load a file written by `export_columnar` as `validate_columns`-style columns."""
+    with np.load(filename) as data:
+        categories = data['category_values'].tolist()
+        tag_values = data['tag_values'].tolist()
+        tag_names = [tag_values[code] for code in data['tags'].tolist()]
+        tag_offsets = data['tag_offsets'].tolist()
+        offsets = data['description_offsets'].tolist()
+        blob = data['description_blob'].tobytes()
+        return {
+            'amount': data['amount'],
+            'date': np.datetime_as_string(data['date']).tolist(),
+            'transaction_type': [TYPE_NAMES[kind] for kind in data['transaction_type'].tolist()],
+            'category': [categories[code] for code in data['category'].tolist()],
+            'description': [blob[start:stop].decode('utf-8') for start, stop in zip(offsets, offsets[1:])],
+            'tags': [tag_names[start:stop] for start, stop in zip(tag_offsets, tag_offsets[1:])],
+        }
@@ -0,0 +1,118 @@
+from typing import Optional, Tuple
+import numpy as np
+from .transaction import CENTS
+
+
+class FenwickTree:
+    """Binary indexed tree giving O(log n) point updates and prefix sums."""
+
+    def __init__(self, values: np.ndarray):
+        # tree[i] holds the sum of values[i - lowbit(i), i) (1-based).
+        size = len(values)
+        prefix = np.zeros(size + 1)
+        np.cumsum(values, out=prefix[1:])
+        index = np.arange(size + 1)
+        self._tree = prefix - prefix[index - (index & -index)]
+        self._tree[0] = 0.0
+
+    def __len__(self) -> int:
+        return len(self._tree) - 1
+
+    def add(self, position: int, delta: float) -> None:
+        tree = self._tree
+        position += 1
+        while position < len(tree):
+            tree[position] += delta
+            position += position & -position
+
+    def prefix(self, stop: int) -> float:
+        """Sum of the values at positions [0, stop)."""
+        tree = self._tree
+        total = 0.0
+        stop = min(max(stop, 0), len(tree) - 1)
+        while stop:
+            total += tree[stop]
+            stop -= stop & -stop
+        return float(total)
+
+    def range_sum(self, start: int, stop: int) -> float:
+        """Sum of the values at positions [start, stop)."""
+        return self.prefix(stop) - self.prefix(start)
+
+
+class DailyTotals:
+    """Income and expense prefix sums keyed by day ordinal.
+
+    Subscribes to a `TransactionStore` and answers any date-range income,
+    expense or balance query in O(log days) without touching the rows.
+    The trees sum whole cents, which float64 holds exactly up to 2**53.
+    Like the search indexes it is built on first use and then updated on
+    every added or retired row.
+    """
+
+    _SLACK = 366
+
+    def __init__(self, store):
+        self.store = store
+        self._first_day = 0
+        self._income: Optional[FenwickTree] = None
+        self._expense: Optional[FenwickTree] = None
+        store.subscribe(self)
+
+    def reset(self) -> None:
+        self._income = self._expense = None
+
+    def build(self, first_day: Optional[int] = None, last_day: Optional[int] = None) -> None:
+        store = self.store
+        live = store._live[:store._rows]
+        days = store._day[:store._rows][live]
+        if len(days):
+            low, high = int(days.min()), int(days.max())
+            first_day = low if first_day is None else min(first_day, low)
+            last_day = high if last_day is None else max(last_day, high)
+        if first_day is None:
+            first_day = last_day = 0
+        first_day -= self._SLACK
+        size = last_day - first_day + 1 + self._SLACK
+        cents = store._cents[:store._rows][live]
+        income = store._type[:store._rows][live] == 1
+        offsets = days - first_day
+        self._first_day = first_day
+        self._expense = FenwickTree(np.bincount(offsets, weights=np.where(income, 0, cents), minlength=size))
+        # Set last: readers take a non-None _income to mean the build is done.
+        self._income = FenwickTree(np.bincount(offsets, weights=np.where(income, cents, 0), minlength=size))
+
+    def _apply(self, rows: np.ndarray, sign: float) -> None:
+        if self._income is None:
+            return
+        store = self.store
+        days = store._day[rows]
+        low, high = int(days.min()), int(days.max())
+        if low < self._first_day or high >= self._first_day + len(self._income):
+            # Out of the covered span: rebuild wider (the store already holds the change).
+            self.build(low, high)
+            return
+        for day, cents, kind in zip(days.tolist(), store._cents[rows].tolist(), store._type[rows].tolist()):
+            tree = self._income if kind == 1 else self._expense
+            tree.add(day - self._first_day, sign * cents)
+
+    def rows_added(self, rows: np.ndarray) -> None:
+        if len(rows) > 1024:
+            self.reset()
+        else:
+            self._apply(rows, 1.0)
+
+    def rows_retired(self, rows: np.ndarray) -> None:
+        self._apply(rows, -1.0)
+
+    def totals(self, start_day: Optional[int] = None, end_day: Optional[int] = None) -> Tuple[float, float]:
+        """Return (income, expense) for start_day <= day <= end_day."""
+        if self._income is None:
+            with self.store.lock:
+                if self._income is None:
+                    self.build()
+        start = 0 if start_day is None else start_day - self._first_day
+        stop = len(self._income) if end_day is None else end_day - self._first_day + 1
+        if stop <= start:
+            return 0.0, 0.0
+        return self._income.range_sum(start, stop) / CENTS, self._expense.range_sum(start, stop) / CENTS
@@ -1,49 +1,126 @@
 from typing import List, Optional
 from datetime import datetime, timedelta
+from functools import wraps
+from itertools import islice
 from .transaction import Transaction
 from .budget import Budget
+from .budget_engine import BudgetEngine, WARNING_RATIO
+from .store import TransactionStore
+from .journal import Journal
+from .snapshot import is_snapshot, load_snapshot, write_snapshot
+from .sqlite_store import SQLiteStore
+from .partitioned_store import PartitionedStore
+from .series import DEFAULT_PLOT_POINTS, running_balance
+from .recurring import RecurringItem, RecurringScheduler
+from .query import DEFAULT_PAGE_SIZE
+from .exporter import ExportCancelled, export_columnar, export_csv
+from .instrumentation import INSTRUMENTATION, file_size, instrumented
+from .importer import gc_paused, read_csv_columns, read_jsonl, records_to_columns, validate_columns
 import os
 import json
-import csv
-import plotly.graph_objs as go
-from plotly.subplots import make_subplots
+from reports.bundle import (FORMATS, ReportCancelled, balance_chart, category_comparison_chart,
+                            category_expense_chart, generate_report_bundle, monthly_chart, plotly_figure,
+                            render_chart)
 from reports.report_generator import generate_report
-from collections import defaultdict
-from bisect import bisect_left, bisect_right, bisect
+
+
+def _serialized(method):
+    """Run a method that writes under the store's writer lock, so writes apply one at a time."""
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._store.lock:
+            return method(self, *args, **kwargs)
+    return wrapper
+
 
 class FinanceTracker:
-    def __init__(self):
-        self.transactions = []
-        self.recurring_transactions = []
+    def __init__(self, data_file: str = 'data/transactions.json', journal: bool = False,
+                 compact_every: int = 10000, storage: str = 'json', instrument: bool = False,
+                 partition_by: str = 'month'):
+        """
+        :param data_file: Path of the snapshot holding the transactions
+        :param storage: 'json' or 'binary' (memory-mapped columns) snapshots,
+                        'sqlite' to keep the transactions in an SQLite database
+                        and push filters and aggregates down to SQL, or
+                        'partitioned' for a directory of binary snapshots, one
+                        per `partition_by` period, that date-bounded queries
+                        open only as needed (see PartitionedStore). A json
+                        or binary ledger is read whichever of the two its
+                        file holds and written back in the chosen format
+        :param journal: Log each change to an append-only journal next to the
+                        snapshot instead of rewriting the snapshot on save
+        :param compact_every: Journal length at which save_data folds the
+                              journal back into the snapshot
+        :param instrument: Record call counts, latencies and work done by the
+                           public operations (see `stats`)
+        :param partition_by: 'month' or 'year', for partitioned storage
+        """
+        if storage not in ('json', 'binary', 'sqlite', 'partitioned'):
+            raise ValueError("Storage must be 'json', 'binary', 'sqlite' or 'partitioned'")
+        if storage == 'sqlite' and journal:
+            raise ValueError("SQLite storage keeps its own journal")
+        if storage == 'partitioned' and journal:
+            raise ValueError("Partitioned storage only rewrites the partitions that changed; it needs no journal")
+        if instrument:
+            INSTRUMENTATION.enable()
+        self.data_file = data_file
+        self.storage = storage
+        self.journal_file = data_file + '.journal' if journal else None
+        self.compact_every = compact_every
+        self._journal = None
+        if storage == 'sqlite':
+            self._store = SQLiteStore(data_file)
+        elif storage == 'partitioned':
+            self._store = PartitionedStore(data_file, partition_by)
+        else:
+            self._store = TransactionStore()
+        self.recurring = RecurringScheduler()
         self.load_data()
         self.budgets = {}
-        self.date_index = []
-        self.category_index = defaultdict(list)
-        self.amount_index = []
-
-    def add_transaction(self, amount=None, category=None, description=None, transaction_type=None, tags=None):
-        try:
-            if amount is None:
-                amount = float(input("Enter amount: "))
-            if category is None:
-                category = input("Enter category: ")
-            if description is None:
-                description = input("Enter description: ")
-            if transaction_type is None:
-                transaction_type = input("Enter type (income/expense): ").lower()
-                if transaction_type not in ['income', 'expense']:
-                    raise ValueError("Transaction type must be 'income' or 'expense'")
-            if tags is None:
-                tags = input("Enter tags (comma-separated): ").split(',')
-            
-            date = datetime.now().strftime("%Y-%m-%d")
-            transaction = Transaction(amount, category, description, date, transaction_type, tags)
-            self.transactions.append(transaction)
-            self._update_indexes(transaction)
-            print("Transaction added successfully.")
-        except ValueError as e:
-            print(f"Error adding transaction: {e}")
-
+        self._load_budgets()
+        self._budget_engine = BudgetEngine(self._store, self.budgets, self._budget_alert)
+
+    @property
+    def transactions(self):
+        """The transactions, as a list-like view over the columnar store."""
+        return self._store
+
+    @transactions.setter
+    @_serialized
+    def transactions(self, transactions) -> None:
+        self._store.replace(transactions)
+        if self._journal:
+            self._log({'op': 'clear'})
+            for t in self._store.to_dicts():
+                self._log({'op': 'add', 'data': t})
+
+    @property
+    def recurring_transactions(self):
+        """(template transaction, frequency) for each recurring item."""
+        return [(item.template, item.frequency) for item in self.recurring]
+
+    def _log(self, record: dict) -> None:
+        if self._journal:
+            self._journal.append(record)
+
+    def _apply(self, record: dict) -> None:
+        """Apply one journal record to the store."""
+        op = record['op']
+        if op == 'add':
+            self._store.append(record['data'])
+        elif op == 'add_many':
+            self._store.extend_columns(record['columns'])
+        elif op == 'edit':
+            self._store.update(record['index'], **record['changes'])
+        elif op == 'delete':
+            self._store.pop(record['index'])
+        elif op == 'clear':
+            self._store.clear()
+        elif op == 'recurring':
+            self.recurring = RecurringScheduler(RecurringItem.from_dict(item) for item in record['items'])
+
+    @instrumented('add_transaction')
+    @_serialized
     def add_transaction(self, amount: float, category: str, description: str, 
                         transaction_type: str, tags: List[str] = None, 
                         recurring: bool = False, frequency: str = None) -> None:
@@ -64,154 +141,452 @@ class FinanceTracker:
             if recurring:
                 if frequency not in ['daily', 'weekly', 'monthly']:
                     raise ValueError("Invalid frequency for recurring transaction")
-                self.recurring_transactions.append((transaction, frequency))
+                self.recurring.add(transaction, frequency)
+                self._log({'op': 'recurring', 'items': self.recurring.to_dicts()})
             else:
-                self.transactions.append(transaction)
+                self._store.append(transaction)
+                self._log({'op': 'add', 'data': transaction.to_dict()})
             print("Transaction added successfully.")
         except ValueError as e:
             print(f"Error adding transaction: {e}")
-        
-        def _update_indexes(self, transaction):
-            bisect.insort(self.date_index, (transaction.date, transaction))
-            self.category_index[transaction.category].append(transaction)
-            bisect.insort(self.amount_index, (transaction.amount, transaction))
-        
-    def view_transactions(self, start_date=None, end_date=None, category=None):
-        filtered_transactions = self.transactions
 
-        if start_date:
-            filtered_transactions = [t for t in filtered_transactions if t.date >= start_date]
-        if end_date:
-            filtered_transactions = [t for t in filtered_transactions if t.date <= end_date]
-        if category:
-            filtered_transactions = [t for t in filtered_transactions if t.category.lower() == category.lower()]
 
-        for t in filtered_transactions:
-            print(t)
+    @instrumented('add_transactions_bulk')
+    @_serialized
+    def add_transactions_bulk(self, records, batch_size: int = 50000):
+        """
+        Add many transactions at once.
+
+        Rows are validated a batch at a time and appended with one store
+        write per batch; a bad row is reported and skipped without aborting
+        the import. Indexes and aggregates are rebuilt once, on next use,
+        rather than updated per row.
 
+        :param records: Iterable of transaction dicts or Transaction objects
+        :param batch_size: Number of rows validated and written together
+        :return: (number of transactions added, list of ImportErrorDetail)
+        """
+        added, errors = 0, []
+        batch, first_row = [], 1
+        with gc_paused():
+            for record in records:
+                batch.append(record)
+                if len(batch) >= batch_size:
+                    added += self._add_columns(records_to_columns(batch), first_row, errors)
+                    first_row += len(batch)
+                    batch = []
+            if batch:
+                added += self._add_columns(records_to_columns(batch), first_row, errors)
+        return added, errors
+
+    def _add_columns(self, columns, first_row, errors) -> int:
+        valid, batch_errors = validate_columns(columns, first_row)
+        errors.extend(batch_errors)
+        count = len(valid['amount'])
+        INSTRUMENTATION.count(rows_scanned=len(columns['amount']), rows_returned=count)
+        if count:
+            self._store.extend_columns(valid)
+            if self._journal:
+                self._log({'op': 'add_many', 'columns': dict(valid, amount=valid['amount'].tolist())})
+        return count
+
+    @instrumented('import_from_csv')
+    @_serialized
+    def import_from_csv(self, filename, batch_size: int = 50000):
+        """Import transactions from a CSV file (path or open file) laid out like export_to_csv."""
+        added, errors, first_row = 0, [], 1
+        with gc_paused():
+            for columns in read_csv_columns(filename, batch_size):
+                added += self._add_columns(columns, first_row, errors)
+                first_row += len(columns['amount'])
+        return self._report_import(filename, added, errors)
+
+    @instrumented('import_from_jsonl')
+    @_serialized
+    def import_from_jsonl(self, filename):
+        """Import transactions from a JSON Lines file (path or open file) of transaction dicts."""
+        added, errors = self.add_transactions_bulk(read_jsonl(filename))
+        return self._report_import(filename, added, errors)
+
+    def _report_import(self, filename, added, errors):
+        if isinstance(filename, str):
+            INSTRUMENTATION.count(bytes_read=file_size(filename))
+        print(f"Imported {added} transactions from {getattr(filename, 'name', filename)}")
+        if errors:
+            print(f"Skipped {len(errors)} invalid rows:")
+            for error in errors[:10]:
+                print(f"  {error}")
+            if len(errors) > 10:
+                print(f"  ... and {len(errors) - 10} more")
+        return added, errors
+
+    @instrumented('view_transactions')
     def view_transactions(self, start_date: Optional[str] = None, 
                           end_date: Optional[str] = None, 
-                          category: Optional[str] = None) -> None:
+                          category: Optional[str] = None,
+                          limit: Optional[int] = None, offset: int = 0,
+                          cursor: Optional[str] = None) -> Optional[str]:
         """
-        View transactions with optional filters.
-        
+        View transactions with optional filters, in date order.
+
+        Transactions are printed as they are read, so a limited page costs
+        the same however many transactions match.
+
         :param start_date: Start date for filtering transactions
         :param end_date: End date for filtering transactions
         :param category: Category for filtering transactions
+        :param limit: Print at most this many transactions
+        :param offset: Number of matching transactions to skip
+        :param cursor: Cursor returned by the previous call, to print the next page
+        :return: Cursor of the next page, or None if nothing is left
         """
-        filtered_transactions = self.transactions
-
-        if start_date:
-            filtered_transactions = [t for t in filtered_transactions if t.date >= start_date]
-        if end_date:
-            filtered_transactions = [t for t in filtered_transactions if t.date <= end_date]
-        if category:
-            filtered_transactions = [t for t in filtered_transactions if t.category.lower() == category.lower()]
-
-        for t in filtered_transactions:
+        results = self._store.query(start_date, end_date, category)
+        if limit is None and cursor is None:
+            for t in islice(results, offset, None):
+                print(t)
+            return None
+        page = results.page(limit or DEFAULT_PAGE_SIZE, offset, cursor)
+        for t in page.items:
             print(t)
+        return page.next_cursor
         
-    def process_recurring_transactions(self) -> None:
-        """Process all recurring transactions and add them to the main transaction list."""
-        today = datetime.now().date()
-        for transaction, frequency in self.recurring_transactions:
-            if frequency == 'daily':
-                self.transactions.append(transaction)
-            elif frequency == 'weekly' and today.weekday() == 0:  # Monday
-                self.transactions.append(transaction)
-            elif frequency == 'monthly' and today.day == 1:
-                self.transactions.append(transaction)
-
-    def calculate_balance(self, start_date=None, end_date=None):
-        relevant_transactions = self.transactions
-        if start_date:
-            relevant_transactions = [t for t in relevant_transactions if t.date >= start_date]
-        if end_date:
-            relevant_transactions = [t for t in relevant_transactions if t.date <= end_date]
-
-        balance = sum(t.amount if t.transaction_type == 'income' else -t.amount for t in relevant_transactions)
-        return balance
-
-    def generate_report(self, report_type="summary", start_date=None, end_date=None):
-        from reports.report_generator import generate_report
-        return generate_report(self.transactions, report_type, start_date, end_date)
+    @instrumented('process_recurring_transactions')
+    @_serialized
+    def process_recurring_transactions(self, today=None) -> int:
+        """
+        Add every recurring occurrence due up to today that has not been added yet.
 
+        Missed occurrences (say, after a week away) are caught up, each dated
+        the day it was due; running this again the same day adds nothing.
+
+        :param today: Date to process up to (defaults to today)
+        :return: Number of transactions added
+        """
+        occurrences = self.recurring.due(today)
+        if occurrences:
+            self._store.extend(occurrences)
+            for transaction in occurrences:
+                self._log({'op': 'add', 'data': transaction.to_dict()})
+            self._log({'op': 'recurring', 'items': self.recurring.to_dicts()})
+        return len(occurrences)
+
+    @property
+    def recurring_file(self) -> str:
+        """Where the recurring items and their next-due dates are kept."""
+        return self.data_file + '.recurring'
+
+    def _save_recurring(self) -> None:
+        if not len(self.recurring) and not os.path.exists(self.recurring_file):
+            return
+        temp_file = self.recurring_file + '.tmp'
+        with open(temp_file, 'w') as f:
+            json.dump(self.recurring.to_dicts(), f, indent=4)
+        os.replace(temp_file, self.recurring_file)
+
+    def _load_recurring(self) -> None:
+        if os.path.exists(self.recurring_file):
+            with open(self.recurring_file, 'r') as f:
+                self.recurring = RecurringScheduler(RecurringItem.from_dict(item) for item in json.load(f))
+
+    @property
+    def budgets_file(self) -> str:
+        """Where the budgets are kept."""
+        return self.data_file + '.budgets'
+
+    def _save_budgets(self) -> None:
+        if not self.budgets and not os.path.exists(self.budgets_file):
+            return
+        temp_file = self.budgets_file + '.tmp'
+        with open(temp_file, 'w') as f:
+            json.dump([budget.to_dict() for budget in self.budgets.values()], f, indent=4)
+        os.replace(temp_file, self.budgets_file)
+
+    def _load_budgets(self) -> None:
+        if os.path.exists(self.budgets_file):
+            with open(self.budgets_file, 'r') as f:
+                self.budgets.update((data['category'], Budget.from_dict(data)) for data in json.load(f))
+
+    @instrumented('save_data')
+    @_serialized
     def save_data(self):
-        with open('data/transactions.json', 'w') as f:
-            json.dump([t.to_dict() for t in self.transactions], f, indent=4)
+        before = self._file_states() if INSTRUMENTATION.enabled else None
+        self._save_recurring()
+        self._save_budgets()
+        if self._journal:
+            self._journal.sync()
+            if self._journal.records >= self.compact_every:
+                self.compact()
+        elif self.storage == 'binary':
+            self._write_binary_snapshot()
+        elif self.storage in ('sqlite', 'partitioned'):
+            self._store.commit()
+        else:
+            with open(self.data_file, 'w') as f:
+                json.dump([t.to_dict() for t in self.transactions], f, indent=4)
+        if before is not None:
+            INSTRUMENTATION.count(bytes_written=self._bytes_written(before))
         print("Data saved successfully.")
 
+    def _ledger_files(self) -> List[str]:
+        """Every file the ledger is kept in."""
+        files = [self.data_file, self.recurring_file, self.budgets_file]
+        if self.storage == 'binary':
+            files += [self.cube_file, self.text_index_file]
+        elif self.storage == 'sqlite':
+            files.append(self.data_file + '-wal')
+        elif self.storage == 'partitioned':
+            files = self._store.files() + files[1:]
+        if self.journal_file:
+            files.append(self.journal_file)
+        return files
+
+    def _file_states(self) -> dict:
+        """{path: (size, modification time)} of the ledger files that exist."""
+        states = {}
+        for path in self._ledger_files():
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            states[path] = (stat.st_size, stat.st_mtime_ns)
+        return states
+
+    def _bytes_written(self, before: dict) -> int:
+        """Bytes written to the ledger files since `_file_states` returned `before`."""
+        written = 0
+        for path, state in self._file_states().items():
+            if state != before.get(path):
+                old_size = before.get(path, (0, 0))[0]
+                # The journal is appended to; every other file is rewritten.
+                written += state[0] - old_size if path == self.journal_file and state[0] >= old_size else state[0]
+        return written
+
+    def stats(self) -> dict:
+        """{operation: call count, latency percentiles and work counters} recorded so far.
+
+        Recording is off unless the tracker was created with instrument=True
+        or `instrumentation.INSTRUMENTATION.enable()` was called.
+        """
+        return INSTRUMENTATION.snapshot()
+
+    def _write_binary_snapshot(self, meta: dict = None) -> None:
+        write_snapshot(self._store, self.data_file, meta)
+        self._store.cube.save(self.cube_file, self.data_file)
+        self._store.text_index.save(self.text_index_file, self.data_file)
+
+    @property
+    def cube_file(self) -> str:
+        """Where the aggregate cube of a binary snapshot is persisted."""
+        return self.data_file + '.cube.json'
+
+    @property
+    def text_index_file(self) -> str:
+        """Where the description index of a binary snapshot is persisted."""
+        return self.data_file + '.text.npz'
+
+    @instrumented('compact')
+    @_serialized
+    def compact(self) -> None:
+        """Fold the journal into a fresh snapshot and empty the journal.
+
+        The snapshot records the sequence number of the last journal record
+        it holds, so if the journal cannot be emptied afterwards, reloading
+        skips the records already folded in.
+
+        Partitioned storage is saved instead and the partitions of past
+        periods are sealed: compacted to their live rows and made read-only.
+        """
+        if self.storage == 'partitioned':
+            sealed = self._store.seal()
+            self._save_recurring()
+            self._save_budgets()
+            if sealed:
+                print(f"Sealed partitions: {', '.join(sealed)}")
+            return
+        meta = {'journal_seq': self._journal.seq} if self._journal else {}
+        if self.storage == 'binary':
+            self._write_binary_snapshot(meta)
+        else:
+            records = list(self._store.to_dicts())
+            temp_file = self.data_file + '.tmp'
+            with open(temp_file, 'w') as f:
+                json.dump(dict(meta, transactions=records) if meta else records, f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_file, self.data_file)
+        self._save_recurring()
+        self._save_budgets()
+        if self._journal:
+            self._journal.truncate()
+
+    @instrumented('load_data')
+    @_serialized
     def load_data(self):
+        if INSTRUMENTATION.enabled:
+            INSTRUMENTATION.count(bytes_read=sum(size for size, _ in self._file_states().values()))
+        self._load_recurring()
+        if self.storage == 'sqlite':
+            print(f"Using transaction database {self.data_file}.")
+            return
+        if self.storage == 'partitioned':
+            print(f"Using partitioned ledger {self.data_file} ({len(self._store.partitions())} partitions).")
+            return
+        meta = {}
         try:
-            with open('data/transactions.json', 'r') as f:
-                data = json.load(f)
-                self.transactions = [Transaction.from_dict(t) for t in data]
+            if is_snapshot(self.data_file):
+                meta = load_snapshot(self._store, self.data_file)
+                self._store.cube.load(self.cube_file, self.data_file)
+                self._store.text_index.load(self.text_index_file, self.data_file)
+            else:
+                with open(self.data_file, 'r') as f:
+                    data = json.load(f)
+                if isinstance(data, dict):
+                    # Compacted from a journal: {'journal_seq': n, 'transactions': [...]}.
+                    meta, data = data, data['transactions']
+                self._store.replace(data)
             print("Data loaded successfully.")
         except FileNotFoundError:
             print("No existing data found. Starting with an empty transaction list.")
-            self.transactions = []
+            self._store.clear()
+        if self.journal_file:
+            self.close()
+            folded = last = meta.get('journal_seq', 0)
+            replayed = 0
+            for record in Journal.replay(self.journal_file):
+                seq = record.get('seq')
+                if seq is not None and seq <= folded:
+                    # Already in the snapshot: compaction stopped before emptying the journal.
+                    continue
+                self._apply(record)
+                replayed += 1
+                last = max(last, seq or 0)
+            self._journal = Journal(self.journal_file)
+            self._journal.records = replayed
+            self._journal.seq = last
+
+    def import_json(self, filename: str) -> None:
+        """Replace the transactions with those in a JSON export."""
+        with open(filename, 'r') as f:
+            self.transactions = json.load(f)
+        print(f"Data imported from {filename}")
+
+    def export_json(self, filename: str) -> None:
+        with open(filename, 'w') as f:
+            json.dump(list(self._store.to_dicts()), f, indent=4)
+        print(f"Data exported to {filename}")
 
+    @_serialized
+    def close(self) -> None:
+        """Flush and close the journal, if one is open."""
+        if self._journal:
+            self._journal.close()
+            self._journal = None
+        if self.storage == 'sqlite':
+            self._store.close()
+
+    @instrumented('edit_transaction')
     def edit_transaction(self, index):
         try:
             transaction = self.transactions[index]
             print(f"Editing transaction: {transaction}")
             
+            changes = {}
             amount = input(f"Enter new amount (current: {transaction.amount}): ")
             if amount:
-                transaction.amount = float(amount)
+                changes['amount'] = float(amount)
             
             category = input(f"Enter new category (current: {transaction.category}): ")
             if category:
-                transaction.category = category
+                changes['category'] = category
             
             description = input(f"Enter new description (current: {transaction.description}): ")
             if description:
-                transaction.description = description
+                changes['description'] = description
             
             transaction_type = input(f"Enter new type (income/expense) (current: {transaction.transaction_type}): ")
             if transaction_type:
                 if transaction_type not in ['income', 'expense']:
                     raise ValueError("Transaction type must be 'income' or 'expense'")
-                transaction.transaction_type = transaction_type
+                changes['transaction_type'] = transaction_type
             
             tags = input(f"Enter new tags (comma-separated) (current: {','.join(transaction.tags)}): ")
             if tags:
-                transaction.tags = tags.split(',')
+                changes['tags'] = tags.split(',')
             
+            if changes:
+                with self._store.lock:
+                    self._store.update(index, **changes)
+                    self._log({'op': 'edit', 'index': index, 'changes': changes})
             print("Transaction updated successfully.")
         except IndexError:
             print("Invalid transaction index.")
         except ValueError as e:
             print(f"Error updating transaction: {e}")
 
+    @instrumented('delete_transaction')
+    @_serialized
     def delete_transaction(self, index):
         try:
             deleted_transaction = self.transactions.pop(index)
+            self._log({'op': 'delete', 'index': index})
             print(f"Deleted transaction: {deleted_transaction}")
         except IndexError:
             print("Invalid transaction index.")
 
-    def export_to_csv(self, filename):
-        with open(filename, 'w', newline='') as csvfile:
-            writer = csv.writer(csvfile)
-            writer.writerow(['Date', 'Type', 'Amount', 'Category', 'Description', 'Tags'])
-            for t in self.transactions:
-                writer.writerow([t.date, t.transaction_type, t.amount, t.category, t.description, ','.join(t.tags)])
+    @instrumented('export_to_csv')
+    def export_to_csv(self, filename, start_date: Optional[str] = None, end_date: Optional[str] = None,
+                      category: Optional[str] = None, tags: Optional[List[str]] = None,
+                      compression: Optional[str] = None, workers: int = 0,
+                      progress=None, cancel=None, executor=None):
+        """
+        Export transactions to CSV, streaming them a chunk at a time.
+
+        :param filename: Target path; a '.gz' or '.zst' suffix compresses the output
+        :param start_date, end_date, category, tags: Only export matching transactions
+        :param compression: 'gzip' or 'zstd' (inferred from the suffix if None)
+        :param workers: Number of processes encoding chunks in parallel (0: none)
+        :param progress: Called with (rows written, total rows) after each chunk
+        :param cancel: threading.Event; setting it stops the export and removes its partial file
+        :param executor: Process pool to encode on instead, shared between exports
+        :return: Number of transactions exported, or None if the export was cancelled
+        """
+        try:
+            filename, count = export_csv(self._store, filename, start_date, end_date, category, tags,
+                                         compression=compression, workers=workers,
+                                         progress=progress, cancel=cancel, executor=executor)
+        except ExportCancelled:
+            print("Export cancelled.")
+            return None
+        INSTRUMENTATION.count(rows_returned=count, bytes_written=file_size(filename))
         print(f"Data exported to {filename}")
+        return count
 
+    @instrumented('export_columnar')
+    def export_columnar(self, filename, start_date: Optional[str] = None, end_date: Optional[str] = None,
+                        category: Optional[str] = None, tags: Optional[List[str]] = None, cancel=None):
+        """Export transactions as compressed columns (see exporter.export_columnar and export_to_csv)."""
+        try:
+            filename, count = export_columnar(self._store, filename, start_date, end_date, category, tags,
+                                              cancel=cancel)
+        except ExportCancelled:
+            print("Export cancelled.")
+            return None
+        INSTRUMENTATION.count(rows_returned=count, bytes_written=file_size(filename))
+        print(f"Data exported to {filename}")
+        return count
+
+    @instrumented('get_statistics')
     def get_statistics(self):
         if not self.transactions:
             return "No transactions to analyze."
 
-        total_income = sum(t.amount for t in self.transactions if t.transaction_type == 'income')
-        total_expense = sum(t.amount for t in self.transactions if t.transaction_type == 'expense')
+        # Both from the same version of the store.
+        (total_income, total_expense), by_category = self._store.read(
+            lambda: (self._store.totals(), self._store.category_totals()))
         net_savings = total_income - total_expense
 
-        category_totals = {}
-        for t in self.transactions:
-            if t.category not in category_totals:
-                category_totals[t.category] = 0
-            category_totals[t.category] += t.amount if t.transaction_type == 'income' else -t.amount
+        category_totals = {category: totals['income'] - totals['expense']
+                           for category, totals in by_category.items()}
 
         most_expensive_category = max(category_totals, key=category_totals.get)
         most_profitable_category = min(category_totals, key=category_totals.get)
@@ -224,6 +599,7 @@ class FinanceTracker:
         Most Expensive Category: {most_expensive_category} (${abs(category_totals[most_expensive_category]):.2f})
         Most Profitable Category: {most_profitable_category} (${abs(category_totals[most_profitable_category]):.2f})
         """
+    @instrumented('calculate_balance')
     def calculate_balance(self, start_date: Optional[str] = None, 
                           end_date: Optional[str] = None) -> float:
         """
@@ -233,155 +609,148 @@ class FinanceTracker:
         :param end_date: End date for balance calculation
         :return: Calculated balance
         """
-        relevant_transactions = self.transactions
-        if start_date:
-            relevant_transactions = [t for t in relevant_transactions if t.date >= start_date]
-        if end_date:
-            relevant_transactions = [t for t in relevant_transactions if t.date <= end_date]
-
-        balance = sum(t.amount if t.transaction_type == 'income' else -t.amount for t in relevant_transactions)
-        return balance
+        return self._store.balance(start_date, end_date)
+    @instrumented('generate_report')
     def generate_report(self):
-        data = [t.__dict__ for t in self.transactions]
+        data = [t.to_dict() for t in self.transactions]
         report_path = os.path.join("reports", f"report_{datetime.now().strftime('%Y%m%d%H%M%S')}.pdf")
         generate_report(data, report_path)
         
         return report_path
 
-    def generate_category_report(self) -> None:
-        """Generate and display a pie chart of expenses by category."""
-        category_totals = {}
-        for t in self.transactions:
-            if t.transaction_type == 'expense':
-                if t.category not in category_totals:
-                    category_totals[t.category] = 0
-                category_totals[t.category] += t.amount
-
-        labels = list(category_totals.keys())
-        values = list(category_totals.values())
-
-        fig = go.Figure(data=[go.Pie(labels=labels, values=values)])
-        fig.update_layout(title='Expenses by Category')
-        fig.show()
-
-    def generate_monthly_report(self) -> None:
-        """Generate and display a line chart of monthly expenses and income."""
-        monthly_data = {}
-        for t in self.transactions:
-            month = t.date[:7]  # YYYY-MM
-            if month not in monthly_data:
-                monthly_data[month] = {'income': 0, 'expense': 0}
-            if t.transaction_type == 'income':
-                monthly_data[month]['income'] += t.amount
-            else:
-                monthly_data[month]['expense'] += t.amount
-
-        months = sorted(monthly_data.keys())
-        income = [monthly_data[m]['income'] for m in months]
-        expenses = [monthly_data[m]['expense'] for m in months]
-
-        fig = make_subplots(specs=[[{"secondary_y": True}]])
-        fig.add_trace(go.Scatter(x=months, y=income, name="Income"), secondary_y=False)
-        fig.add_trace(go.Scatter(x=months, y=expenses, name="Expenses"), secondary_y=True)
-        fig.update_layout(title='Monthly Income and Expenses')
-        fig.update_xaxes(title_text="Month")
-        fig.update_yaxes(title_text="Amount", secondary_y=False)
-        fig.update_yaxes(title_text="Amount", secondary_y=True)
-        fig.show()
+    @instrumented('generate_category_report')
+    def generate_category_report(self, output: Optional[str] = None) -> Optional[str]:
+        """
+        Generate a pie chart of expenses by category.
+
+        :param output: File to write the chart to (.png, .svg or .html)
+                       instead of displaying it
+        """
+        return self._show(category_expense_chart(self._store.category_totals()), output)
+
+    @instrumented('generate_monthly_report')
+    def generate_monthly_report(self, output: Optional[str] = None) -> Optional[str]:
+        """Generate a line chart of monthly expenses and income (see generate_category_report)."""
+        return self._show(monthly_chart(self._store.monthly_totals()), output)
+
+    def _show(self, chart, output: Optional[str]) -> Optional[str]:
+        """Display a chart, or write it to `output` and return the path."""
+        if output:
+            path = render_chart(chart, output)
+            INSTRUMENTATION.count(bytes_written=file_size(path))
+            return path
+        plotly_figure(chart).show()
+        return None
+
+    @instrumented('generate_report_bundle')
+    def generate_report_bundle(self, output_dir: str, formats=FORMATS, start_date: Optional[str] = None,
+                               end_date: Optional[str] = None, workers: int = 0,
+                               executor=None, cancel=None) -> Optional[List[str]]:
+        """
+        Render every report chart to files, for unattended use.
+
+        :param output_dir: Directory to write the report files to
+        :param formats: Any of 'png', 'svg' and 'html'
+        :param start_date, end_date: Only report on this date range
+        :param workers: Number of processes rendering charts in parallel (0: none)
+        :param executor: Process pool to render on instead, shared between reports
+        :param cancel: threading.Event; setting it stops the report and removes its files
+        :return: Paths of the files written, or None if the report was cancelled
+        """
+        try:
+            paths = generate_report_bundle(self._store, output_dir, formats, start_date, end_date, workers,
+                                           executor=executor, cancel=cancel)
+        except ReportCancelled:
+            print("Report cancelled.")
+            return None
+        INSTRUMENTATION.count(bytes_written=sum(file_size(path) for path in paths))
+        print(f"Report written to {output_dir} ({len(paths)} files)")
+        return paths
     
+    @_serialized
     def clear_transactions(self):
-        self.transactions = []
+        self._store.clear()
+        self._log({'op': 'clear'})
         print("All transactions have been cleared.")
 
+    @_serialized
     def set_budget(self, category, amount, period='monthly'):
-        self.budgets[category] = Budget(category, amount, period)
+        try:
+            self.budgets[category] = Budget(category, amount, period)
+        except ValueError as e:
+            print(f"Error setting budget: {e}")
+            return
+        self._budget_engine.invalidate()
+        self._budget_engine.spending()
         print(f"Budget set for {category}: ${amount} {period}")
 
+    def _budget_alert(self, budget, spent, level):
+        if level == 'exceeded':
+            print(f"Budget exceeded for {budget.category}! Spent ${spent:.2f}, Budget: ${budget.amount:.2f}")
+        else:
+            print(f"Warning: You've spent {spent:.2f} on {budget.category}. Budget limit: {budget.amount}")
+
+    @instrumented('budget_status')
+    def budget_status(self) -> dict:
+        """{category: {'period', 'amount', 'spent', 'remaining', 'exceeded'}} for each budget."""
+        spending = self._store.read(self._budget_engine.spending)
+        status = {}
+        for category, budget in list(self.budgets.items()):
+            spent = spending.get(category, 0)
+            status[category] = {'period': budget.period, 'amount': budget.amount, 'spent': spent,
+                                'remaining': budget.remaining(spent), 'exceeded': budget.is_exceeded(spent)}
+        return status
+
+    @instrumented('check_budget_status')
     def check_budget_status(self):
-        current_month = datetime.now().strftime("%Y-%m")
-        for category, budget in self.budgets.items():
-            spent = sum(t.amount for t in self.transactions 
-                        if t.category == category and 
-                        t.transaction_type == 'expense' and 
-                        t.date.startswith(current_month))
-            if budget.is_exceeded(spent):
-                print(f"Budget exceeded for {category}! Spent ${spent:.2f}, Budget: ${budget.amount:.2f}")
+        for category, status in self.budget_status().items():
+            if status['exceeded']:
+                print(f"Budget exceeded for {category}! Spent ${status['spent']:.2f}, Budget: ${status['amount']:.2f}")
             else:
-                remaining = budget.remaining(spent)
-                print(f"Budget for {category}: ${spent:.2f} spent, ${remaining:.2f} remaining")
+                print(f"Budget for {category}: ${status['spent']:.2f} spent, ${status['remaining']:.2f} remaining")
     
-    def generate_trend_analysis(self):
-        dates = [t.date for t in self.transactions]
-        amounts = [t.amount if t.transaction_type == 'income' else -t.amount for t in self.transactions]
-        
-        cumulative_sum = [sum(amounts[:i+1]) for i in range(len(amounts))]
-        
-        fig = go.Figure()
-        fig.add_trace(go.Scatter(x=dates, y=cumulative_sum, mode='lines', name='Balance Trend'))
-        fig.update_layout(title='Balance Trend Over Time', xaxis_title='Date', yaxis_title='Balance')
-        fig.show()
-
-    def generate_category_comparison(self, start_date, end_date):
-        filtered_transactions = [t for t in self.transactions if start_date <= t.date <= end_date]
-        
-        category_totals = {}
-        for t in filtered_transactions:
-            if t.category not in category_totals:
-                category_totals[t.category] = {'income': 0, 'expense': 0}
-            category_totals[t.category][t.transaction_type] += t.amount
-        
-        categories = list(category_totals.keys())
-        income = [category_totals[cat]['income'] for cat in categories]
-        expenses = [category_totals[cat]['expense'] for cat in categories]
-        
-        fig = go.Figure(data=[
-            go.Bar(name='Income', x=categories, y=income),
-            go.Bar(name='Expenses', x=categories, y=expenses)
-        ])
-        fig.update_layout(title='Category Comparison', barmode='group')
-        fig.show()
-
-    def advanced_search(self, start_date=None, end_date=None, category=None, tags=None, min_amount=None, max_amount=None):
-        results = set(self.transactions)
-
-        if start_date:
-            start_idx = bisect_left(self.date_index, (start_date, None))
-            results &= set(t for _, t in self.date_index[start_idx:])
-
-        if end_date:
-            end_idx = bisect_right(self.date_index, (end_date, None))
-            results &= set(t for _, t in self.date_index[:end_idx])
-
-        if category:
-            results &= set(self.category_index[category])
-
-        if min_amount is not None:
-            min_idx = bisect_left(self.amount_index, (min_amount, None))
-            results &= set(t for _, t in self.amount_index[min_idx:])
+    @instrumented('generate_trend_analysis')
+    def generate_trend_analysis(self, max_points: int = DEFAULT_PLOT_POINTS, output: Optional[str] = None):
+        """
+        Plot the running balance in date order.
 
-        if max_amount is not None:
-            max_idx = bisect_right(self.amount_index, (max_amount, None))
-            results &= set(t for _, t in self.amount_index[:max_idx])
+        :param max_points: Maximum number of points to hand to plotly
+        :param output: File to write the chart to instead of displaying it
+        """
+        dates, balances = running_balance(self._store, max_points=max_points)
+        return self._show(balance_chart(dates, balances)._replace(title='Balance Trend Over Time'), output)
 
-        if tags:
-            results = [t for t in results if any(tag.lower() in t.tags for tag in tags)]
+    @instrumented('generate_category_comparison')
+    def generate_category_comparison(self, start_date, end_date, output: Optional[str] = None):
+        return self._show(category_comparison_chart(self._store.category_totals(start_date, end_date)), output)
 
-        return list(results)
+    def advanced_search(self, start_date=None, end_date=None, category=None, tags=None, min_amount=None, max_amount=None,
+                        text=None):
+        """
+        Search transactions using the date, amount, category, tag and description indexes.
+
+        :param start_date: Earliest date to include
+        :param end_date: Latest date to include
+        :param category: Category to match (case-insensitive)
+        :param tags: Tags of which at least one must be present, or a tag
+                     expression such as 'travel AND (work OR client) AND NOT refund'
+        :param min_amount: Minimum amount to include
+        :param max_amount: Maximum amount to include
+        :param text: Words that must appear in the description, each matching
+                     a whole word or its beginning ('amaz refund')
+        :return: Lazy result of the matching transactions (see `QueryResult`),
+                 in date order or best description match first when text is
+                 given; use its `page` method to read it a page at a time
+        """
+        return self._store.query(start_date, end_date, category, tags, min_amount, max_amount, text)
 
     def check_notifications(self):
         today = datetime.now().date()
-        upcoming_transactions = [t for t, freq in self.recurring_transactions 
-                                 if (freq == 'daily' or 
-                                     (freq == 'weekly' and (today + timedelta(days=7)).weekday() == 0) or
-                                     (freq == 'monthly' and (today + timedelta(days=7)).day == 1))]
-        
-        for transaction in upcoming_transactions:
-            print(f"Upcoming transaction: {transaction} due in the next 7 days")
-
-        for category, budget in self.budgets.items():
-            spent = sum(t.amount for t in self.transactions 
-                        if t.category == category and 
-                        t.transaction_type == 'expense' and 
-                        t.date.startswith(today.strftime("%Y-%m")))
-            if spent > budget.amount * 0.9:  # 90% of budget
+        for due, transaction in self.recurring.upcoming(today + timedelta(days=7)):
+            print(f"Upcoming transaction: {transaction} due on {due}")
+
+        spending = self._store.read(self._budget_engine.spending)
+        for category, budget in list(self.budgets.items()):
+            spent = spending.get(category, 0)
+            if spent > budget.amount * WARNING_RATIO:
                 print(f"Warning: You've spent {spent:.2f} on {category}. Budget limit: {budget.amount}")
\ No newline at end of file
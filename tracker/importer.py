@@ -0,0 +1,190 @@
+from typing import IO, Callable, Dict, Iterable, Iterator, List, Tuple, Union
+from contextlib import contextmanager, nullcontext
+from datetime import date
+from itertools import compress
+import csv
+import gc
+import json
+import numpy as np
+from .store import TYPE_CODES
+
+FIELDS = ('amount', 'category', 'description', 'date', 'transaction_type', 'tags')
+
+# Column headers written by FinanceTracker.export_to_csv.
+CSV_FIELDS = {
+    'Date': 'date',
+    'Type': 'transaction_type',
+    'Amount': 'amount',
+    'Category': 'category',
+    'Description': 'description',
+    'Tags': 'tags',
+}
+
+_MISSING = object()
+
+
+def _open(source, newline=None):
+    """Open a path for reading; an already open file (e.g. sys.stdin) is used as is."""
+    if hasattr(source, 'read'):
+        return nullcontext(source)
+    return open(source, 'r', newline=newline)
+
+
+@contextmanager
+def gc_paused():
+    """Pause the cyclic garbage collector while building many small objects.
+
+    A bulk import allocates millions of strings and lists, none of them in
+    reference cycles, and the collector's repeated full scans of them would
+    otherwise cost more than the parsing itself.
+    """
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+class ImportErrorDetail:
+    """Why one input row was rejected."""
+
+    def __init__(self, row: int, message: str):
+        self.row = row
+        self.message = message
+
+    def __repr__(self) -> str:
+        return f"ImportErrorDetail(row={self.row}, message={self.message!r})"
+
+    def __str__(self) -> str:
+        return f"row {self.row}: {self.message}"
+
+
+def read_csv_columns(filename: Union[str, IO], batch_size: int = 50000) -> Iterator[Dict[str, list]]:
+    """Yield batches of columns from a CSV file (path or open file) in the export_to_csv layout."""
+    with _open(filename, newline='') as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if header is None:
+            return
+        fields = [CSV_FIELDS.get(name.strip(), name.strip()) for name in header]
+        while True:
+            rows = [row for _, row in zip(range(batch_size), reader)]
+            if not rows:
+                return
+            width = len(fields)
+            if any(len(row) != width for row in rows):
+                rows = [row[:width] + [_MISSING] * (width - len(row)) for row in rows]
+            columns = dict(zip(fields, map(list, zip(*rows))))
+            yield {field: columns.get(field, [_MISSING] * len(rows)) for field in FIELDS}
+
+
+def read_jsonl(filename: Union[str, IO]) -> Iterator[dict]:
+    """Yield records from a JSON Lines file (path or open file), one transaction dict per line."""
+    with _open(filename) as f:
+        for line in f:
+            if line.strip():
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError as e:
+                    yield {'__error__': f"invalid JSON: {e}"}
+
+
+def records_to_columns(records: Iterable) -> Dict[str, list]:
+    """Turn transaction dicts (or Transaction objects) into columns."""
+    records = [record if isinstance(record, dict) else record.to_dict() for record in records]
+    columns = {field: [record.get(field, _MISSING) for record in records] for field in FIELDS}
+    columns['__error__'] = [record.get('__error__') for record in records]
+    return columns
+
+
+def _map_column(values: list, field: str, normalize: Callable, problems: Dict[int, str]) -> list:
+    """Normalize a column, caching by value since most columns repeat heavily."""
+    cache = {}
+    result = []
+    for index, value in enumerate(values):
+        try:
+            normalized = cache[value]
+        except (KeyError, TypeError):
+            try:
+                if value is _MISSING:
+                    raise ValueError(f"missing field '{field}'")
+                normalized = normalize(value)
+            except (TypeError, ValueError) as e:
+                problems.setdefault(index, str(e))
+                normalized = None
+            else:
+                try:
+                    cache[value] = normalized
+                except TypeError:
+                    pass
+        result.append(normalized)
+    return result
+
+
+def _normalize_type(value) -> str:
+    value = str(value).strip().lower()
+    if value not in TYPE_CODES:
+        raise ValueError("Transaction type must be 'income' or 'expense'")
+    return value
+
+
+def _normalize_category(value) -> str:
+    value = str(value).strip()
+    if not value:
+        raise ValueError("category is empty")
+    return value
+
+
+def _normalize_tags(value) -> List[str]:
+    if value is _MISSING or not value:
+        return []
+    if isinstance(value, str):
+        value = value.split(',')
+    return [tag.strip() for tag in value if tag.strip()]
+
+
+def validate_columns(columns: Dict[str, list], first_row: int = 1) -> Tuple[Dict[str, list], List[ImportErrorDetail]]:
+    """Validate and normalize a batch of columns.
+
+    Each column is checked as a whole, with per-value work cached. Rows with a
+    problem are reported as `ImportErrorDetail` (numbered from `first_row`)
+    and dropped; a bad row never aborts the batch.
+    """
+    problems: Dict[int, str] = {}
+    for index, error in enumerate(columns.get('__error__') or ()):
+        if error:
+            problems[index] = error
+
+    raw_amounts = columns['amount']
+    try:
+        amounts = np.array(raw_amounts, dtype=np.float64)
+    except (TypeError, ValueError):
+        amounts = np.array(_map_column(raw_amounts, 'amount', float, problems), dtype=np.float64)
+    for index in np.flatnonzero(~np.isfinite(amounts)).tolist():
+        problems.setdefault(index, f"invalid amount {raw_amounts[index]!r}")
+
+    today = date.today().isoformat()
+    dates = [today if value is _MISSING or not value else value for value in columns['date']]
+    dates = _map_column(dates, 'date', lambda value: date.fromisoformat(str(value).strip()).isoformat(), problems)
+    types = _map_column(columns['transaction_type'], 'transaction_type', _normalize_type, problems)
+    categories = _map_column(columns['category'], 'category', _normalize_category, problems)
+    descriptions = ['' if value is _MISSING or value is None else str(value) for value in columns['description']]
+    tags = [_normalize_tags(value) for value in columns['tags']]
+
+    normalized = {
+        'amount': amounts,
+        'date': dates,
+        'transaction_type': types,
+        'category': categories,
+        'description': descriptions,
+        'tags': tags,
+    }
+    errors = [ImportErrorDetail(first_row + index, message) for index, message in sorted(problems.items())]
+    if problems:
+        keep = np.ones(len(amounts), dtype=bool)
+        keep[list(problems)] = False
+        normalized = {field: (values[keep] if field == 'amount' else list(compress(values, keep)))
+                      for field, values in normalized.items()}
+    return normalized, errors
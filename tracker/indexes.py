@@ -0,0 +1,449 @@
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+from array import array
+from bisect import bisect_left, bisect_right, insort
+import numpy as np
+from .instrumentation import INSTRUMENTATION
+
+_MIN_MERGE = 1024
+
+
+def postings_array(postings) -> np.ndarray:
+    """A posting list, array('q') or read-only int64 array, as an int64 array.
+
+    An array('q') is copied in one step rather than viewed with
+    np.frombuffer: while a view of it exists, the writer cannot append to it.
+    """
+    if isinstance(postings, array):
+        return np.frombuffer(bytearray(postings), dtype=np.int64)
+    return postings
+
+
+class SortedIndex:
+    """Sorted (key, row) index over one numeric column of a store.
+
+    The bulk of the entries live in two parallel sorted numpy arrays. New
+    rows go into a small sorted buffer that is merged into the arrays once it
+    grows past roughly the square root of the index size, so inserts stay
+    cheap while range lookups remain two binary searches.
+    """
+
+    def __init__(self, column: str):
+        self.column = column
+        self._keys = np.empty(0)
+        self._rows = np.empty(0, dtype=np.int64)
+        self._pending: List[tuple] = []
+
+    def build(self, keys: np.ndarray, rows: np.ndarray) -> None:
+        order = np.argsort(keys, kind='stable')
+        self._keys = keys[order]
+        self._rows = rows[order]
+        self._pending = []
+
+    def insert(self, keys: np.ndarray, rows: np.ndarray) -> None:
+        for key, row in zip(keys.tolist(), rows.tolist()):
+            insort(self._pending, (key, row))
+        if len(self._pending) > max(_MIN_MERGE, int(len(self._keys) ** 0.5)):
+            self._merge()
+
+    def _merge(self) -> None:
+        keys = np.array([key for key, _ in self._pending], dtype=self._keys.dtype)
+        rows = np.array([row for _, row in self._pending], dtype=np.int64)
+        positions = np.searchsorted(self._keys, keys, side='right')
+        self._keys = np.insert(self._keys, positions, keys)
+        self._rows = np.insert(self._rows, positions, rows)
+        self._pending = []
+
+    def _bounds(self, low, high):
+        start = 0 if low is None else int(np.searchsorted(self._keys, low, side='left'))
+        stop = len(self._keys) if high is None else int(np.searchsorted(self._keys, high, side='right'))
+        pending_start = 0 if low is None else bisect_left(self._pending, (low,))
+        pending_stop = len(self._pending) if high is None else bisect_right(self._pending, (high, float('inf')))
+        return start, stop, pending_start, pending_stop
+
+    def count(self, low=None, high=None) -> int:
+        """Number of entries (live or retired) with low <= key <= high."""
+        start, stop, pending_start, pending_stop = self._bounds(low, high)
+        return max(stop - start, 0) + max(pending_stop - pending_start, 0)
+
+    def ordered(self, low=None, high=None) -> np.ndarray:
+        """Row ids with low <= key <= high in key order, then row order.
+
+        Folds the pending buffer in first, so the result is a view of the
+        sorted array rather than a copy.
+        """
+        if self._pending:
+            self._merge()
+        start, stop, _, _ = self._bounds(low, high)
+        return self._rows[start:stop]
+
+    def range(self, low=None, high=None) -> np.ndarray:
+        """Row ids with low <= key <= high (buffered entries last, unordered)."""
+        start, stop, pending_start, pending_stop = self._bounds(low, high)
+        rows = self._rows[start:stop]
+        if pending_stop > pending_start:
+            extra = np.array([row for _, row in self._pending[pending_start:pending_stop]], dtype=np.int64)
+            rows = np.concatenate([rows, extra])
+        return rows
+
+
+class PostingIndex:
+    """Maps an integer code (such as a category) to the rows carrying it."""
+
+    def __init__(self, column: str):
+        self.column = column
+        self._postings: Dict[int, array] = {}
+
+    def build(self, codes: np.ndarray, rows: np.ndarray) -> None:
+        self._postings = {}
+        if not len(rows):
+            return
+        order = np.argsort(codes, kind='stable')
+        sorted_codes = codes[order]
+        boundaries = np.flatnonzero(np.diff(sorted_codes)) + 1
+        for group in np.split(order, boundaries):
+            self._postings[int(codes[group[0]])] = array('q', rows[group].tobytes())
+
+    def insert(self, codes: np.ndarray, rows: np.ndarray) -> None:
+        for code, row in zip(codes.tolist(), rows.tolist()):
+            self._postings.setdefault(code, array('q')).append(row)
+
+    def count(self, codes) -> int:
+        return sum(len(self._postings.get(code, ())) for code in codes)
+
+    def rows(self, codes) -> np.ndarray:
+        parts = [postings_array(self._postings[code]) for code in codes if code in self._postings]
+        if not parts:
+            return np.empty(0, dtype=np.int64)
+        return parts[0] if len(parts) == 1 else np.concatenate(parts)
+
+
+class TagIndex:
+    """Inverted index from tag code to the ascending row ids carrying it.
+
+    Row ids only grow, so appending keeps every posting list sorted, and
+    AND/OR/NOT queries become intersections, unions and differences of
+    sorted arrays. A NOT is carried as a flag rather than materialized as a
+    complement until it has to be.
+    """
+
+    def __init__(self):
+        self._postings: Dict[int, array] = {}
+
+    def build(self, store, rows: np.ndarray) -> None:
+        self._postings = {}
+        counts = store._tag_count[rows]
+        if not counts.any():
+            return
+        owners = np.repeat(rows, counts)
+        offsets = np.arange(len(owners)) - np.repeat(np.cumsum(counts) - counts, counts)
+        codes = store._tag_pool[np.repeat(store._tag_start[rows], counts) + offsets]
+        self.insert_pairs(codes, owners)
+
+    def insert_pairs(self, codes: np.ndarray, rows: np.ndarray) -> None:
+        order = np.argsort(codes, kind='stable')
+        sorted_codes = codes[order]
+        boundaries = np.flatnonzero(np.diff(sorted_codes)) + 1
+        for group in np.split(order, boundaries):
+            code = int(codes[group[0]])
+            self._postings.setdefault(code, array('q')).extend(array('q', rows[group].tobytes()))
+
+    def insert(self, store, rows: np.ndarray) -> None:
+        for row in rows.tolist():
+            for code in store.tag_codes(row).tolist():
+                self._postings.setdefault(code, array('q')).append(row)
+
+    def postings(self, codes: List[int]) -> np.ndarray:
+        parts = [postings_array(self._postings[code]) for code in codes if code in self._postings]
+        if not parts:
+            return np.empty(0, dtype=np.int64)
+        return parts[0] if len(parts) == 1 else np.unique(np.concatenate(parts))
+
+    def evaluate(self, query: tuple, lookup: Callable[[str], List[int]], size: int) -> Tuple[np.ndarray, bool]:
+        """Evaluate a parsed tag query to (rows, negated) over row ids below `size`.
+
+        If `negated` is true the result is every row *except* `rows`.
+        Retired rows may still appear and must be filtered by the caller.
+        """
+        op = query[0]
+        if op == 'tag':
+            return self.postings(lookup(query[1])), False
+        if op == 'not':
+            rows, negated = self.evaluate(query[1], lookup, size)
+            return rows, not negated
+        left, left_negated = self.evaluate(query[1], lookup, size)
+        right, right_negated = self.evaluate(query[2], lookup, size)
+        if op == 'and':
+            if not left_negated and not right_negated:
+                return _intersect(left, right, size), False
+            if left_negated and right_negated:
+                return _union(left, right, size), True
+            positive, negative = (right, left) if left_negated else (left, right)
+            return _difference(positive, negative, size), False
+        # op == 'or'
+        if not left_negated and not right_negated:
+            return _union(left, right, size), False
+        if left_negated and right_negated:
+            return _intersect(left, right, size), True
+        positive, negative = (right, left) if left_negated else (left, right)
+        return _difference(negative, positive, size), True
+
+
+# Sorted-array set operations. Small inputs are merged with numpy's sorted
+# set routines; large ones go through a bitmap over all row ids, which is
+# linear rather than a sort of the concatenated inputs.
+
+def _dense(a: np.ndarray, b: np.ndarray, size: int) -> bool:
+    return len(a) + len(b) > size // 64
+
+
+def _bitmap(rows: np.ndarray, size: int) -> np.ndarray:
+    bitmap = np.zeros(size, dtype=bool)
+    bitmap[rows] = True
+    return bitmap
+
+
+def _intersect(a: np.ndarray, b: np.ndarray, size: int) -> np.ndarray:
+    if _dense(a, b, size):
+        small, large = (a, b) if len(a) <= len(b) else (b, a)
+        return small[_bitmap(large, size)[small]]
+    return np.intersect1d(a, b, assume_unique=True)
+
+
+def _union(a: np.ndarray, b: np.ndarray, size: int) -> np.ndarray:
+    if _dense(a, b, size):
+        bitmap = _bitmap(a, size)
+        bitmap[b] = True
+        return np.flatnonzero(bitmap)
+    return np.union1d(a, b)
+
+
+def _difference(a: np.ndarray, b: np.ndarray, size: int) -> np.ndarray:
+    if _dense(a, b, size):
+        return a[~_bitmap(b, size)[a]]
+    return np.setdiff1d(a, b, assume_unique=True)
+
+
+class SearchIndexes:
+    """Date, amount, category and tag indexes for a `TransactionStore`.
+
+    The indexes subscribe to the store. They are built once, on the first
+    search after the store is (re)loaded, and kept current as rows are added
+    from then on. Retired rows are left in place and filtered out at query
+    time.
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self.date_index = SortedIndex('_day')
+        self.amount_index = SortedIndex('_cents')
+        self.category_index = PostingIndex('_category')
+        self._indexes = (self.date_index, self.amount_index, self.category_index)
+        self.tag_index = TagIndex()
+        self._built = False
+        self._retired = 0
+        store.subscribe(self)
+
+    def reset(self) -> None:
+        self._built = False
+
+    def build(self) -> None:
+        store = self.store
+        rows = np.flatnonzero(store._live[:store._rows]).astype(np.int64)
+        for index in self._indexes:
+            index.build(getattr(store, index.column)[rows], rows)
+        self.tag_index.build(store, rows)
+        self._built = True
+        self._retired = 0
+
+    def rows_added(self, rows: np.ndarray) -> None:
+        if not self._built:
+            return
+        if len(rows) > _MIN_MERGE:
+            self.reset()
+            return
+        for index in self._indexes:
+            index.insert(getattr(self.store, index.column)[rows], rows)
+        self.tag_index.insert(self.store, rows)
+
+    def rows_retired(self, rows: np.ndarray) -> None:
+        # Retired rows stay in the indexes until they outnumber the live
+        # ones; then the next search rebuilds without them.
+        self._retired += len(rows)
+        if self._built and self._retired > max(_MIN_MERGE, len(self.store)):
+            self.reset()
+
+    def ensure_built(self) -> None:
+        if not self._built:
+            # Readers may get here together; the writer lock makes one build.
+            with self.store.lock:
+                if not self._built:
+                    self.build()
+
+    def plan(self, start_day: Optional[int] = None, end_day: Optional[int] = None,
+             category_codes: Optional[List[int]] = None,
+             min_cents: Optional[int] = None, max_cents: Optional[int] = None,
+             tag_query: Optional[tuple] = None,
+             candidates: Optional[np.ndarray] = None) -> 'SearchPlan':
+        self.ensure_built()
+        return SearchPlan(self, start_day, end_day, category_codes, min_cents, max_cents, tag_query, candidates)
+
+    def search(self, *args, **kwargs) -> np.ndarray:
+        """Return the live rows matching every given predicate (see `plan`), ascending."""
+        return self.plan(*args, **kwargs).rows()
+
+    def ordered_dates(self, low: Optional[int], high: Optional[int]) -> np.ndarray:
+        """Row ids with low <= day <= high in (day, row) order (see `SortedIndex.ordered`)."""
+        if self.date_index._pending:
+            # Merging the pending buffer writes to the index.
+            with self.store.lock:
+                return self.date_index.ordered(low, high)
+        return self.date_index.ordered(low, high)
+
+
+class SearchPlan:
+    """The predicates of one search, and how to fetch the rows matching them.
+
+    `tag_query` is a parsed tag expression (see `tag_query.parse_tag_query`)
+    and `candidates` the sorted rows found by another index, such as the
+    full-text index, that every result must be among.
+
+    The planner estimates the size of each indexed predicate, fetches
+    candidates from the most selective one and checks the remaining
+    predicates against the columns of those candidates only. Results can
+    also be streamed in date order straight off the date index, which is
+    cheaper when only the first few of many matches are wanted.
+
+    A plan is made inside a `TransactionStore.read` and sees the version of
+    the store at that moment, however long its results are streamed.
+    """
+
+    # Up to this many candidates, date-ordered results are fetched and
+    # sorted in one go rather than streamed from the date index.
+    SORT_LIMIT = 65536
+
+    def __init__(self, indexes: SearchIndexes, start_day, end_day, category_codes,
+                 min_cents, max_cents, tag_query, candidates):
+        store = indexes.store
+        self.indexes = indexes
+        self.store = store
+        self.start_day, self.end_day = start_day, end_day
+        self.category_codes = category_codes
+        self.min_cents, self.max_cents = min_cents, max_cents
+        self.version, self.limit = store.version, store._rows
+
+        plans = []
+        if start_day is not None or end_day is not None:
+            plans.append((indexes.date_index.count(start_day, end_day),
+                          lambda: indexes.date_index.range(start_day, end_day)))
+        if min_cents is not None or max_cents is not None:
+            plans.append((indexes.amount_index.count(min_cents, max_cents),
+                          lambda: indexes.amount_index.range(min_cents, max_cents)))
+        if category_codes is not None:
+            plans.append((indexes.category_index.count(category_codes),
+                          lambda: indexes.category_index.rows(category_codes)))
+        # Row sets already resolved by other indexes; results must be in each.
+        self.row_sets = []
+        if tag_query is not None:
+            tag_rows, negated = indexes.tag_index.evaluate(
+                tag_query, lambda tag: store.tags.lookup(tag, ignore_case=True), store._rows)
+            if negated:
+                mask = store._live[:store._rows].copy()
+                mask[tag_rows] = False
+                tag_rows = np.flatnonzero(mask)
+            self.row_sets.append(tag_rows)
+        if candidates is not None:
+            self.row_sets.append(candidates)
+        for row_set in self.row_sets:
+            plans.append((len(row_set), lambda row_set=row_set: row_set))
+        self.best = min(plans, key=lambda plan: plan[0]) if plans else None
+
+    @property
+    def estimate(self) -> int:
+        """Upper bound on the number of matches."""
+        return self.best[0] if self.best else len(self.store)
+
+    def candidates(self) -> np.ndarray:
+        if self.best:
+            return self.best[1]()
+        return np.arange(self.limit, dtype=np.int64)
+
+    def filter(self, rows: np.ndarray, members: Optional[np.ndarray] = None) -> np.ndarray:
+        """The rows that satisfy every predicate, in their given order.
+
+        :param members: Mask of the rows in every row set, to check many
+                        small batches of rows against large row sets cheaply
+        """
+        store = self.store
+        INSTRUMENTATION.count(rows_scanned=len(rows))
+        keep = store.visible(rows, self.version, self.limit)
+        days = store._day[rows]
+        cents = store._cents[rows]
+        if self.start_day is not None:
+            keep &= days >= self.start_day
+        if self.end_day is not None:
+            keep &= days <= self.end_day
+        if self.min_cents is not None:
+            keep &= cents >= self.min_cents
+        if self.max_cents is not None:
+            keep &= cents <= self.max_cents
+        if self.category_codes is not None:
+            keep &= np.isin(store._category[rows], self.category_codes)
+        if members is not None:
+            keep &= members[rows]
+        else:
+            for row_set in self.row_sets:
+                if row_set is not rows:
+                    keep &= np.isin(rows, row_set)
+        return rows[keep]
+
+    def matching(self) -> np.ndarray:
+        """Matching rows, in no particular order."""
+        return self.filter(self.candidates())
+
+    def rows(self) -> np.ndarray:
+        """Matching rows in ascending row order."""
+        return np.sort(self.store.read(self.matching))
+
+    def by_date(self, after: Optional[Tuple[int, int]] = None, chunk_size: int = 256) -> Iterator[np.ndarray]:
+        """Yield the matching rows in (date, row) order, a chunk at a time.
+
+        :param after: (day, row) of the last row already seen; resume after it
+        """
+        store = self.store
+        if self.estimate <= self.SORT_LIMIT:
+            rows = store.read(self.matching)
+            if after is not None:
+                rows = rows[_after(store._day[rows], rows, after)]
+            rows = rows[np.lexsort((rows, store._day[rows]))]
+            for start in range(0, len(rows), chunk_size):
+                yield rows[start:start + chunk_size]
+            return
+
+        # Walk the date index from the start (or the cursor) and filter as
+        # we go, doubling the chunk size so sparse matches are found quickly.
+        low = self.start_day if after is None else max(after[0], self.start_day or after[0])
+        ordered = store.read(self.indexes.ordered_dates, low, self.end_day)
+        members = None
+        if self.row_sets:
+            members = np.ones(self.limit, dtype=bool)
+            for row_set in self.row_sets:
+                in_set = np.zeros(self.limit, dtype=bool)
+                in_set[row_set] = True
+                members &= in_set
+        start = 0
+        while start < len(ordered):
+            chunk = ordered[start:start + chunk_size]
+            start += len(chunk)
+            chunk = chunk[chunk < self.limit]
+            if after is not None:
+                chunk = chunk[_after(store._day[chunk], chunk, after)]
+            chunk = self.filter(chunk, members)
+            if len(chunk):
+                yield chunk
+            chunk_size = min(chunk_size * 2, 1 << 16)
+
+
+def _after(days: np.ndarray, rows: np.ndarray, cursor: Tuple[int, int]) -> np.ndarray:
+    """Mask of the (day, row) pairs that sort after `cursor`."""
+    day, row = cursor
+    return (days > day) | ((days == day) & (rows > row))
@@ -0,0 +1,297 @@
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+from collections import Counter
+from contextlib import contextmanager
+import functools
+import json
+import os
+import sys
+import threading
+import time
+
+# Latency histogram buckets: bucket i counts calls taking under 2**i
+# microseconds (the last bucket takes everything slower).
+BUCKETS = 32
+COUNTERS = ('rows_scanned', 'rows_returned', 'bytes_read', 'bytes_written')
+
+
+class OperationStats:
+    """Call count, latency histogram and work counters of one operation."""
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+        self.histogram = [0] * BUCKETS
+        self.counters = dict.fromkeys(COUNTERS, 0)
+
+    def add(self, seconds: float, counters: Dict[str, int], failed: bool = False) -> None:
+        self.calls += 1
+        self.errors += failed
+        self.total_seconds += seconds
+        self.max_seconds = max(self.max_seconds, seconds)
+        self.histogram[min(int(seconds * 1e6).bit_length(), BUCKETS - 1)] += 1
+        for name, value in counters.items():
+            self.counters[name] += value
+
+    def merge(self, other: 'OperationStats') -> None:
+        self.calls += other.calls
+        self.errors += other.errors
+        self.total_seconds += other.total_seconds
+        self.max_seconds = max(self.max_seconds, other.max_seconds)
+        self.histogram = [a + b for a, b in zip(self.histogram, other.histogram)]
+        for name, value in other.counters.items():
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def percentile(self, fraction: float) -> float:
+        """Upper bound, in seconds, of the latency of `fraction` of the calls."""
+        wanted = fraction * self.calls
+        seen = 0
+        for bucket, count in enumerate(self.histogram):
+            seen += count
+            if count and seen >= wanted:
+                return min(2 ** bucket / 1e6, self.max_seconds)
+        return self.max_seconds
+
+    def summary(self) -> dict:
+        """Flat, human-readable figures (as shown by the CLI `stats` command)."""
+        return {'calls': self.calls, 'errors': self.errors, 'total_s': round(self.total_seconds, 6),
+                'mean_ms': round(self.total_seconds / self.calls * 1e3, 3) if self.calls else 0.0,
+                'p50_ms': round(self.percentile(0.5) * 1e3, 3), 'p90_ms': round(self.percentile(0.9) * 1e3, 3),
+                'p99_ms': round(self.percentile(0.99) * 1e3, 3), 'max_ms': round(self.max_seconds * 1e3, 3),
+                **self.counters}
+
+    def to_dict(self) -> dict:
+        return {'calls': self.calls, 'errors': self.errors, 'total_seconds': self.total_seconds,
+                'max_seconds': self.max_seconds, 'histogram': self.histogram, 'counters': self.counters}
+
+    @staticmethod
+    def from_dict(data: dict) -> 'OperationStats':
+        stats = OperationStats()
+        stats.calls, stats.errors = data['calls'], data.get('errors', 0)
+        stats.total_seconds, stats.max_seconds = data['total_seconds'], data['max_seconds']
+        stats.histogram = list(data['histogram']) + [0] * (BUCKETS - len(data['histogram']))
+        stats.counters.update(data['counters'])
+        return stats
+
+
+class Instrumentation:
+    """Opt-in timing and work counters for the tracker's public operations.
+
+    Disabled, an instrumented call costs one attribute check. Enabled, each
+    call of an `instrumented` method is timed into its operation's latency
+    histogram, and the rows scanned and returned and bytes read and
+    written that lower layers report with `count` while it runs are added
+    to it (and to any operation it was called from).
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.stats: Dict[str, OperationStats] = {}
+        self._lock = threading.Lock()
+        # Per thread, the operations in progress, innermost last.
+        self._active: Dict[int, List[list]] = {}
+
+    def enable(self) -> None:
+        self.enabled = True
+
+    def disable(self) -> None:
+        self.enabled = False
+
+    def reset(self) -> None:
+        with self._lock:
+            self.stats = {}
+
+    def _push(self, scope: list) -> List[list]:
+        stack = self._active.setdefault(threading.get_ident(), [])
+        stack.append(scope)
+        return stack
+
+    def _pop(self, stack: List[list]) -> None:
+        stack.pop()
+        if not stack:
+            self._active.pop(threading.get_ident(), None)
+
+    def _record(self, scope: list, seconds: float, failed: bool) -> None:
+        with self._lock:
+            self.stats.setdefault(scope[0], OperationStats()).add(seconds, scope[1], failed)
+
+    @contextmanager
+    def operation(self, name: str):
+        """Time the enclosed block as one call of operation `name`."""
+        if not self.enabled:
+            yield
+            return
+        scope = [name, dict.fromkeys(COUNTERS, 0)]
+        stack = self._push(scope)
+        failed = True
+        start = time.perf_counter()
+        try:
+            yield
+            failed = False
+        finally:
+            elapsed = time.perf_counter() - start
+            self._pop(stack)
+            self._record(scope, elapsed, failed)
+
+    def iterate(self, name: str, iterable: Iterable) -> Iterator:
+        """Yield from `iterable`, recording the whole iteration as one call of `name`.
+
+        Only the time spent producing items counts, not the consumer's time
+        between them, and every item yielded counts as a row returned.
+        """
+        scope = [name, dict.fromkeys(COUNTERS, 0)]
+        iterator = iter(iterable)
+        elapsed, returned, failed = 0.0, 0, False
+        try:
+            while True:
+                stack = self._push(scope)
+                start = time.perf_counter()
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+                except BaseException:
+                    failed = True
+                    raise
+                finally:
+                    elapsed += time.perf_counter() - start
+                    self._pop(stack)
+                returned += 1
+                yield item
+        finally:
+            stack = self._push(scope)
+            self.count(rows_returned=returned)
+            self._pop(stack)
+            self._record(scope, elapsed, failed)
+
+    def count(self, **counters: int) -> None:
+        """Add to the counters of the operations running on this thread."""
+        if not self.enabled:
+            return
+        for _, scope_counters in self._active.get(threading.get_ident(), ()):
+            for name, value in counters.items():
+                scope_counters[name] += value
+
+    def current_operation(self, thread: Optional[int] = None) -> Optional[str]:
+        """Name of the innermost operation running on a thread, if any."""
+        stack = self._active.get(threading.get_ident() if thread is None else thread)
+        return stack[-1][0] if stack else None
+
+    def snapshot(self) -> Dict[str, dict]:
+        """{operation: OperationStats.summary()} for every operation seen."""
+        with self._lock:
+            return {name: stats.summary() for name, stats in sorted(self.stats.items())}
+
+    # -- persistence, for aggregating across processes -------------------------------
+
+    def append_to(self, path: str, **labels) -> None:
+        """Append this process's stats to a JSON Lines file as one line."""
+        with self._lock:
+            record = dict(labels, pid=os.getpid(), time=time.time(),
+                          operations={name: stats.to_dict() for name, stats in self.stats.items()})
+        with open(path, 'a') as f:
+            f.write(json.dumps(record) + '\n')
+
+    @staticmethod
+    def merge_file(path: str) -> Dict[str, OperationStats]:
+        """Sum the stats of every line of a file written by `append_to`."""
+        merged: Dict[str, OperationStats] = {}
+        with open(path) as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                for name, data in json.loads(line)['operations'].items():
+                    merged.setdefault(name, OperationStats()).merge(OperationStats.from_dict(data))
+        return merged
+
+
+INSTRUMENTATION = Instrumentation()
+
+
+def instrumented(name: str) -> Callable:
+    """Record each call of the decorated function as operation `name`."""
+    def decorate(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not INSTRUMENTATION.enabled:
+                return function(*args, **kwargs)
+            with INSTRUMENTATION.operation(name):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def file_size(path: str) -> int:
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+
+class SamplingProfiler:
+    """Samples a thread's stack at a fixed interval from a background thread.
+
+    Samples are attributed to the instrumented operation running at the
+    time and kept as folded stacks ('operation;module:function;... count'),
+    the input format of flame graph tools. `hook`, if given, is called with
+    (operation, frame) for every sample instead, for custom aggregation.
+    """
+
+    def __init__(self, interval: float = 0.005, thread: Optional[int] = None,
+                 hook: Optional[Callable] = None, instrumentation: Instrumentation = INSTRUMENTATION):
+        self.interval = interval
+        self.thread = thread or threading.get_ident()
+        self.hook = hook
+        self.instrumentation = instrumentation
+        self.samples: Counter = Counter()
+        self._stop = threading.Event()
+        self._sampler: Optional[threading.Thread] = None
+
+    def start(self) -> 'SamplingProfiler':
+        self._stop.clear()
+        self._sampler = threading.Thread(target=self._run, name='finance-sampler', daemon=True)
+        self._sampler.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._sampler:
+            self._sampler.join()
+            self._sampler = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread)
+            if frame is None:
+                continue
+            operation = self.instrumentation.current_operation(self.thread)
+            if self.hook:
+                self.hook(operation, frame)
+            else:
+                self.samples[(operation or '-',) + _stack(frame)] += 1
+
+    def folded(self) -> Iterable[str]:
+        for stack, count in self.samples.most_common():
+            yield f"{';'.join(stack)} {count}"
+
+    def write_folded(self, path: str) -> None:
+        with open(path, 'w') as f:
+            for line in self.folded():
+                f.write(line + '\n')
+
+
+def _stack(frame) -> tuple:
+    """Outermost-first 'module:function' names of a frame's stack."""
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{frame.f_globals.get('__name__', '?')}:{code.co_name}")
+        frame = frame.f_back
+    return tuple(reversed(names))
@@ -0,0 +1,93 @@
+from typing import Iterator
+import json
+import os
+
+
+class Journal:
+    """Append-only JSON Lines log of changes made to a ledger.
+
+    Each change is written as one line. Lines are flushed immediately but
+    only fsynced every `sync_every` records (and on `sync`), trading a
+    bounded window of recent changes for not paying an fsync per write.
+
+    Records carry a sequence number, `seq`, that keeps counting across
+    truncations. A snapshot notes the last one it folded in, so records
+    still in the journal after a crash mid-compaction are not applied twice.
+    """
+
+    def __init__(self, path: str, sync_every: int = 64):
+        self.path = path
+        self.sync_every = sync_every
+        self.records = 0
+        # Sequence number of the last record written.
+        self.seq = 0
+        self._unsynced = 0
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._drop_torn_tail()
+        self._file = open(path, 'a', encoding='utf-8')
+
+    def _drop_torn_tail(self) -> None:
+        """Cut off a final record left incomplete by a crash."""
+        try:
+            f = open(self.path, 'rb+')
+        except FileNotFoundError:
+            return
+        with f:
+            size = f.seek(0, os.SEEK_END)
+            if not size:
+                return
+            f.seek(max(size - 1, 0))
+            if f.read(1) == b'\n':
+                return
+            f.seek(0)
+            data = f.read()
+            f.truncate(data.rfind(b'\n') + 1)
+
+    def append(self, record: dict) -> None:
+        self.seq += 1
+        self._file.write(json.dumps(dict(record, seq=self.seq), separators=(',', ':')) + '\n')
+        self._file.flush()
+        self.records += 1
+        self._unsynced += 1
+        if self._unsynced >= self.sync_every:
+            self.sync()
+
+    def sync(self) -> None:
+        if self._file.closed:
+            return
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._unsynced = 0
+
+    def truncate(self) -> None:
+        """Drop every record, typically after they were folded into a snapshot."""
+        self._file.seek(0)
+        self._file.truncate()
+        self.records = 0
+        self.sync()
+
+    def close(self) -> None:
+        if not self._file.closed:
+            self.sync()
+            self._file.close()
+
+    @staticmethod
+    def replay(path: str) -> Iterator[dict]:
+        """Yield the records in a journal file.
+
+        A torn final line, left behind by a crash mid-write, is ignored.
+        """
+        try:
+            f = open(path, 'r', encoding='utf-8')
+        except FileNotFoundError:
+            return
+        with f:
+            for line in f:
+                if not line.endswith('\n'):
+                    break
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    break
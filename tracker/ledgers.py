@@ -0,0 +1,332 @@
+from typing import Dict, Iterable, List, Optional, Tuple
+from concurrent.futures import Executor
+from datetime import date
+import json
+import os
+import re
+from .budget import Budget
+from .finance_tracker import FinanceTracker
+from .importer import gc_paused, records_to_columns, validate_columns
+from .partitions import add_income_expense, add_totals, period_bounds, split_columns
+from .snapshot import load_snapshot
+from .sqlite_store import SQLiteStore
+from .store import TransactionStore, day_to_str, parse_day
+from .transaction import add_amounts
+
+SUFFIXES = {'json': '.json', 'binary': '.bin', 'sqlite': '.db'}
+_LEDGER_ID = re.compile(r'^[\w.-]+$')
+
+
+def open_partition_store(path: str, storage: str):
+    """Open a partition's transactions for reading only, without a FinanceTracker around them."""
+    if storage == 'sqlite':
+        return SQLiteStore(path)
+    store = TransactionStore()
+    if storage == 'binary':
+        load_snapshot(store, path)
+        # Saved next to the snapshot by FinanceTracker (see its cube_file).
+        store.cube.load(path + '.cube.json', path)
+    else:
+        with open(path, 'r') as f:
+            store.replace(json.load(f))
+    return store
+
+
+def _spending(store, windows: List[Tuple[str, str, str]]) -> Dict[str, float]:
+    return {category: sum(totals['expense'] for totals in store.category_totals(first, last, category).values())
+            for category, first, last in windows}
+
+
+_AGGREGATES = {
+    'totals': lambda store, start, end: store.totals(start, end),
+    'category_totals': lambda store, start, end: store.category_totals(start, end),
+    'monthly_totals': lambda store, start, end: store.monthly_totals(start, end),
+    'spending': _spending,
+}
+
+
+def aggregate_partition(job: tuple):
+    """Run one aggregate over one partition; the unit of work sent to the pool.
+
+    :param job: (path, storage, aggregate name, arguments)
+    """
+    path, storage, name, args = job
+    store = open_partition_store(path, storage)
+    try:
+        return _AGGREGATES[name](store, *args)
+    finally:
+        if storage == 'sqlite':
+            store.close()
+
+
+class LedgerManager:
+    """Many ledgers, each kept as one partition per year.
+
+    A ledger lives in its own directory, `root/<ledger id>` unless given
+    another path, with one `FinanceTracker` data file per year of
+    transactions ('2024.bin' and so on). Only the partitions a request
+    needs are ever opened: new transactions go to the partition of their
+    year, and aggregate queries skip the years outside their date range.
+    Years are split and bounded as in `PartitionedStore`, but each
+    partition is a whole data file in the manager's storage, which a
+    worker process can open by its path alone.
+
+    Aggregates over many ledgers run as one job per (ledger, year)
+    partition, on a process pool when `workers` is set, and the partial
+    results are merged; so fleet-wide figures scale with the number of
+    cores rather than being bounded by one process's memory.
+    """
+
+    def __init__(self, root: str = 'data/ledgers', storage: str = 'binary', workers: int = 0,
+                 paths: Optional[Dict[str, str]] = None, executor: Optional[Executor] = None):
+        """
+        :param root: Directory holding a subdirectory per ledger
+        :param storage: Storage of every partition: 'json', 'binary' or 'sqlite'
+        :param workers: Run aggregates on this many processes (0: in-process)
+        :param paths: {ledger id: directory} for ledgers kept outside `root`
+        :param executor: Pool to run aggregates on instead, e.g. one shared with reports
+        """
+        if storage not in SUFFIXES:
+            raise ValueError("Storage must be 'json', 'binary' or 'sqlite'")
+        self.root = root
+        self.storage = storage
+        self.workers = workers
+        self.paths: Dict[str, str] = {}
+        for ledger, directory in (paths or {}).items():
+            self.set_path(ledger, directory)
+        self._executor = executor
+        self._own_pool: Optional[Executor] = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self) -> None:
+        """Shut down the process pool, if one was started."""
+        if self._own_pool is not None:
+            self._own_pool.shutdown(cancel_futures=True)
+            self._own_pool = None
+
+    # -- layout --------------------------------------------------------------------
+
+    def set_path(self, ledger: str, directory: str) -> None:
+        """Keep a ledger in `directory` instead of under the root."""
+        self._check_id(ledger)
+        self.paths[ledger] = directory
+
+    @staticmethod
+    def _check_id(ledger: str) -> None:
+        if not _LEDGER_ID.match(ledger) or ledger in ('.', '..'):
+            raise ValueError(f"Invalid ledger id {ledger!r}")
+
+    def ledger_dir(self, ledger: str) -> str:
+        self._check_id(ledger)
+        return self.paths.get(ledger) or os.path.join(self.root, ledger)
+
+    def ledgers(self) -> List[str]:
+        """Ids of every ledger under the root or given a path."""
+        found = set(self.paths)
+        if os.path.isdir(self.root):
+            found.update(entry.name for entry in os.scandir(self.root)
+                         if entry.is_dir() and _LEDGER_ID.match(entry.name))
+        return sorted(found)
+
+    def partition_file(self, ledger: str, year: int) -> str:
+        return os.path.join(self.ledger_dir(ledger), f'{year:04d}{SUFFIXES[self.storage]}')
+
+    def years(self, ledger: str) -> List[int]:
+        """Years the ledger has a partition for, in order."""
+        pattern = re.compile(rf'^(\d{{4}}){re.escape(SUFFIXES[self.storage])}$')
+        try:
+            names = os.listdir(self.ledger_dir(ledger))
+        except FileNotFoundError:
+            return []
+        return sorted(int(match.group(1)) for match in map(pattern.match, names) if match)
+
+    def open(self, ledger: str, year: int, **options) -> FinanceTracker:
+        """The tracker of one partition; `options` go to `FinanceTracker`."""
+        os.makedirs(self.ledger_dir(ledger), exist_ok=True)
+        return FinanceTracker(self.partition_file(ledger, year), storage=self.storage, **options)
+
+    # -- writing -------------------------------------------------------------------
+
+    def add_transactions(self, ledger: str, records: Iterable, batch_size: int = 50000):
+        """
+        Add transactions to a ledger, each to the partition of its year.
+
+        Rows are validated as by `FinanceTracker.add_transactions_bulk`, then
+        every partition touched is opened, extended and saved once.
+
+        :return: (number of transactions added, list of ImportErrorDetail)
+        """
+        by_year: Dict[int, List[Dict[str, list]]] = {}
+        added, errors = 0, []
+        batch, first_row = [], 1
+
+        def split(batch, first_row):
+            valid, batch_errors = validate_columns(records_to_columns(batch), first_row)
+            errors.extend(batch_errors)
+            for year, columns in split_columns(valid, 'year').items():
+                by_year.setdefault(int(year), []).append(columns)
+            return len(valid['date'])
+
+        with gc_paused():
+            for record in records:
+                batch.append(record)
+                if len(batch) >= batch_size:
+                    added += split(batch, first_row)
+                    first_row += len(batch)
+                    batch = []
+            if batch:
+                added += split(batch, first_row)
+        for year, parts in sorted(by_year.items()):
+            tracker = self.open(ledger, year)
+            try:
+                for columns in parts:
+                    tracker.transactions.extend_columns(columns)
+                tracker.save_data()
+            finally:
+                tracker.close()
+        return added, errors
+
+    def import_ledger(self, ledger: str, data_file: str, storage: str = 'json'):
+        """Split an existing single-file ledger into this manager's year partitions."""
+        source = FinanceTracker(data_file, storage=storage)
+        try:
+            return self.add_transactions(ledger, source.transactions.to_dicts())
+        finally:
+            source.close()
+
+    def budgets_file(self, ledger: str) -> str:
+        """Where a ledger's budgets are kept; they apply across its partitions."""
+        return os.path.join(self.ledger_dir(ledger), 'budgets.json')
+
+    def budgets(self, ledger: str) -> Dict[str, Budget]:
+        try:
+            with open(self.budgets_file(ledger), 'r') as f:
+                return {data['category']: Budget.from_dict(data) for data in json.load(f)}
+        except FileNotFoundError:
+            return {}
+
+    def set_budget(self, ledger: str, category: str, amount: float, period: str = 'monthly') -> None:
+        budgets = self.budgets(ledger)
+        budgets[category] = Budget(category, amount, period)
+        os.makedirs(self.ledger_dir(ledger), exist_ok=True)
+        temp_file = self.budgets_file(ledger) + '.tmp'
+        with open(temp_file, 'w') as f:
+            json.dump([budget.to_dict() for budget in budgets.values()], f, indent=4)
+        os.replace(temp_file, self.budgets_file(ledger))
+
+    # -- aggregates ----------------------------------------------------------------
+
+    def _map(self, jobs: List[tuple]) -> Iterable:
+        """Results of `aggregate_partition` for each job, in order."""
+        if self._executor is None and not self.workers:
+            return map(aggregate_partition, jobs)
+        pool = self._executor
+        if pool is None:
+            if self._own_pool is None:
+                from concurrent.futures import ProcessPoolExecutor  # loads multiprocessing; only needed here
+                self._own_pool = ProcessPoolExecutor(max_workers=self.workers)
+            pool = self._own_pool
+        # Batch the small jobs of a large fleet to keep the pool's overhead down.
+        return pool.map(aggregate_partition, jobs, chunksize=max(1, len(jobs) // (4 * max(self.workers, 1))))
+
+    def _partition_jobs(self, ledgers, name: str, start_date, end_date) -> List[Tuple[str, tuple]]:
+        """(ledger, job) for every partition with rows in the date range.
+
+        Bounds that cover a partition's whole year are dropped, so that it
+        can answer from its precomputed aggregates.
+        """
+        start, end = parse_day(start_date or None), parse_day(end_date or None)
+        jobs = []
+        for ledger in self.ledgers() if ledgers is None else ledgers:
+            for year in self.years(ledger):
+                first, last = period_bounds(f'{year:04d}')
+                if (start is not None and start > last) or (end is not None and end < first):
+                    continue
+                bounds = (day_to_str(start) if start is not None and start > first else None,
+                          day_to_str(end) if end is not None and end < last else None)
+                jobs.append((ledger, (self.partition_file(ledger, year), self.storage, name, bounds)))
+        return jobs
+
+    def _aggregate(self, ledgers, name: str, start_date, end_date, merge, initial, by_ledger: bool):
+        jobs = self._partition_jobs(ledgers, name, start_date, end_date)
+        results = {ledger: initial() for ledger in (self.ledgers() if ledgers is None else ledgers)} \
+            if by_ledger else None
+        total = initial()
+        for (ledger, _), partial in zip(jobs, self._map([job for _, job in jobs])):
+            if by_ledger:
+                results[ledger] = merge(results[ledger], partial)
+            else:
+                total = merge(total, partial)
+        return results if by_ledger else total
+
+    def totals(self, ledgers: Optional[List[str]] = None, start_date=None, end_date=None,
+               by_ledger: bool = False):
+        """
+        (income, expense) of the transactions in the date range.
+
+        :param ledgers: Ledger ids to include (default: every ledger)
+        :param by_ledger: Return {ledger id: figures} instead of fleet-wide figures
+        """
+        return self._aggregate(ledgers, 'totals', start_date, end_date, add_income_expense,
+                               lambda: (0.0, 0.0), by_ledger)
+
+    def balance(self, ledgers: Optional[List[str]] = None, start_date=None, end_date=None,
+                by_ledger: bool = False):
+        """Income minus expense in the date range (see `totals`)."""
+        totals = self.totals(ledgers, start_date, end_date, by_ledger)
+        if by_ledger:
+            return {ledger: add_amounts(income, -expense) for ledger, (income, expense) in totals.items()}
+        return add_amounts(totals[0], -totals[1])
+
+    def category_totals(self, ledgers: Optional[List[str]] = None, start_date=None, end_date=None,
+                        by_ledger: bool = False) -> dict:
+        """{category: {'income': x, 'expense': y}} in the date range (see `totals`)."""
+        def merge(merged, partial):
+            add_totals(merged, partial)
+            return merged
+        return self._aggregate(ledgers, 'category_totals', start_date, end_date, merge, dict, by_ledger)
+
+    def monthly_totals(self, ledgers: Optional[List[str]] = None, start_date=None, end_date=None,
+                       by_ledger: bool = False) -> dict:
+        """{'YYYY-MM': {'income': x, 'expense': y}} in month order (see `totals`)."""
+        def merge(merged, partial):
+            add_totals(merged, partial)
+            return dict(sorted(merged.items()))
+        return self._aggregate(ledgers, 'monthly_totals', start_date, end_date, merge, dict, by_ledger)
+
+    def budget_status(self, ledgers: Optional[List[str]] = None, today: Optional[date] = None) -> dict:
+        """
+        {ledger id: {category: status}} for every budget of the ledgers.
+
+        Each status is as returned by `FinanceTracker.budget_status`; the
+        spending in each budget's current period is summed across the
+        partitions the period overlaps.
+        """
+        today = today or date.today()
+        ledgers = self.ledgers() if ledgers is None else ledgers
+        budgets = {ledger: self.budgets(ledger) for ledger in ledgers}
+        jobs = []
+        for ledger, ledger_budgets in budgets.items():
+            windows = [(category, *(day.isoformat() for day in budget.window(today)))
+                       for category, budget in ledger_budgets.items()]
+            if not windows:
+                continue
+            years = set(self.years(ledger))
+            for year in sorted({int(day[:4]) for _, first, last in windows for day in (first, last)} & years):
+                jobs.append((ledger, (self.partition_file(ledger, year), self.storage, 'spending', (windows,))))
+
+        spent = {ledger: dict.fromkeys(ledger_budgets, 0.0) for ledger, ledger_budgets in budgets.items()}
+        for (ledger, _), partial in zip(jobs, self._map([job for _, job in jobs])):
+            for category, amount in partial.items():
+                spent[ledger][category] = add_amounts(spent[ledger][category], amount)
+        return {ledger: {category: {'period': budget.period, 'amount': budget.amount,
+                                    'spent': spent[ledger][category],
+                                    'remaining': budget.remaining(spent[ledger][category]),
+                                    'exceeded': budget.is_exceeded(spent[ledger][category])}
+                         for category, budget in ledger_budgets.items()}
+                for ledger, ledger_budgets in budgets.items()}
@@ -0,0 +1,480 @@
+from typing import Dict, Iterable, List, Optional, Tuple
+from collections import OrderedDict
+from datetime import date
+import json
+import os
+import threading
+import numpy as np
+from .partitions import (GRANULARITIES, add_income_expense, add_totals, partition_key, period_bounds,
+                         split_columns)
+from .query import QueryResult, ranked_positions
+from .snapshot import load_snapshot, write_snapshot
+from .store import TransactionStore, TransactionView, day_to_str, parse_day
+from .transaction import add_amounts
+
+MANIFEST = 'manifest.json'
+# Files saved next to each partition's snapshot (as FinanceTracker does for binary storage).
+DERIVED_SUFFIXES = ('.cube.json', '.text.npz')
+
+
+class PartitionView(TransactionView):
+    """A transaction of a partition; assigning an attribute edits it through the `PartitionedStore`."""
+    __slots__ = ()
+
+    def _set(self, field: str, value) -> None:
+        self._store, self._row = self._store.owner._edit_row(self._store, self._row, {field: value})
+
+
+class Partition(TransactionStore):
+    """The open rows of one partition of a `PartitionedStore`.
+
+    :param owner: The PartitionedStore it belongs to
+    :param key: Its partition key
+    :param file: The partition file its rows were read from or saved to
+    """
+
+    def __init__(self, owner: 'PartitionedStore', key: str, file: Optional[str] = None):
+        super().__init__()
+        self.owner = owner
+        self.key = key
+        self.file = file
+
+    def view(self, row: int) -> PartitionView:
+        return PartitionView(self, row)
+
+
+class PartitionedQuery(QueryResult):
+    """Query over a `PartitionedStore`, run partition by partition.
+
+    Partitions cover disjoint date ranges, so chaining the date-ordered
+    results of the partitions the date bounds overlap, oldest first, gives
+    the date-ordered result; a cursor resumes in the partition of its date.
+    Description matches are ranked within each partition, the most recent
+    partition first.
+    """
+
+    def _keys(self) -> List[str]:
+        return self.store._overlapping(self.filters.get('start_date'), self.filters.get('end_date'))
+
+    def _iterate(self, after):
+        store = self.store
+        keys = self._keys()
+        if 'text' in self.filters:
+            matches = (transaction for key in reversed(keys)
+                       for transaction in store._partition(key).query(**self.filters))
+            yield from ranked_positions(matches, after)
+            return
+        resume_in = None
+        if after is not None:
+            if len(after) != 2:
+                raise ValueError("cursor is not from a date-ordered query")
+            resume_in = partition_key(after[0], store.granularity)
+            keys = [key for key in keys if key >= resume_in]
+        for key in keys:
+            yield from store._partition(key).query(**self.filters)._iterate(after if key == resume_in else None)
+
+    def count(self) -> int:
+        store = self.store
+        start, end = self.filters.get('start_date'), self.filters.get('end_date')
+        dates_only = set(self.filters) <= {'start_date', 'end_date'}
+        return sum(store._partitions[key]['rows'] if dates_only and store._covered(key, start, end)
+                   else len(store._partition(key).query(**self.filters))
+                   for key in self._keys())
+
+
+class PartitionedStore:
+    """Transactions kept on disk as one binary snapshot per month or year.
+
+    A manifest lists the partitions with the metadata queries are planned
+    from: row count, first and last date, and income and expense in total,
+    per category and per month. Nothing else is read up front. A query
+    with date bounds opens only the partitions whose dates it overlaps,
+    and partitions it covers entirely answer totals from the manifest
+    without being opened. At most `cache_size` partitions are kept open,
+    least recently used first out, besides those with unsaved changes.
+
+    Partition files are never rewritten: `save` writes each changed
+    partition, with only its live rows, to a new file and switches the
+    manifest to it, so files can be cached by name. `seal` marks the
+    partitions of finished periods read-only; writes to them raise
+    ValueError until they are unsealed.
+
+    List order is partition order, then the order rows were added within
+    a partition. Writes and reads that must agree with each other (`read`)
+    take the store's lock.
+    """
+
+    def __init__(self, path: str, granularity: str = 'month', cache_size: int = 8):
+        """
+        :param path: Directory holding the manifest and partition files
+        :param granularity: 'month' or 'year'; an existing store keeps its own
+        :param cache_size: Number of partitions kept open
+        """
+        if granularity not in GRANULARITIES:
+            raise ValueError("Partitions must be by 'month' or 'year'")
+        self.path = path
+        self.cache_size = cache_size
+        self.lock = threading.RLock()
+        self.granularity = granularity
+        self._partitions: Dict[str, dict] = {}
+        self._file_number = 0
+        manifest = os.path.join(path, MANIFEST)
+        if os.path.exists(manifest):
+            with open(manifest, 'r') as f:
+                data = json.load(f)
+            self.granularity = data['granularity']
+            self._partitions = data['partitions']
+            self._file_number = data['file_number']
+        self._open: 'OrderedDict[str, TransactionStore]' = OrderedDict()
+        self._dirty = set()
+        # Files superseded since the last save, deleted once the manifest no longer names them.
+        self._obsolete: List[str] = []
+
+    # -- partitions ------------------------------------------------------------
+
+    def _keys(self) -> List[str]:
+        with self.lock:
+            return sorted(self._partitions)
+
+    def _partition(self, key: str) -> TransactionStore:
+        """The open store of a partition, opening (or creating) it if needed."""
+        with self.lock:
+            store = self._open.get(key)
+            if store is not None:
+                self._open.move_to_end(key)
+                return store
+            meta = self._partitions.setdefault(key, {'rows': 0, 'sealed': False})
+            store = Partition(self, key, meta.get('file'))
+            if 'file' in meta:
+                path = os.path.join(self.path, meta['file'])
+                load_snapshot(store, path)
+                store.cube.load(path + '.cube.json', path)
+                store.text_index.load(path + '.text.npz', path)
+            self._open[key] = store
+            clean = [open_key for open_key in self._open if open_key not in self._dirty]
+            for evicted in clean[:max(0, len(self._open) - self.cache_size)]:
+                if evicted != key:
+                    del self._open[evicted]
+            return store
+
+    def _check_unsealed(self, keys: Iterable[str]) -> None:
+        """Raise before a write touches a sealed partition, so no write is half-applied."""
+        for key in keys:
+            if self._partitions.get(key, {}).get('sealed'):
+                raise ValueError(f"Partition {key} is sealed; unseal it to change its transactions")
+
+    def _writable(self, key: str) -> TransactionStore:
+        store = self._partition(key)
+        self._dirty.add(key)
+        return store
+
+    def _bounds(self, key: str) -> Tuple[int, int]:
+        """First and last day of a partition's rows, as far as is known without opening it."""
+        meta = self._partitions[key]
+        if key in self._dirty or 'min_day' not in meta:
+            return period_bounds(key)
+        return meta['min_day'], meta['max_day']
+
+    def _overlapping(self, start_date=None, end_date=None) -> List[str]:
+        """Keys of the partitions that may hold rows in the date range, oldest first."""
+        start, end = parse_day(start_date or None), parse_day(end_date or None)
+        keys = []
+        for key in self._keys():
+            first, last = self._bounds(key)
+            if (start is None or last >= start) and (end is None or first <= end):
+                keys.append(key)
+        return keys
+
+    def _covered(self, key: str, start_date=None, end_date=None) -> bool:
+        """Whether the manifest's figures for a partition hold for the date range."""
+        meta = self._partitions[key]
+        if key in self._dirty or 'min_day' not in meta:
+            return False
+        start, end = parse_day(start_date or None), parse_day(end_date or None)
+        return (start is None or meta['min_day'] >= start) and (end is None or meta['max_day'] <= end)
+
+    def _size(self, key: str) -> int:
+        store = self._open.get(key)
+        return len(store) if store is not None else self._partitions[key]['rows']
+
+    def _locate(self, position: int) -> Tuple[str, int]:
+        """(partition key, position within it) of a list position."""
+        if position < 0:
+            position += len(self)
+        if position >= 0:
+            for key in self._keys():
+                size = self._size(key)
+                if position < size:
+                    return key, position
+                position -= size
+        raise IndexError("transaction index out of range")
+
+    def read(self, function, *args, **kwargs):
+        """Run a function that reads the store, without writes interleaving."""
+        with self.lock:
+            return function(*args, **kwargs)
+
+    # -- persistence -------------------------------------------------------------
+
+    def files(self) -> List[str]:
+        """Paths of the manifest and every partition file."""
+        files = [os.path.join(self.path, MANIFEST)]
+        for meta in self._partitions.values():
+            if 'file' in meta:
+                path = os.path.join(self.path, meta['file'])
+                files += [path] + [path + suffix for suffix in DERIVED_SUFFIXES]
+        return files
+
+    @staticmethod
+    def _summarize(store: TransactionStore, file: str) -> dict:
+        days = store._day[store.order()]
+        income, expense = store.totals()
+        return {'file': file, 'rows': len(store), 'sealed': False,
+                'min_day': int(days.min()), 'max_day': int(days.max()),
+                'min_date': day_to_str(int(days.min())), 'max_date': day_to_str(int(days.max())),
+                'income': income, 'expense': expense,
+                'categories': store.category_totals(), 'months': store.monthly_totals()}
+
+    def save(self) -> None:
+        """Write the changed partitions to new files, then the manifest."""
+        with self.lock:
+            os.makedirs(self.path, exist_ok=True)
+            for key in sorted(self._dirty):
+                store = self._open[key]
+                old = self._partitions[key].get('file')
+                if old:
+                    self._obsolete.append(old)
+                if not len(store):
+                    del self._partitions[key]
+                    del self._open[key]
+                    continue
+                self._file_number += 1
+                file = f'{key}.{self._file_number}.bin'
+                path = os.path.join(self.path, file)
+                write_snapshot(store, path)
+                store.cube.save(path + '.cube.json', path)
+                store.text_index.save(path + '.text.npz', path)
+                store.file = file
+                self._partitions[key] = self._summarize(store, file)
+            self._dirty.clear()
+            self._write_manifest()
+            for file in self._obsolete:
+                for path in [file] + [file + suffix for suffix in DERIVED_SUFFIXES]:
+                    try:
+                        os.remove(os.path.join(self.path, path))
+                    except FileNotFoundError:
+                        pass
+            self._obsolete = []
+
+    commit = save
+
+    def _write_manifest(self) -> None:
+        os.makedirs(self.path, exist_ok=True)
+        manifest = os.path.join(self.path, MANIFEST)
+        temp_file = manifest + '.tmp'
+        with open(temp_file, 'w') as f:
+            json.dump({'granularity': self.granularity, 'file_number': self._file_number,
+                       'partitions': self._partitions}, f, indent=1)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_file, manifest)
+
+    def seal(self, before=None) -> List[str]:
+        """
+        Save, then make the partitions of periods ending before a date read-only.
+
+        :param before: Date the periods must end before (default: the start
+                       of the current period)
+        :return: Keys of the partitions sealed by this call
+        """
+        with self.lock:
+            cutoff = parse_day(before or None)
+            if cutoff is None:
+                cutoff = period_bounds(partition_key(date.today().toordinal(), self.granularity))[0]
+            self.save()
+            sealed = []
+            for key in self._keys():
+                meta = self._partitions[key]
+                if not meta['sealed'] and period_bounds(key)[1] < cutoff:
+                    meta['sealed'] = True
+                    sealed.append(key)
+            if sealed:
+                self._write_manifest()
+            return sealed
+
+    def unseal(self, key: str) -> None:
+        with self.lock:
+            self._partitions[key]['sealed'] = False
+            self._write_manifest()
+
+    def sealed(self) -> List[str]:
+        return [key for key in self._keys() if self._partitions[key]['sealed']]
+
+    def partitions(self) -> Dict[str, dict]:
+        """{key: manifest entry} of every partition, oldest first."""
+        return {key: dict(self._partitions[key]) for key in self._keys()}
+
+    def close(self) -> None:
+        self._open.clear()
+        self._dirty.clear()
+
+    # -- sequence protocol -----------------------------------------------------
+
+    def __len__(self) -> int:
+        return sum(self._size(key) for key in self._keys())
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return list(self)[index]
+        key, position = self._locate(index)
+        return self._partition(key)[position]
+
+    def __iter__(self):
+        for key in self._keys():
+            yield from self._partition(key)
+
+    def to_dicts(self) -> Iterable[dict]:
+        for key in self._keys():
+            yield from self._partition(key).to_dicts()
+
+    # -- writes --------------------------------------------------------------
+
+    def _day_of(self, record) -> int:
+        return parse_day(record['date'] if isinstance(record, dict) else record.date)
+
+    def extend(self, records: Iterable) -> int:
+        with self.lock:
+            groups: Dict[str, list] = {}
+            for record in records:
+                groups.setdefault(partition_key(self._day_of(record), self.granularity), []).append(record)
+            self._check_unsealed(groups)
+            for key, group in groups.items():
+                self._writable(key).extend(group)
+            return sum(len(group) for group in groups.values())
+
+    def extend_columns(self, columns: Dict[str, list]) -> int:
+        """Add already-validated columns (see `importer.validate_columns`)."""
+        with self.lock:
+            parts = split_columns(columns, self.granularity)
+            self._check_unsealed(parts)
+            for key, part in parts.items():
+                self._writable(key).extend_columns(part)
+            return len(columns['date'])
+
+    def append(self, transaction) -> None:
+        self.extend([transaction])
+
+    def update(self, position: int, **changes) -> None:
+        with self.lock:
+            self._edit(*self._locate(position), changes)
+
+    def _edit(self, key: str, local: int, changes: dict) -> Tuple[Partition, int]:
+        """Edit the transaction at a position of a partition; return its new (partition, row)."""
+        target = partition_key(parse_day(changes['date']), self.granularity) if 'date' in changes else key
+        self._check_unsealed({key, target})
+        store = self._writable(key)
+        if target == key:
+            return store, store.update(local, **changes)
+        # Moved to another period: re-filed in that period's partition.
+        record = store[local].to_dict()
+        record.update(changes)
+        store.pop(local)
+        moved = self._writable(target)
+        moved.extend([record])
+        return moved, moved.row_id(-1)
+
+    def _edit_row(self, partition: Partition, row: int, changes: dict) -> Tuple[Partition, int]:
+        """Apply an edit made through a `PartitionView`."""
+        with self.lock:
+            key = partition.key
+            if self._open.get(key) is not partition:
+                meta = self._partitions.get(key)
+                if key in self._dirty or meta is None or meta.get('file') != partition.file:
+                    raise ValueError("The transaction's partition has changed since it was read")
+                # Evicted unchanged, so it still holds the rows of its file.
+                self._open[key] = partition
+            return self._edit(key, partition.position_of(row), changes)
+
+    def pop(self, position: int = -1):
+        with self.lock:
+            key, local = self._locate(position)
+            self._check_unsealed([key])
+            return self._writable(key).pop(local)
+
+    def clear(self) -> None:
+        with self.lock:
+            self._obsolete += [meta['file'] for meta in self._partitions.values() if 'file' in meta]
+            self._partitions = {}
+            self._open.clear()
+            self._dirty.clear()
+
+    def replace(self, records: Iterable) -> None:
+        with self.lock:
+            self.clear()
+            self.extend(records)
+
+    # -- queries -----------------------------------------------------------------
+
+    def select(self, start_date=None, end_date=None, category=None) -> list:
+        return [transaction for key in self._overlapping(start_date, end_date)
+                for transaction in self._partition(key).select(start_date, end_date, category)]
+
+    def search(self, start_date=None, end_date=None, category=None, tags=None,
+               min_amount=None, max_amount=None, text=None) -> list:
+        keys = self._overlapping(start_date, end_date)
+        if text:
+            keys.reverse()
+        return [transaction for key in keys for transaction in self._partition(key).search(
+            start_date, end_date, category, tags, min_amount, max_amount, text)]
+
+    def query(self, start_date=None, end_date=None, category=None, tags=None,
+              min_amount=None, max_amount=None, text=None) -> PartitionedQuery:
+        """Lazy, date-ordered version of `search` (see `QueryResult`)."""
+        return PartitionedQuery(self, start_date=start_date, end_date=end_date, category=category, tags=tags,
+                                min_amount=min_amount, max_amount=max_amount, text=text)
+
+    def totals(self, start_date=None, end_date=None) -> Tuple[float, float]:
+        merged = (0.0, 0.0)
+        for key in self._overlapping(start_date, end_date):
+            if self._covered(key, start_date, end_date):
+                meta = self._partitions[key]
+                partial = meta['income'], meta['expense']
+            else:
+                partial = self._partition(key).totals(start_date, end_date)
+            merged = add_income_expense(merged, partial)
+        return merged
+
+    def balance(self, start_date=None, end_date=None) -> float:
+        income, expense = self.totals(start_date, end_date)
+        return add_amounts(income, -expense)
+
+    def daily_net(self, start_date=None, end_date=None) -> Tuple[np.ndarray, np.ndarray]:
+        parts = [self._partition(key).daily_net(start_date, end_date)
+                 for key in self._overlapping(start_date, end_date)]
+        if not parts:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        return (np.concatenate([days for days, _ in parts]).astype(np.int64),
+                np.concatenate([net for _, net in parts]))
+
+    def category_totals(self, start_date=None, end_date=None,
+                        category=None) -> Dict[str, Dict[str, float]]:
+        merged: Dict[str, Dict[str, float]] = {}
+        for key in self._overlapping(start_date, end_date):
+            if self._covered(key, start_date, end_date):
+                partial = self._partitions[key]['categories']
+                if category:
+                    partial = {name: totals for name, totals in partial.items() if name.lower() == category.lower()}
+            else:
+                partial = self._partition(key).category_totals(start_date, end_date, category)
+            add_totals(merged, partial)
+        return merged
+
+    def monthly_totals(self, start_date=None, end_date=None) -> Dict[str, Dict[str, float]]:
+        merged: Dict[str, Dict[str, float]] = {}
+        for key in self._overlapping(start_date, end_date):
+            if self._covered(key, start_date, end_date):
+                partial = self._partitions[key]['months']
+            else:
+                partial = self._partition(key).monthly_totals(start_date, end_date)
+            add_totals(merged, partial)
+        return dict(sorted(merged.items()))
@@ -0,0 +1,51 @@
+from typing import Dict, Tuple
+from datetime import date
+import numpy as np
+from .transaction import add_amounts
+
+GRANULARITIES = ('month', 'year')
+
+
+def partition_key(day: int, granularity: str) -> str:
+    """'YYYY-MM' or 'YYYY' of the partition a day ordinal belongs to."""
+    value = date.fromordinal(day)
+    return f'{value.year:04d}' if granularity == 'year' else f'{value.year:04d}-{value.month:02d}'
+
+
+def period_bounds(key: str) -> Tuple[int, int]:
+    """First and last day ordinal of a partition's period."""
+    year, month = int(key[:4]), int(key[5:7]) if len(key) > 4 else None
+    if month is None:
+        return date(year, 1, 1).toordinal(), date(year, 12, 31).toordinal()
+    first = date(year, month, 1)
+    following = date(year + month // 12, month % 12 + 1, 1)
+    return first.toordinal(), following.toordinal() - 1
+
+
+def split_columns(columns: Dict[str, list], granularity: str) -> Dict[str, Dict[str, list]]:
+    """
+    Split validated columns (see `importer.validate_columns`) by partition.
+
+    :return: {partition key: the columns of its rows}, in key order
+    """
+    keys = np.array([day[:7] if granularity == 'month' else day[:4] for day in columns['date']])
+    parts = {}
+    for key in np.unique(keys).tolist():
+        keep = keys == key
+        parts[key] = {field: values[keep] if isinstance(values, np.ndarray)
+                      else [value for value, wanted in zip(values, keep) if wanted]
+                      for field, values in columns.items()}
+    return parts
+
+
+def add_totals(merged: Dict[str, Dict[str, float]], partial: Dict[str, Dict[str, float]]) -> None:
+    """Add one partition's {key: {'income': x, 'expense': y}} figures into `merged`."""
+    for key, totals in partial.items():
+        cell = merged.setdefault(key, {'income': 0.0, 'expense': 0.0})
+        cell['income'] = add_amounts(cell['income'], totals['income'])
+        cell['expense'] = add_amounts(cell['expense'], totals['expense'])
+
+
+def add_income_expense(merged: Tuple[float, float], partial: Tuple[float, float]) -> Tuple[float, float]:
+    """Sum of two (income, expense) pairs."""
+    return add_amounts(merged[0], partial[0]), add_amounts(merged[1], partial[1])
@@ -0,0 +1,162 @@
+from typing import Iterator, NamedTuple, Optional, Tuple
+from itertools import islice
+from .instrumentation import INSTRUMENTATION, instrumented
+from .tag_query import parse_tag_query
+
+# The filters a query can be narrowed by; see `QueryResult.where`.
+FILTERS = ('start_date', 'end_date', 'category', 'tags', 'min_amount', 'max_amount', 'text')
+
+DEFAULT_PAGE_SIZE = 20
+
+
+class Page(NamedTuple):
+    """One page of a query result.
+
+    `next_cursor` resumes right after the last item, or is None on the
+    last page.
+    """
+    items: list
+    next_cursor: Optional[str]
+
+
+def encode_cursor(key: Tuple[int, ...]) -> str:
+    return ':'.join(str(part) for part in key)
+
+
+def decode_cursor(cursor: str) -> Tuple[int, ...]:
+    try:
+        return tuple(int(part) for part in cursor.split(':'))
+    except ValueError:
+        raise ValueError(f"invalid cursor {cursor!r}") from None
+
+
+class QueryResult:
+    """A lazily evaluated, ordered set of transactions.
+
+    Nothing is fetched until the result is iterated, and then only as much
+    as is consumed: transactions come in date order (ties in the order they
+    were added), or best description match first when the query has text.
+    `where` narrows the query further without running it, and `page` reads
+    one page, resuming from the cursor of the previous page or skipping an
+    offset. The cost of a page depends on its size, not on the size of the
+    whole result.
+
+    Subclasses implement `_iterate`, yielding (key, transaction) pairs in
+    result order where the key is a tuple of ints that orders the result,
+    and `count`.
+    """
+
+    def __init__(self, store, **filters):
+        unknown = set(filters) - set(FILTERS)
+        if unknown:
+            raise TypeError(f"unknown filter(s): {', '.join(sorted(unknown))}")
+        self.store = store
+        self.filters = {name: value for name, value in filters.items() if value not in (None, '', [])}
+        # Set when two filters contradict each other, e.g. two categories.
+        self.empty = False
+
+    def where(self, **filters) -> 'QueryResult':
+        """Return a new result narrowed by more filters.
+
+        Date and amount bounds tighten the existing ones, tag queries are
+        ANDed and description words added to the existing ones.
+        """
+        combined = dict(self.filters)
+        narrowed = type(self)(self.store)
+        narrowed.empty = self.empty
+        for name, value in type(self)(self.store, **filters).filters.items():
+            current = combined.get(name)
+            if current is None:
+                combined[name] = value
+            elif name in ('start_date', 'min_amount'):
+                combined[name] = max(current, value)
+            elif name in ('end_date', 'max_amount'):
+                combined[name] = min(current, value)
+            elif name == 'category':
+                narrowed.empty |= current.lower() != value.lower()
+            elif name == 'tags':
+                combined[name] = ('and', parse_tag_query(current), parse_tag_query(value))
+            else:
+                combined[name] = f"{current} {value}"
+        narrowed.filters = combined
+        return narrowed
+
+    def _iterate(self, after: Optional[Tuple[int, ...]]) -> Iterator[Tuple[Tuple[int, ...], object]]:
+        raise NotImplementedError
+
+    def count(self) -> int:
+        raise NotImplementedError
+
+    def __iter__(self):
+        if self.empty:
+            return
+        transactions = (transaction for _, transaction in self._iterate(None))
+        if INSTRUMENTATION.enabled:
+            transactions = INSTRUMENTATION.iterate('query.iterate', transactions)
+        yield from transactions
+
+    @instrumented('query.count')
+    def __len__(self) -> int:
+        return 0 if self.empty else self.count()
+
+    def __bool__(self) -> bool:
+        return self.first() is not None
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            if (index.start or 0) >= 0 and (index.stop or 0) >= 0 and index.stop is not None:
+                return list(islice(self, index.start, index.stop, index.step))
+            return list(self)[index]
+        if index < 0:
+            return list(self)[index]
+        for transaction in islice(self, index, None):
+            return transaction
+        raise IndexError("query result index out of range")
+
+    def first(self):
+        """The first transaction of the result, or None if it is empty."""
+        for transaction in self:
+            return transaction
+        return None
+
+    @instrumented('query.page')
+    def page(self, limit: int, offset: int = 0, cursor: Optional[str] = None) -> Page:
+        """
+        Read one page of the result.
+
+        :param limit: Maximum number of transactions on the page
+        :param offset: Number of transactions to skip (after the cursor, if any)
+        :param cursor: `next_cursor` of the previous page
+        :return: Page of transactions and the cursor of the next page
+        """
+        if limit < 1:
+            raise ValueError("page limit must be positive")
+        if self.empty:
+            return Page([], None)
+        pairs = list(islice(self._iterate(decode_cursor(cursor) if cursor else None), offset, offset + limit + 1))
+        more = len(pairs) > limit
+        pairs = pairs[:limit]
+        INSTRUMENTATION.count(rows_returned=len(pairs))
+        return Page([transaction for _, transaction in pairs], encode_cursor(pairs[-1][0]) if more else None)
+
+    def pages(self, limit: int) -> Iterator[Page]:
+        """Yield the result a page at a time."""
+        cursor = None
+        while True:
+            page = self.page(limit, cursor=cursor)
+            if page.items:
+                yield page
+            if page.next_cursor is None:
+                return
+            cursor = page.next_cursor
+
+    def __repr__(self):
+        filters = ', '.join(f"{name}={value!r}" for name, value in self.filters.items())
+        return f"{type(self).__name__}({filters})"
+
+
+def ranked_positions(iterable, after: Optional[Tuple[int, ...]]) -> Iterator[Tuple[Tuple[int], object]]:
+    """Key relevance-ordered items by position, resuming after a position cursor."""
+    start = after[0] + 1 if after else 0
+    for position, item in enumerate(islice(iterable, start, None), start):
+        yield (position,), item
@@ -0,0 +1,111 @@
+from typing import Iterator, List, Optional, Tuple
+from datetime import date, timedelta
+import heapq
+from .budget import PERIODS, _add_months
+from .transaction import Transaction
+
+
+class RecurringItem:
+    """A recurring transaction definition and the date it is next due."""
+
+    def __init__(self, template: Transaction, frequency: str, next_due: date, anchor: Optional[int] = None):
+        if frequency not in PERIODS:
+            raise ValueError("Invalid frequency for recurring transaction")
+        self.template = template
+        self.frequency = frequency
+        self.next_due = next_due
+        # Day of the month monthly items fall on; kept so that a 31st does
+        # not drift to the 28th after passing through February.
+        self.anchor = anchor or next_due.day
+
+    def following(self, due: date) -> date:
+        if self.frequency == 'daily':
+            return due + timedelta(days=1)
+        if self.frequency == 'weekly':
+            return due + timedelta(days=7)
+        return _add_months(due, 1, self.anchor)
+
+    def occurrence(self, due: date) -> Transaction:
+        """A fresh transaction for the occurrence due on `due`."""
+        t = self.template
+        return Transaction(t.amount, t.category, t.description, due.isoformat(), t.transaction_type, list(t.tags))
+
+    def to_dict(self) -> dict:
+        return {'transaction': self.template.to_dict(), 'frequency': self.frequency,
+                'next_due': self.next_due.isoformat(), 'anchor': self.anchor}
+
+    @staticmethod
+    def from_dict(data: dict) -> 'RecurringItem':
+        return RecurringItem(Transaction.from_dict(data['transaction']), data['frequency'],
+                             date.fromisoformat(data['next_due']), data.get('anchor'))
+
+
+class RecurringScheduler:
+    """Recurring items in a min-heap keyed by next-due date.
+
+    Materializing the due occurrences only touches the items at the top of
+    the heap, so the cost is proportional to the number of occurrences due,
+    not to the number of recurring definitions.
+    """
+
+    def __init__(self, items=()):
+        self._heap: List[Tuple[int, int, RecurringItem]] = []
+        self._counter = 0
+        for item in items:
+            self._push(item)
+
+    def _push(self, item: RecurringItem) -> None:
+        # The sequence number breaks ties between items due on the same day
+        # in definition order and keeps items themselves out of comparisons.
+        heapq.heappush(self._heap, (item.next_due.toordinal(), self._counter, item))
+        self._counter += 1
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def __iter__(self) -> Iterator[RecurringItem]:
+        """Items in insertion order."""
+        return (item for _, _, item in sorted(self._heap, key=lambda entry: entry[1]))
+
+    def add(self, template: Transaction, frequency: str, start: Optional[date] = None) -> RecurringItem:
+        """Schedule `template`, first due on `start` (today by default)."""
+        item = RecurringItem(template, frequency, start or date.today())
+        self._push(item)
+        return item
+
+    def due(self, until: Optional[date] = None) -> List[Transaction]:
+        """Materialize every occurrence due on or before `until`, exactly once.
+
+        Each due item is advanced past `until`, so calling this again for the
+        same day yields nothing. Occurrences come back in date order.
+        """
+        limit = (until or date.today()).toordinal()
+        occurrences = []
+        heap = self._heap
+        while heap and heap[0][0] <= limit:
+            _, sequence, item = heap[0]
+            occurrences.append(item.occurrence(item.next_due))
+            item.next_due = item.following(item.next_due)
+            heapq.heapreplace(heap, (item.next_due.toordinal(), sequence, item))
+        return occurrences
+
+    def upcoming(self, until: date) -> List[Tuple[date, Transaction]]:
+        """Next occurrence of every item due on or before `until`, soonest first.
+
+        Walks only the part of the heap that is due by `until`: a node's
+        children are never due earlier than the node itself.
+        """
+        limit = until.toordinal()
+        heap = self._heap
+        found, stack = [], [0] if heap else []
+        while stack:
+            index = stack.pop()
+            key, order, item = heap[index]
+            if key > limit:
+                continue
+            found.append((key, order, item))
+            stack.extend(child for child in (2 * index + 1, 2 * index + 2) if child < len(heap))
+        return [(item.next_due, item.occurrence(item.next_due)) for _, _, item in sorted(found)]
+
+    def to_dicts(self) -> List[dict]:
+        return [item.to_dict() for item in self]
@@ -0,0 +1,52 @@
+from typing import Tuple
+import numpy as np
+from .store import EPOCH_ORDINAL, parse_day
+from .transaction import CENTS
+
+DEFAULT_PLOT_POINTS = 2000
+
+
+def daily_net(transactions, start_date=None, end_date=None) -> Tuple[np.ndarray, np.ndarray]:
+    """Return (day ordinals, net amount per day) in date order.
+
+    Stores aggregate this themselves; any other iterable of transactions is
+    folded in one pass.
+    """
+    if hasattr(transactions, 'daily_net'):
+        return transactions.daily_net(start_date, end_date)
+    start_day, end_day = parse_day(start_date or None), parse_day(end_date or None)
+    totals = {}
+    for t in transactions:
+        day = t.day
+        if (start_day is None or day >= start_day) and (end_day is None or day <= end_day):
+            totals[day] = totals.get(day, 0) + (t.cents if t.transaction_type == 'income' else -t.cents)
+    days = np.array(sorted(totals), dtype=np.int64)
+    return days, np.array([totals[day] for day in days.tolist()], dtype=np.float64) / CENTS
+
+
+def downsample(x: np.ndarray, y: np.ndarray, max_points: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Keep at most `max_points` evenly spaced points, always including both ends."""
+    if max_points is None or len(x) <= max_points:
+        return x, y
+    keep = np.unique(np.linspace(0, len(x) - 1, max(max_points, 2)).round().astype(np.int64))
+    return x[keep], y[keep]
+
+
+def running_balance(transactions, start_date=None, end_date=None,
+                    max_points: int = DEFAULT_PLOT_POINTS) -> Tuple[np.ndarray, np.ndarray]:
+    """Closing balance at the end of each day, in date order.
+
+    Computed with a single cumulative sum over the per-day net amounts and
+    downsampled to at most `max_points` points for plotting.
+
+    :return: (dates as datetime64[D], balances)
+    """
+    return balance_points(*daily_net(transactions, start_date, end_date), max_points)
+
+
+def balance_points(days: np.ndarray, net: np.ndarray,
+                   max_points: int = DEFAULT_PLOT_POINTS) -> Tuple[np.ndarray, np.ndarray]:
+    """Closing balances from (day ordinals, net amount per day), as for `running_balance`."""
+    dates = (days - EPOCH_ORDINAL).astype('datetime64[D]')
+    # Summed in whole cents, so long histories do not drift.
+    return downsample(dates, np.cumsum(np.rint(net * CENTS)) / CENTS, max_points)
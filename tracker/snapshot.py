@@ -0,0 +1,161 @@
+from typing import Dict, List
+import json
+import mmap
+import os
+import numpy as np
+from .transaction import CENTS
+
+MAGIC = b'FTSNAP01'
+_ALIGN = 8
+
+# Column name in the store -> dtype on disk.
+COLUMNS = {
+    '_cents': '<i8',
+    '_day': '<i4',
+    '_type': 'u1',
+    '_category': '<i4',
+    '_tag_start': '<i8',
+    '_tag_count': '<i4',
+    '_tag_pool': '<i4',
+}
+
+
+class PackedStrings:
+    """Read-only string column stored as offsets into a UTF-8 blob.
+
+    Strings are decoded one at a time on access, so a memory-mapped column
+    only touches the pages that are actually read. Appended strings go to
+    an ordinary list.
+    """
+
+    def __init__(self, offsets: np.ndarray, blob):
+        self._offsets = offsets
+        self._blob = blob
+        self._packed = len(offsets) - 1
+        self._extra: List[str] = []
+
+    def __len__(self) -> int:
+        return self._packed + len(self._extra)
+
+    def __getitem__(self, index: int) -> str:
+        if index < 0:
+            index += len(self)
+        if index >= self._packed:
+            return self._extra[index - self._packed]
+        start, stop = self._offsets[index], self._offsets[index + 1]
+        return bytes(self._blob[start:stop]).decode('utf-8')
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+    def append(self, value: str) -> None:
+        self._extra.append(value)
+
+    def extend(self, values) -> None:
+        self._extra.extend(values)
+
+
+def _pack_strings(values) -> Dict[str, np.ndarray]:
+    encoded = [value.encode('utf-8') for value in values]
+    offsets = np.zeros(len(encoded) + 1, dtype='<i8')
+    np.cumsum([len(value) for value in encoded], out=offsets[1:])
+    return {'offsets': offsets, 'blob': np.frombuffer(b''.join(encoded), dtype='u1')}
+
+
+def write_snapshot(store, path: str, meta: dict = None) -> None:
+    """Write the live transactions of `store`, in list order, to `path`.
+
+    :param meta: JSON-serializable details kept in the header (see `load_snapshot`)
+    """
+    rows = store.order()
+    sections = {name: getattr(store, name)[rows] for name in COLUMNS if name != '_tag_pool'}
+
+    counts = sections['_tag_count']
+    starts = np.repeat(store._tag_start[rows], counts)
+    offsets = np.arange(int(counts.sum())) - np.repeat(np.cumsum(counts) - counts, counts)
+    sections['_tag_pool'] = store._tag_pool[starts + offsets]
+    sections['_tag_start'] = np.cumsum(counts, dtype=np.int64) - counts
+
+    for name, values in (('descriptions', (store._descriptions[int(row)] for row in rows)),
+                         ('categories', store.categories.values),
+                         ('tags', store.tags.values)):
+        packed = _pack_strings(values)
+        sections[name + '.offsets'] = packed['offsets']
+        sections[name + '.blob'] = packed['blob']
+
+    layout = {}
+    position = 0
+    for name, column in sections.items():
+        dtype = COLUMNS.get(name, column.dtype.str)
+        sections[name] = column = np.ascontiguousarray(column, dtype=dtype)
+        layout[name] = [position, column.dtype.str, len(column)]
+        position += -(-column.nbytes // _ALIGN) * _ALIGN
+
+    header = json.dumps({'rows': len(rows), 'sections': layout, 'meta': meta or {}}).encode('utf-8')
+    header += b' ' * (-(len(MAGIC) + 8 + len(header)) % _ALIGN)
+    base = len(MAGIC) + 8 + len(header)
+
+    temp_path = path + '.tmp'
+    with open(temp_path, 'wb') as f:
+        f.write(MAGIC)
+        f.write(len(header).to_bytes(8, 'little'))
+        f.write(header)
+        for name, column in sections.items():
+            f.seek(base + layout[name][0])
+            f.write(column.tobytes())
+        f.truncate(base + position)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, path)
+
+
+def snapshot_fingerprint(path: str) -> list:
+    """Identify a snapshot file, so files derived from it can tell if they are stale."""
+    stat = os.stat(path)
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def is_snapshot(path: str) -> bool:
+    try:
+        with open(path, 'rb') as f:
+            return f.read(len(MAGIC)) == MAGIC
+    except FileNotFoundError:
+        return False
+
+
+def load_snapshot(store, path: str) -> dict:
+    """Memory-map a snapshot, attach its columns to `store` and return its `meta`.
+
+    Nothing beyond the header and the category and tag tables is read up
+    front; column pages are faulted in when a query touches them.
+    """
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            raise ValueError(f"{path} is empty")
+        mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    if mapping[:len(MAGIC)] != MAGIC:
+        raise ValueError(f"{path} is not a transaction snapshot")
+    header_length = int.from_bytes(mapping[len(MAGIC):len(MAGIC) + 8], 'little')
+    base = len(MAGIC) + 8 + header_length
+    header = json.loads(mapping[len(MAGIC) + 8:base])
+
+    def section(name):
+        offset, dtype, count = header['sections'][name]
+        if not count:
+            return np.empty(0, dtype=dtype)
+        return np.frombuffer(mapping, dtype=dtype, count=count, offset=base + offset)
+
+    def strings(name):
+        return PackedStrings(section(name + '.offsets'), section(name + '.blob'))
+
+    if '_amount' in header['sections']:
+        # Written before amounts were kept in cents.
+        header['sections']['_cents'] = header['sections'].pop('_amount')
+        columns = {name: section(name) for name in COLUMNS if name != '_cents'}
+        columns['_cents'] = np.rint(section('_cents') * CENTS).astype(np.int64)
+    else:
+        columns = {name: section(name) for name in COLUMNS}
+    store.attach(columns, strings('descriptions'), list(strings('categories')),
+                 list(strings('tags')), mapping)
+    return header.get('meta', {})
@@ -0,0 +1,418 @@
+from typing import Dict, Iterable, List, Optional, Tuple
+import os
+import sqlite3
+import threading
+import numpy as np
+from .query import QueryResult, ranked_positions
+from .store import encode_type, parse_day, day_to_str
+from .tag_query import normalize_tags, parse_tag_query
+from .text_index import tokenize
+from .transaction import CENTS, Transaction, to_cents
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS transactions (
+    id INTEGER PRIMARY KEY,
+    date TEXT NOT NULL,
+    transaction_type TEXT NOT NULL,
+    cents INTEGER NOT NULL,
+    category TEXT NOT NULL,
+    description TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS tags (
+    transaction_id INTEGER NOT NULL REFERENCES transactions(id) ON DELETE CASCADE,
+    tag TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_transactions_date ON transactions(date);
+CREATE INDEX IF NOT EXISTS idx_transactions_category ON transactions(category COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS idx_transactions_type ON transactions(transaction_type, date);
+CREATE INDEX IF NOT EXISTS idx_transactions_cents ON transactions(cents);
+CREATE INDEX IF NOT EXISTS idx_tags_tag ON tags(tag, transaction_id);
+CREATE INDEX IF NOT EXISTS idx_tags_transaction ON tags(transaction_id);
+CREATE VIRTUAL TABLE IF NOT EXISTS descriptions USING fts5(
+    description, content='transactions', content_rowid='id'
+);
+CREATE TRIGGER IF NOT EXISTS descriptions_insert AFTER INSERT ON transactions BEGIN
+    INSERT INTO descriptions(rowid, description) VALUES (new.id, new.description);
+END;
+CREATE TRIGGER IF NOT EXISTS descriptions_delete AFTER DELETE ON transactions BEGIN
+    INSERT INTO descriptions(descriptions, rowid, description) VALUES ('delete', old.id, old.description);
+END;
+CREATE TRIGGER IF NOT EXISTS descriptions_update AFTER UPDATE OF description ON transactions BEGIN
+    INSERT INTO descriptions(descriptions, rowid, description) VALUES ('delete', old.id, old.description);
+    INSERT INTO descriptions(rowid, description) VALUES (new.id, new.description);
+END;
+"""
+
+_COLUMNS = "id, date, transaction_type, cents, category, description"
+
+
+def _migrate_amounts(conn: sqlite3.Connection) -> None:
+    """Convert a database from before integer cents, whose amounts were REAL dollars."""
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(transactions)")]
+    if 'amount' not in columns:
+        return
+    # Rounded by to_cents, as TransactionStore rounds amounts, rather than by SQL's ROUND.
+    conn.create_function('to_cents', 1, to_cents, deterministic=True)
+    with conn:
+        conn.execute("DROP INDEX IF EXISTS idx_transactions_amount")
+        conn.execute("ALTER TABLE transactions ADD COLUMN cents INTEGER NOT NULL DEFAULT 0")
+        conn.execute("UPDATE transactions SET cents = to_cents(amount)")
+        conn.execute("ALTER TABLE transactions DROP COLUMN amount")
+
+
+def _iso(value) -> Optional[str]:
+    """Normalize a date bound to the ISO string stored in the table."""
+    if not value:
+        return None
+    return day_to_str(parse_day(value))
+
+
+def _match_query(text: str) -> str:
+    """FTS5 query requiring every word of `text` as a token prefix."""
+    return ' '.join(f'"{token}"*' for token in tokenize(text))
+
+
+def _tag_clause(query: tuple, params: list) -> str:
+    """Translate a parsed tag query into a condition on transactions.id."""
+    op = query[0]
+    if op == 'tag':
+        params.append(query[1])
+        return "id IN (SELECT transaction_id FROM tags WHERE tag = ?)"
+    if op == 'not':
+        return f"NOT ({_tag_clause(query[1], params)})"
+    left = _tag_clause(query[1], params)
+    return f"({left} {op.upper()} {_tag_clause(query[2], params)})"
+
+
+class SQLiteQuery(QueryResult):
+    """Query over an `SQLiteStore`, fetched a batch of rows at a time.
+
+    Date-ordered pages resume from the cursor with a (date, id) row-value
+    comparison, which the date index answers without skipping rows.
+    """
+
+    BATCH = 256
+
+    def _select(self, after):
+        filters = self.filters
+        where, params = SQLiteStore._where(filters.get('start_date'), filters.get('end_date'),
+                                           filters.get('category'), filters.get('min_amount'),
+                                           filters.get('max_amount'), filters.get('tags'))
+        if 'text' not in filters:
+            if after is not None:
+                if len(after) != 2:
+                    raise ValueError("cursor is not from a date-ordered query")
+                where += (" AND " if where else " WHERE ") + "(date, id) > (?, ?)"
+                params += [day_to_str(after[0]), after[1]]
+            return f"SELECT {_COLUMNS} FROM transactions{where} ORDER BY date, id", params
+        return ("WITH matches AS (SELECT rowid AS match_id, bm25(descriptions) AS score "
+                "FROM descriptions WHERE descriptions MATCH ?) "
+                f"SELECT {_COLUMNS} FROM transactions JOIN matches ON match_id = id{where} ORDER BY score, id",
+                [_match_query(filters['text']), *params])
+
+    def _rows(self, after):
+        if 'text' in self.filters and not _match_query(self.filters['text']):
+            return
+        query, params = self._select(after)
+        cursor = self.store._reader().execute(query, params)
+        while True:
+            rows = cursor.fetchmany(self.BATCH)
+            if not rows:
+                return
+            yield from zip(rows, self.store._build(rows))
+
+    def _iterate(self, after):
+        if 'text' in self.filters:
+            yield from ranked_positions((transaction for _, transaction in self._rows(None)), after)
+            return
+        for row, transaction in self._rows(after):
+            yield (parse_day(row[1]), row[0]), transaction
+
+    def count(self) -> int:
+        if 'text' in self.filters and not _match_query(self.filters['text']):
+            return 0
+        query, params = self._select(None)
+        return self.store._reader().execute(f"SELECT COUNT(*) FROM ({query})", params).fetchone()[0]
+
+
+class SQLiteStore:
+    """Transaction storage in an SQLite database.
+
+    Implements the same list-like and query interface as `TransactionStore`,
+    but filters and aggregations are pushed down to SQL, so nothing has to be
+    loaded into memory up front. List order is the order of the row ids.
+    Amounts are stored as integer cents, as in `TransactionStore`, so the
+    two give the same sums.
+
+    Writes go through one connection under the writer lock and commit as
+    they are made. Each reading thread has its own connection which, in
+    WAL mode, reads the last committed version without waiting for the
+    writer, and keeps reading that version for as long as a query's
+    cursor or a `read` is open.
+    """
+
+    def __init__(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.lock = threading.RLock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._local = threading.local()
+        self._readers: List[sqlite3.Connection] = []
+        self._conn.execute("PRAGMA foreign_keys = ON")
+        self._conn.execute("PRAGMA journal_mode = WAL")
+        indexed = self._conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'descriptions'").fetchone() is not None
+        _migrate_amounts(self._conn)
+        self._conn.executescript(_SCHEMA)
+        if not indexed:
+            # A database from before the full-text index: index existing rows.
+            with self._conn:
+                self._conn.execute("INSERT INTO descriptions(descriptions) VALUES ('rebuild')")
+
+    def close(self) -> None:
+        with self.lock:
+            self._conn.commit()
+            self._conn.close()
+            for conn in self._readers:
+                conn.close()
+            self._readers = []
+        self._local = threading.local()
+
+    def commit(self) -> None:
+        with self.lock:
+            self._conn.commit()
+
+    def _reader(self) -> sqlite3.Connection:
+        """This thread's read connection."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._local.conn = sqlite3.connect(self.path, check_same_thread=False)
+            with self.lock:
+                self._readers.append(conn)
+        return conn
+
+    def read(self, function, *args, **kwargs):
+        """Run a read-only function with every query it makes reading one committed version."""
+        conn = self._reader()
+        if conn.in_transaction:
+            return function(*args, **kwargs)
+        conn.execute("BEGIN")
+        try:
+            return function(*args, **kwargs)
+        finally:
+            conn.commit()
+
+    # -- sequence protocol -------------------------------------------------
+
+    def _build(self, rows) -> List[Transaction]:
+        rows = list(rows)
+        tags: Dict[int, List[str]] = {}
+        if rows:
+            ids = [row[0] for row in rows]
+            for start in range(0, len(ids), 900):
+                chunk = ids[start:start + 900]
+                query = (f"SELECT transaction_id, tag FROM tags WHERE transaction_id IN "
+                         f"({','.join('?' * len(chunk))}) ORDER BY rowid")
+                for transaction_id, tag in self._reader().execute(query, chunk):
+                    tags.setdefault(transaction_id, []).append(tag)
+        return [Transaction(cents / CENTS, category, description, date, transaction_type, tags.get(id_, []))
+                for id_, date, transaction_type, cents, category, description in rows]
+
+    def __len__(self) -> int:
+        return self._reader().execute("SELECT COUNT(*) FROM transactions").fetchone()[0]
+
+    def _id_at(self, position: int) -> int:
+        if position < 0:
+            position += len(self)
+        row = None
+        if position >= 0:
+            row = self._reader().execute("SELECT id FROM transactions ORDER BY id LIMIT 1 OFFSET ?",
+                                     (position,)).fetchone()
+        if row is None:
+            raise IndexError("transaction index out of range")
+        return row[0]
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self._build(self._reader().execute(
+                f"SELECT {_COLUMNS} FROM transactions ORDER BY id"))[index]
+        return self._build(self._reader().execute(
+            f"SELECT {_COLUMNS} FROM transactions WHERE id = ?", (self._id_at(index),)))[0]
+
+    def __iter__(self):
+        cursor = self._reader().execute(f"SELECT {_COLUMNS} FROM transactions ORDER BY id")
+        while True:
+            rows = cursor.fetchmany(1000)
+            if not rows:
+                return
+            yield from self._build(rows)
+
+    # -- writes --------------------------------------------------------------
+
+    def _insert(self, records: Iterable) -> int:
+        count = 0
+        for record in records:
+            if not isinstance(record, dict):
+                record = record.to_dict()
+            encode_type(record["transaction_type"])
+            cursor = self._conn.execute(
+                "INSERT INTO transactions (date, transaction_type, cents, category, description) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (_iso(record["date"]), record["transaction_type"], to_cents(record["amount"]),
+                 record["category"], record["description"]))
+            self._conn.executemany("INSERT INTO tags (transaction_id, tag) VALUES (?, ?)",
+                                   [(cursor.lastrowid, tag) for tag in normalize_tags(record.get("tags"))])
+            count += 1
+        return count
+
+    def extend(self, records: Iterable) -> int:
+        with self.lock, self._conn:
+            return self._insert(records)
+
+    def extend_columns(self, columns: Dict[str, list]) -> int:
+        """Insert already-validated columns (see `importer.validate_columns`)."""
+        fields = ('amount', 'category', 'description', 'date', 'transaction_type', 'tags')
+        amounts = columns['amount']
+        if isinstance(amounts, np.ndarray):
+            amounts = amounts.tolist()
+        return self.extend(dict(zip(fields, values)) for values in zip(
+            amounts, *(columns[field] for field in fields[1:])))
+
+    def append(self, transaction) -> None:
+        self.extend([transaction])
+
+    def update(self, position: int, **changes) -> None:
+        if 'transaction_type' in changes:
+            encode_type(changes['transaction_type'])
+        if 'date' in changes:
+            changes['date'] = _iso(changes['date'])
+        if 'amount' in changes:
+            changes['cents'] = to_cents(changes.pop('amount'))
+        tags = changes.pop('tags', None)
+        with self.lock, self._conn:
+            id_ = self._id_at(position)
+            if changes:
+                assignments = ', '.join(f"{column} = ?" for column in changes)
+                self._conn.execute(f"UPDATE transactions SET {assignments} WHERE id = ?",
+                                   (*changes.values(), id_))
+            if tags is not None:
+                self._conn.execute("DELETE FROM tags WHERE transaction_id = ?", (id_,))
+                self._conn.executemany("INSERT INTO tags (transaction_id, tag) VALUES (?, ?)",
+                                       [(id_, tag) for tag in normalize_tags(tags)])
+
+    def pop(self, position: int = -1) -> Transaction:
+        with self.lock:
+            transaction = self[position]
+            with self._conn:
+                self._conn.execute("DELETE FROM transactions WHERE id = ?", (self._id_at(position),))
+        return transaction
+
+    def clear(self) -> None:
+        with self.lock, self._conn:
+            self._conn.execute("DELETE FROM tags")
+            self._conn.execute("DELETE FROM transactions")
+
+    def replace(self, records: Iterable) -> None:
+        with self.lock, self._conn:
+            self._conn.execute("DELETE FROM tags")
+            self._conn.execute("DELETE FROM transactions")
+            self._insert(records)
+
+    def to_dicts(self) -> Iterable[dict]:
+        for transaction in self:
+            yield transaction.to_dict()
+
+    # -- pushed-down queries -------------------------------------------------
+
+    @staticmethod
+    def _where(start_date=None, end_date=None, category=None, min_amount=None,
+               max_amount=None, tags=None) -> Tuple[str, list]:
+        clauses, params = [], []
+        if start_date:
+            clauses.append("date >= ?")
+            params.append(_iso(start_date))
+        if end_date:
+            clauses.append("date <= ?")
+            params.append(_iso(end_date))
+        if category:
+            clauses.append("category = ? COLLATE NOCASE")
+            params.append(category)
+        if min_amount is not None:
+            clauses.append("cents >= ?")
+            params.append(to_cents(min_amount))
+        if max_amount is not None:
+            clauses.append("cents <= ?")
+            params.append(to_cents(max_amount))
+        if tags:
+            clauses.append(_tag_clause(parse_tag_query(tags), params))
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def select(self, start_date=None, end_date=None, category=None) -> List[Transaction]:
+        where, params = self._where(start_date, end_date, category)
+        return self._build(self._reader().execute(
+            f"SELECT {_COLUMNS} FROM transactions{where} ORDER BY id", params))
+
+    def search(self, start_date=None, end_date=None, category=None, tags=None,
+               min_amount=None, max_amount=None, text=None) -> List[Transaction]:
+        where, params = self._where(start_date, end_date, category, min_amount, max_amount, tags)
+        if not text:
+            return self._build(self._reader().execute(
+                f"SELECT {_COLUMNS} FROM transactions{where} ORDER BY id", params))
+        query = _match_query(text)
+        if not query:
+            return []
+        # Best match first, as ranked by FTS5's bm25.
+        return self._build(self._reader().execute(
+            "WITH matches AS (SELECT rowid AS match_id, bm25(descriptions) AS score "
+            "FROM descriptions WHERE descriptions MATCH ?) "
+            f"SELECT {_COLUMNS} FROM transactions JOIN matches ON match_id = id{where} ORDER BY score, id",
+            [query, *params]))
+
+    def query(self, start_date=None, end_date=None, category=None, tags=None,
+              min_amount=None, max_amount=None, text=None) -> SQLiteQuery:
+        """Lazy, date-ordered version of `search` (see `QueryResult`)."""
+        return SQLiteQuery(self, start_date=start_date, end_date=end_date, category=category, tags=tags,
+                           min_amount=min_amount, max_amount=max_amount, text=text)
+
+    # Sums are of integer cents, exact in SQL, and divided into amounts once.
+    _INCOME = "COALESCE(SUM(CASE WHEN transaction_type = 'income' THEN cents END), 0)"
+    _EXPENSE = "COALESCE(SUM(CASE WHEN transaction_type = 'expense' THEN cents END), 0)"
+
+    def totals(self, start_date=None, end_date=None) -> Tuple[float, float]:
+        where, params = self._where(start_date, end_date)
+        income, expense = self._reader().execute(
+            f"SELECT {self._INCOME}, {self._EXPENSE} FROM transactions{where}", params).fetchone()
+        return income / CENTS, expense / CENTS
+
+    def balance(self, start_date=None, end_date=None) -> float:
+        where, params = self._where(start_date, end_date)
+        income, expense = self._reader().execute(
+            f"SELECT {self._INCOME}, {self._EXPENSE} FROM transactions{where}", params).fetchone()
+        return (income - expense) / CENTS
+
+    def daily_net(self, start_date=None, end_date=None) -> Tuple[np.ndarray, np.ndarray]:
+        where, params = self._where(start_date, end_date)
+        rows = self._reader().execute(
+            "SELECT date, SUM(CASE WHEN transaction_type = 'income' THEN cents ELSE -cents END) "
+            f"FROM transactions{where} GROUP BY date ORDER BY date", params).fetchall()
+        days = np.array([parse_day(day) for day, _ in rows], dtype=np.int64)
+        return days, np.array([net for _, net in rows], dtype=np.int64) / CENTS
+
+    def category_totals(self, start_date=None, end_date=None,
+                        category=None) -> Dict[str, Dict[str, float]]:
+        where, params = self._where(start_date, end_date, category)
+        rows = self._reader().execute(
+            f"SELECT category, {self._INCOME}, {self._EXPENSE} "
+            f"FROM transactions{where} GROUP BY category ORDER BY MIN(id)", params)
+        return {category: {'income': income / CENTS, 'expense': expense / CENTS}
+                for category, income, expense in rows}
+
+    def monthly_totals(self, start_date=None, end_date=None) -> Dict[str, Dict[str, float]]:
+        where, params = self._where(start_date, end_date)
+        rows = self._reader().execute(
+            f"SELECT substr(date, 1, 7) AS month, {self._INCOME}, {self._EXPENSE} "
+            f"FROM transactions{where} GROUP BY month ORDER BY month", params)
+        return {month: {'income': income / CENTS, 'expense': expense / CENTS}
+                for month, income, expense in rows}
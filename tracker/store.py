@@ -0,0 +1,792 @@
+from typing import Dict, Iterable, List, Optional, Tuple
+from datetime import date, datetime
+from functools import wraps
+import threading
+import time
+import numpy as np
+from .transaction import CENTS, Transaction, add_amounts, day_to_str, parse_date, to_cents
+from .indexes import SearchIndexes, SearchPlan
+from .instrumentation import INSTRUMENTATION
+from .query import QueryResult, ranked_positions
+from .tag_query import normalize_tags, parse_tag_query
+from .text_index import TextIndex
+from .fenwick import DailyTotals
+from .cube import AggregateCube, day_to_month, days_to_months, month_start
+
+INCOME = 1
+EXPENSE = 2
+TYPE_CODES = {'income': INCOME, 'expense': EXPENSE}
+TYPE_NAMES = {INCOME: 'income', EXPENSE: 'expense'}
+
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+_INITIAL_CAPACITY = 64
+# `_retired` of a row that has not been retired.
+ALIVE = np.iinfo(np.uint32).max
+
+
+def parse_day(value) -> Optional[int]:
+    """Convert a date string, date or datetime into a day ordinal."""
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value.date().toordinal()
+    if isinstance(value, date):
+        return value.toordinal()
+    return parse_date(value)
+
+
+def month_to_str(month: int) -> str:
+    return str(np.datetime64(int(month), 'M'))
+
+
+def encode_type(transaction_type: str) -> int:
+    try:
+        return TYPE_CODES[transaction_type]
+    except KeyError:
+        raise ValueError("Transaction type must be 'income' or 'expense'") from None
+
+
+class StringTable:
+    """Interns strings to dense integer codes."""
+
+    def __init__(self):
+        self.values: List[str] = []
+        self.codes: Dict[str, int] = {}
+        self._folded: Dict[str, List[int]] = {}
+
+    def intern(self, value: str) -> int:
+        code = self.codes.get(value)
+        if code is None:
+            code = len(self.values)
+            self.values.append(value)
+            self.codes[value] = code
+            self._folded.setdefault(value.lower(), []).append(code)
+        return code
+
+    def lookup(self, value: str, ignore_case: bool = False) -> List[int]:
+        """Return the codes for a value without interning it."""
+        if ignore_case:
+            return list(self._folded.get(value.lower(), []))
+        code = self.codes.get(value)
+        return [] if code is None else [code]
+
+    def __getitem__(self, code: int) -> str:
+        return self.values[code]
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+
+class TransactionView(Transaction):
+    """A `Transaction` backed by one row of a `TransactionStore`.
+
+    Reading an attribute decodes it from the columns; assigning one writes
+    the change back through the store.
+    """
+    __slots__ = ('_store', '_row')
+
+    def __init__(self, store: 'TransactionStore', row: int):
+        self._store = store
+        self._row = row
+
+    def _set(self, field: str, value) -> None:
+        self._row = self._store.update_row(self._row, **{field: value})
+
+    @property
+    def cents(self) -> int:
+        return int(self._store._cents[self._row])
+
+    @property
+    def amount(self) -> float:
+        return self.cents / CENTS
+
+    @amount.setter
+    def amount(self, value):
+        self._set('amount', value)
+
+    @property
+    def category(self) -> str:
+        return self._store.categories[int(self._store._category[self._row])]
+
+    @category.setter
+    def category(self, value):
+        self._set('category', value)
+
+    @property
+    def description(self) -> str:
+        return self._store._descriptions[self._row]
+
+    @description.setter
+    def description(self, value):
+        self._set('description', value)
+
+    @property
+    def day(self) -> int:
+        return int(self._store._day[self._row])
+
+    @property
+    def date(self) -> str:
+        return day_to_str(self.day)
+
+    @date.setter
+    def date(self, value):
+        self._set('date', value)
+
+    @property
+    def transaction_type(self) -> str:
+        return TYPE_NAMES[int(self._store._type[self._row])]
+
+    @transaction_type.setter
+    def transaction_type(self, value):
+        self._set('transaction_type', value)
+
+    @property
+    def tags(self) -> List[str]:
+        return [self._store.tags[code] for code in self._store.tag_codes(self._row)]
+
+    @tags.setter
+    def tags(self, value):
+        self._set('tags', value)
+
+    # Read by Transaction.to_dict in place of the slot.
+    _tags = tags
+
+    def __eq__(self, other):
+        if isinstance(other, TransactionView):
+            return self._store is other._store and self._row == other._row
+        return NotImplemented
+
+    def __hash__(self):
+        return hash((id(self._store), self._row))
+
+
+class StoreQuery(QueryResult):
+    """Query over a `TransactionStore`, streamed off its date index.
+
+    Each iteration reads the version of the store current when it starts,
+    however many writes happen while it runs.
+    """
+
+    def _ranked_rows(self) -> np.ndarray:
+        filters = dict(self.filters)
+        matched, scores = self.store.text_index.search(filters.pop('text'))
+        rows = self.store._search_rows(text_rows=matched, **_search_args(filters))
+        return rows[np.argsort(-scores[np.searchsorted(matched, rows)], kind='stable')]
+
+    def _views(self, rows: List[int], generation: int):
+        for row in rows:
+            self.store._check_generation(generation)
+            yield self.store.view(row)
+
+    def _iterate(self, after):
+        store = self.store
+        generation = store._generation
+        if 'text' in self.filters:
+            rows = store.read(self._ranked_rows)
+            yield from ranked_positions(self._views(rows.tolist(), generation), after)
+            return
+        if after is not None and len(after) != 2:
+            raise ValueError("cursor is not from a date-ordered query")
+        plan = store.read(store._plan, text_rows=None, **_search_args(self.filters))
+        for chunk in plan.by_date(tuple(after) if after else None):
+            for day, row in zip(store._day[chunk].tolist(), chunk.tolist()):
+                store._check_generation(generation)
+                yield (day, row), store.view(row)
+
+    def count(self) -> int:
+        if 'text' in self.filters:
+            return len(self.store.read(self._ranked_rows))
+        return len(self.store.read(self.store._search_rows, text_rows=None, **_search_args(self.filters)))
+
+
+def _search_args(filters: dict) -> dict:
+    return {name: filters.get(name) for name in
+            ('start_date', 'end_date', 'category', 'tags', 'min_amount', 'max_amount')}
+
+
+def _writes(method):
+    """Run a store method as one write: under the writer lock, published as one new version."""
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self.lock:
+            if self._writer is not None:
+                # Part of a write this thread is already making.
+                return method(self, *args, **kwargs)
+            self._writer = threading.get_ident()
+            self._seq += 1
+            try:
+                return method(self, *args, **kwargs)
+            finally:
+                self._seq += 1
+                self._writer = None
+    return wrapper
+
+
+def _reads(method):
+    """Run a store method against one consistent version (see `TransactionStore.read`)."""
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        return self.read(method, self, *args, **kwargs)
+    return wrapper
+
+
+class TransactionStore:
+    """Columnar, array-backed storage for transactions.
+
+    Each transaction is one row across a set of numpy columns. Amounts are
+    int64 cents and dates are day ordinals. The type is a bitmask. Category
+    and tags are codes into interned string tables.
+
+    Rows are never modified in place. An edit appends a replacement row and
+    retires the old one; `_order` maps list positions to the live rows.
+
+    Derived structures such as indexes register with `subscribe` and are
+    told about added rows, retired rows and wholesale resets.
+
+    Any number of threads can read while one writes. Writes take the writer
+    lock and each publishes a new `version`. Readers take no lock: `read`
+    runs a read and retries it if a write was published meanwhile, like a
+    seqlock. Rows only ever change from live to retired, and `_retired`
+    records the version that retired each, so a query pinned to a version
+    keeps seeing exactly that version's rows while writes go on (MVCC).
+    The list order is copied on write, so iterating the store is not
+    disturbed by later edits either.
+    """
+
+    def __init__(self, transactions: Iterable[Transaction] = ()):
+        self.categories = StringTable()
+        self.tags = StringTable()
+        self._listeners = []
+        self.lock = threading.RLock()
+        # Odd while a write is in progress; version = _seq // 2.
+        self._seq = 0
+        self._writer: Optional[int] = None
+        self._reading = threading.local()
+        self._generation = 0
+        self._reset_columns()
+        self.indexes = SearchIndexes(self)
+        self.daily_totals = DailyTotals(self)
+        self.cube = AggregateCube(self)
+        self.text_index = TextIndex(self)
+        self.extend(transactions)
+
+    def subscribe(self, listener) -> None:
+        self._listeners.append(listener)
+
+    def _notify(self, event: str, *args) -> None:
+        for listener in self._listeners:
+            getattr(listener, event)(*args)
+
+    # -- concurrency ---------------------------------------------------------
+
+    @property
+    def version(self) -> int:
+        """Number of writes published so far."""
+        return self._seq // 2
+
+    def read(self, function, *args, **kwargs):
+        """Run a read-only function against one consistent version of the store.
+
+        The function runs without a lock. If a write was published while it
+        ran, its result (or exception) is discarded and it runs again, so it
+        must not have side effects. While a write is in progress, readers
+        wait for it to finish. Reads nested in a read or made by the writer
+        itself run directly.
+        """
+        if self._writer == threading.get_ident() or getattr(self._reading, 'active', False):
+            return function(*args, **kwargs)
+        self._reading.active = True
+        try:
+            while True:
+                seq = self._seq
+                if seq & 1:
+                    with self.lock:
+                        pass
+                    continue
+                try:
+                    result = function(*args, **kwargs)
+                except Exception:
+                    if self._seq == seq:
+                        raise
+                    continue
+                if self._seq == seq:
+                    return result
+        finally:
+            self._reading.active = False
+
+    def visible(self, rows: np.ndarray, version: Optional[int] = None, limit: Optional[int] = None) -> np.ndarray:
+        """Mask of the rows that are live, or that were live at `version`.
+
+        :param limit: Number of rows the store had at `version`
+        """
+        if version is None:
+            return self._live[rows]
+        return (rows < limit) & (self._retired[rows] > version)
+
+    def _check_generation(self, generation: int) -> None:
+        if self._generation != generation:
+            raise RuntimeError("the transactions were replaced during iteration")
+
+    def _reset_columns(self, capacity: int = _INITIAL_CAPACITY) -> None:
+        self._cents = np.zeros(capacity, dtype=np.int64)
+        self._day = np.zeros(capacity, dtype=np.int32)
+        self._type = np.zeros(capacity, dtype=np.uint8)
+        self._category = np.zeros(capacity, dtype=np.int32)
+        self._tag_start = np.zeros(capacity, dtype=np.int64)
+        self._tag_count = np.zeros(capacity, dtype=np.int32)
+        self._live = np.zeros(capacity, dtype=bool)
+        self._retired = np.zeros(capacity, dtype=np.uint32)
+        self._descriptions: List[str] = []
+        self._tag_pool = np.zeros(capacity, dtype=np.int32)
+        self._tag_used = 0
+        self._order = np.zeros(capacity, dtype=np.int64)
+        self._size = 0
+        self._rows = 0
+        self._mapping = None
+        # Row ids restart from 0: views and iterators of the old rows are stale.
+        self._generation += 1
+
+    # -- sequence protocol -------------------------------------------------
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self.view(int(row)) for row in self.order()[index]]
+        return self.view(self.row_id(index))
+
+    def __iter__(self):
+        generation = self._generation
+        for row in self.order().tolist():
+            self._check_generation(generation)
+            yield self.view(row)
+
+    def _ensure_order(self) -> None:
+        # A freshly loaded snapshot is in list order already, so the
+        # position -> row mapping is only materialized once something needs it.
+        if self._order is None:
+            with self.lock:
+                if self._order is None:
+                    self._order = np.arange(max(self._size, _INITIAL_CAPACITY), dtype=np.int64)
+
+    @_reads
+    def order(self) -> np.ndarray:
+        """Row ids of the live transactions, in list order."""
+        self._ensure_order()
+        return self._order[:self._size]
+
+    @_reads
+    def row_id(self, position: int) -> int:
+        self._ensure_order()
+        if position < 0:
+            position += self._size
+        if not 0 <= position < self._size:
+            raise IndexError("transaction index out of range")
+        return int(self._order[position])
+
+    def position_of(self, row: int) -> int:
+        positions = np.flatnonzero(self.order() == row)
+        if not len(positions):
+            raise IndexError("transaction is no longer in the store")
+        return int(positions[0])
+
+    def view(self, row: int) -> TransactionView:
+        return TransactionView(self, row)
+
+    def tag_codes(self, row: int) -> np.ndarray:
+        start = self._tag_start[row]
+        return self._tag_pool[start:start + self._tag_count[row]]
+
+    # -- writes --------------------------------------------------------------
+
+    def _reserve(self, rows: int, tags: int) -> None:
+        needed = self._rows + rows
+        if needed > len(self._cents):
+            capacity = max(needed, 2 * len(self._cents))
+            for name in ('_cents', '_day', '_type', '_category', '_tag_start', '_tag_count', '_live', '_retired'):
+                column = getattr(self, name)
+                grown = np.zeros(capacity, dtype=column.dtype)
+                grown[:self._rows] = column[:self._rows]
+                setattr(self, name, grown)
+        self._ensure_order()
+        if self._size + rows > len(self._order):
+            grown = np.zeros(max(self._size + rows, 2 * len(self._order)), dtype=np.int64)
+            grown[:self._size] = self._order[:self._size]
+            self._order = grown
+        if self._tag_used + tags > len(self._tag_pool):
+            grown = np.zeros(max(self._tag_used + tags, 2 * len(self._tag_pool)), dtype=np.int32)
+            grown[:self._tag_used] = self._tag_pool[:self._tag_used]
+            self._tag_pool = grown
+
+    def _write_rows(self, cents, days, types, categories, descriptions, tag_lists) -> np.ndarray:
+        count = len(cents)
+        tag_counts = np.fromiter((len(tags) for tags in tag_lists), dtype=np.int32, count=count)
+        total_tags = int(tag_counts.sum())
+        self._reserve(count, total_tags)
+
+        start, stop = self._rows, self._rows + count
+        self._cents[start:stop] = cents
+        self._day[start:stop] = days
+        self._type[start:stop] = types
+        self._category[start:stop] = categories
+        self._tag_count[start:stop] = tag_counts
+        self._tag_start[start:stop] = self._tag_used + np.cumsum(tag_counts) - tag_counts
+        if total_tags:
+            self._tag_pool[self._tag_used:self._tag_used + total_tags] = [
+                code for tags in tag_lists for code in tags]
+        self._tag_used += total_tags
+        self._live[start:stop] = True
+        self._retired[start:stop] = ALIVE
+        self._descriptions.extend(descriptions)
+        self._rows = stop
+        return np.arange(start, stop, dtype=np.int64)
+
+    def _encode(self, records: Iterable) -> Tuple[list, list, list, list, list, list]:
+        cents, days, types, categories, descriptions, tag_lists = [], [], [], [], [], []
+        day_cache: Dict[str, int] = {}
+        # Codes per distinct category and tag list, so repeats skip interning.
+        category_codes = self.categories.codes
+        intern_category = self.categories.intern
+        tag_cache: Dict[tuple, list] = {}
+        intern_tag = self.tags.intern
+        for record in records:
+            if isinstance(record, dict):
+                amount, category, description = record["amount"], record["category"], record["description"]
+                raw_date, transaction_type = record["date"], record["transaction_type"]
+                tags = record.get("tags") or []
+                day = day_cache.get(raw_date)
+                if day is None:
+                    day = day_cache[raw_date] = parse_day(raw_date)
+                cents.append(round(amount * CENTS) if amount.__class__ is float else to_cents(amount))
+            else:
+                # Already in cents and day ordinals: nothing to parse.
+                category, description, transaction_type = record.category, record.description, record.transaction_type
+                tags = record.tags
+                day = record.day
+                cents.append(record.cents)
+            days.append(day)
+            types.append(TYPE_CODES.get(transaction_type) or encode_type(transaction_type))
+            code = category_codes.get(category)
+            categories.append(intern_category(category) if code is None else code)
+            descriptions.append(description)
+            if tags:
+                key = tuple(tags)
+                codes = tag_cache.get(key)
+                if codes is None:
+                    codes = tag_cache[key] = [intern_tag(tag) for tag in normalize_tags(tags)]
+                tag_lists.append(codes)
+            else:
+                tag_lists.append(())
+        return cents, days, types, categories, descriptions, tag_lists
+
+    @_writes
+    def extend(self, records: Iterable) -> np.ndarray:
+        """Append transactions (or their dict form) and return the new row ids."""
+        columns = self._encode(records)
+        rows = self._write_rows(*columns)
+        self._order[self._size:self._size + len(rows)] = rows
+        self._size += len(rows)
+        self._notify('rows_added', rows)
+        return rows
+
+    @_writes
+    def extend_columns(self, columns: Dict[str, list]) -> np.ndarray:
+        """Append already-validated columns (see `importer.validate_columns`).
+
+        Dates, types and categories are encoded once per distinct value
+        instead of once per row.
+        """
+        day_codes = {value: parse_day(value) for value in set(columns['date'])}
+        category_codes = {value: self.categories.intern(value) for value in dict.fromkeys(columns['category'])}
+        intern_tag = self.tags.intern
+        rows = self._write_rows(
+            np.rint(np.asarray(columns['amount'], dtype=np.float64) * CENTS).astype(np.int64),
+            [day_codes[value] for value in columns['date']],
+            [TYPE_CODES[value] for value in columns['transaction_type']],
+            [category_codes[value] for value in columns['category']],
+            columns['description'],
+            [[intern_tag(tag) for tag in normalize_tags(tags)] if tags else () for tags in columns['tags']])
+        self._order[self._size:self._size + len(rows)] = rows
+        self._size += len(rows)
+        self._notify('rows_added', rows)
+        return rows
+
+    def append(self, transaction) -> int:
+        return int(self.extend([transaction])[0])
+
+    def _retire(self, row: int) -> None:
+        self._live[row] = False
+        # Retired by the version this write publishes.
+        self._retired[row] = (self._seq + 1) // 2
+
+    @_writes
+    def update(self, position: int, **changes) -> int:
+        """Replace the transaction at `position` with an edited copy."""
+        old = self.row_id(position)
+        if position < 0:
+            position += self._size
+        record = self.view(old).to_dict()
+        record.update(changes)
+        new = int(self._write_rows(*self._encode([record]))[0])
+        self._retire(old)
+        # Copied, not changed in place, as readers may be iterating the old order.
+        order = self._order.copy()
+        order[position] = new
+        self._order = order
+        self._notify('rows_retired', np.array([old], dtype=np.int64))
+        self._notify('rows_added', np.array([new], dtype=np.int64))
+        return new
+
+    def update_row(self, row: int, **changes) -> int:
+        return self.update(self.position_of(row), **changes)
+
+    @_writes
+    def pop(self, position: int = -1) -> TransactionView:
+        row = self.row_id(position)
+        if position < 0:
+            position += self._size
+        order = np.empty_like(self._order)
+        order[:position] = self._order[:position]
+        order[position:self._size - 1] = self._order[position + 1:self._size]
+        self._order = order
+        self._size -= 1
+        self._retire(row)
+        self._notify('rows_retired', np.array([row], dtype=np.int64))
+        return self.view(row)
+
+    @_writes
+    def clear(self) -> None:
+        self.categories = StringTable()
+        self.tags = StringTable()
+        self._reset_columns()
+        self._notify('reset')
+
+    @_writes
+    def replace(self, records: Iterable) -> None:
+        """Swap in a new set of transactions, rebuilding derived structures once."""
+        self.categories = StringTable()
+        self.tags = StringTable()
+        self._reset_columns()
+        rows = self._write_rows(*self._encode(records))
+        self._order[:len(rows)] = rows
+        self._size = len(rows)
+        self._notify('reset')
+
+    @_writes
+    def attach(self, columns: Dict[str, np.ndarray], descriptions, categories: List[str],
+               tags: List[str], mapping=None) -> None:
+        """Adopt prebuilt (possibly memory-mapped, read-only) columns.
+
+        The rows must already be in list order and all live. Columns are only
+        copied once a write needs to grow them.
+        """
+        self.categories = StringTable()
+        for value in categories:
+            self.categories.intern(value)
+        self.tags = StringTable()
+        for value in tags:
+            self.tags.intern(value)
+        for name, column in columns.items():
+            setattr(self, name, column)
+        rows = len(columns['_cents'])
+        self._live = np.ones(rows, dtype=bool)
+        self._retired = np.full(rows, ALIVE, dtype=np.uint32)
+        self._descriptions = descriptions
+        self._tag_used = len(self._tag_pool)
+        self._order = None
+        self._rows = self._size = rows
+        self._mapping = mapping
+        self._generation += 1
+        self._notify('reset')
+
+    def to_dicts(self) -> Iterable[dict]:
+        generation = self._generation
+        for row in self.order().tolist():
+            self._check_generation(generation)
+            yield self.view(row).to_dict()
+
+    # -- vectorized aggregates ----------------------------------------------
+
+    def _mask(self, start_date=None, end_date=None, category=None) -> np.ndarray:
+        """Boolean mask over all rows selecting live rows matching the filters."""
+        INSTRUMENTATION.count(rows_scanned=self._rows)
+        mask = self._live[:self._rows].copy()
+        days = self._day[:self._rows]
+        if start_date:
+            mask &= days >= parse_day(start_date)
+        if end_date:
+            mask &= days <= parse_day(end_date)
+        if category:
+            codes = self.categories.lookup(category, ignore_case=True)
+            mask &= np.isin(self._category[:self._rows], codes)
+        return mask
+
+    def signed_cents(self) -> np.ndarray:
+        cents = self._cents[:self._rows]
+        return np.where(self._type[:self._rows] & INCOME, cents, -cents)
+
+    @_reads
+    def select(self, start_date=None, end_date=None, category=None) -> List[TransactionView]:
+        """Return the matching transactions in list order."""
+        order = self.order()
+        keep = self._mask(start_date, end_date, category)[order]
+        return [self.view(int(row)) for row in order[keep]]
+
+    @_reads
+    def search_rows(self, start_date=None, end_date=None, category=None, tags=None,
+                    min_amount=None, max_amount=None, text=None) -> np.ndarray:
+        """Row ids (ascending) of the live transactions matching every predicate.
+
+        `tags` is a list of tags of which any must be present, or a tag
+        expression such as 'travel AND NOT refund' (see `parse_tag_query`).
+        `text` must match the description (see `TextIndex.search`).
+        """
+        return self._search_rows(start_date, end_date, category, tags, min_amount, max_amount,
+                                 self.text_index.search(text)[0] if text else None)
+
+    def _search_rows(self, start_date, end_date, category, tags, min_amount, max_amount,
+                     text_rows: Optional[np.ndarray]) -> np.ndarray:
+        return self._plan(start_date, end_date, category, tags, min_amount, max_amount, text_rows).rows()
+
+    def _plan(self, start_date, end_date, category, tags, min_amount, max_amount,
+              text_rows: Optional[np.ndarray]) -> SearchPlan:
+        category_codes = None
+        if category:
+            category_codes = self.categories.lookup(category, ignore_case=True)
+        return self.indexes.plan(parse_day(start_date or None), parse_day(end_date or None),
+                                 category_codes, None if min_amount is None else to_cents(min_amount),
+                                 None if max_amount is None else to_cents(max_amount),
+                                 parse_tag_query(tags) if tags else None, text_rows)
+
+    def query(self, start_date=None, end_date=None, category=None, tags=None,
+              min_amount=None, max_amount=None, text=None) -> 'StoreQuery':
+        """Lazy, date-ordered version of `search` (see `QueryResult`)."""
+        return StoreQuery(self, start_date=start_date, end_date=end_date, category=category, tags=tags,
+                          min_amount=min_amount, max_amount=max_amount, text=text)
+
+    @_reads
+    def search(self, start_date=None, end_date=None, category=None, tags=None,
+               min_amount=None, max_amount=None, text=None) -> List[TransactionView]:
+        """Indexed search; every given predicate must match.
+
+        Results are in row order, or best match first when `text` is given.
+        """
+        if not text:
+            rows = self._search_rows(start_date, end_date, category, tags, min_amount, max_amount, None)
+        else:
+            matched, scores = self.text_index.search(text)
+            rows = self._search_rows(start_date, end_date, category, tags, min_amount, max_amount, matched)
+            rows = rows[np.argsort(-scores[np.searchsorted(matched, rows)], kind='stable')]
+        return [self.view(int(row)) for row in rows]
+
+    def balance(self, start_date=None, end_date=None) -> float:
+        income, expense = self.totals(start_date, end_date)
+        return add_amounts(income, -expense)
+
+    @_reads
+    def totals(self, start_date=None, end_date=None) -> Tuple[float, float]:
+        """Return (income, expense) totals for the date range, in O(log days)."""
+        return self.daily_totals.totals(parse_day(start_date or None), parse_day(end_date or None))
+
+    @_reads
+    def daily_net(self, start_date=None, end_date=None) -> Tuple[np.ndarray, np.ndarray]:
+        """Return (day ordinals, net amount per day) for days with transactions."""
+        mask = self._mask(start_date, end_date)
+        days = self._day[:self._rows][mask]
+        if not len(days):
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        first = int(days.min())
+        offsets = days - first
+        net = np.bincount(offsets, weights=self.signed_cents()[mask])
+        present = np.flatnonzero(np.bincount(offsets))
+        return present + first, net[present] / CENTS
+
+    def _rows_category_totals(self, rows: np.ndarray) -> Dict[int, List[int]]:
+        """{category code: [income cents, expense cents, count]} over the rows."""
+        codes = self._category[rows]
+        cents = self._cents[rows]
+        income = self._type[rows] == INCOME
+        size = len(self.categories)
+        # Sums of whole cents are exact in float64 up to 2**53 cents.
+        income_totals = np.bincount(codes, weights=np.where(income, cents, 0), minlength=size)
+        expense_totals = np.bincount(codes, weights=np.where(income, 0, cents), minlength=size)
+        counts = np.bincount(codes, minlength=size)
+        return {int(code): [int(income_totals[code]), int(expense_totals[code]), int(counts[code])]
+                for code in np.flatnonzero(counts)}
+
+    @staticmethod
+    def _split_months(start_date, end_date) -> List[tuple]:
+        """Split a date range into cube-aligned whole months and partial edges.
+
+        Yields (low_day, high_day, first_month, last_month) pieces: whole-month
+        pieces carry months (None meaning unbounded) and partial pieces carry
+        day bounds.
+        """
+        start_day, end_day = parse_day(start_date or None), parse_day(end_date or None)
+        if start_day is not None and end_day is not None and start_day > end_day:
+            return []
+        first_month = last_month = None
+        edges = []
+        if start_day is not None:
+            first_month = day_to_month(start_day)
+            if start_day != month_start(first_month):
+                first_month += 1
+                edges.append((start_day, month_start(first_month) - 1))
+        if end_day is not None:
+            last_month = day_to_month(end_day)
+            if end_day + 1 != month_start(last_month + 1):
+                edges.append((month_start(last_month), end_day))
+                last_month -= 1
+        pieces = []
+        if first_month is None or last_month is None or first_month <= last_month:
+            pieces.append((None, None, first_month, last_month))
+        for low, high in edges:
+            low = low if start_day is None else max(low, start_day)
+            high = high if end_day is None else min(high, end_day)
+            if (low, high, None, None) not in pieces:
+                pieces.append((low, high, None, None))
+        return pieces
+
+    @_reads
+    def category_totals(self, start_date=None, end_date=None,
+                        category=None) -> Dict[str, Dict[str, float]]:
+        """Return {category: {'income': x, 'expense': y}} in first-seen order.
+
+        Whole months are read from the aggregate cube; only the rows in a
+        partially covered first or last month are looked at individually.
+        """
+        if category:
+            rows = np.flatnonzero(self._mask(start_date, end_date, category))
+            totals = self._rows_category_totals(rows)
+        else:
+            totals = {}
+            for low, high, first_month, last_month in self._split_months(start_date, end_date):
+                if low is None:
+                    cells = self.cube.category_totals(first_month, last_month)
+                else:
+                    cells = self._rows_category_totals(self.indexes.search(low, high))
+                for code, cell in cells.items():
+                    total = totals.setdefault(code, [0, 0, 0])
+                    for slot in range(3):
+                        total[slot] += cell[slot]
+        return {self.categories[code]: {'income': totals[code][0] / CENTS, 'expense': totals[code][1] / CENTS}
+                for code in sorted(totals) if totals[code][2]}
+
+    @_reads
+    def monthly_totals(self, start_date=None, end_date=None) -> Dict[str, Dict[str, float]]:
+        """Return {'YYYY-MM': {'income': x, 'expense': y}} in month order."""
+        if not start_date and not end_date:
+            totals = self.cube.monthly_totals()
+            return {month_to_str(month): {'income': totals[month][0] / CENTS, 'expense': totals[month][1] / CENTS}
+                    for month in sorted(totals)}
+        mask = self._mask(start_date, end_date)
+        if not mask.any():
+            return {}
+        months, inverse = np.unique(days_to_months(self._day[:self._rows][mask]), return_inverse=True)
+        cents = self._cents[:self._rows][mask]
+        types = self._type[:self._rows][mask]
+        income = np.bincount(inverse, weights=np.where(types == INCOME, cents, 0), minlength=len(months))
+        expense = np.bincount(inverse, weights=np.where(types == EXPENSE, cents, 0), minlength=len(months))
+        return {month_to_str(month): {'income': float(income[i]) / CENTS, 'expense': float(expense[i]) / CENTS}
+                for i, month in enumerate(months)}
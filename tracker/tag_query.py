@@ -0,0 +1,86 @@
+from typing import Iterable, List, Union
+import re
+
+# A parsed query is a nested tuple:
+#   ('tag', name) | ('not', query) | ('and', left, right) | ('or', left, right)
+_TOKENS = re.compile(r'\s*(\(|\)|[^\s()]+)')
+_OPERATORS = ('AND', 'OR', 'NOT')
+
+
+def normalize_tag(tag: str) -> str:
+    return tag.strip().lower()
+
+
+def normalize_tags(tags: Iterable[str]) -> List[str]:
+    """Stripped, lower-cased tags with empty and repeated ones dropped."""
+    normalized = []
+    for tag in tags or ():
+        tag = normalize_tag(tag)
+        if tag and tag not in normalized:
+            normalized.append(tag)
+    return normalized
+
+
+def parse_tag_query(query: Union[str, Iterable[str]]) -> tuple:
+    """Parse a tag expression such as 'travel AND (work OR client) AND NOT refund'.
+
+    NOT binds tighter than AND, which binds tighter than OR; adjacent terms
+    are ANDed and operators are case-insensitive. A list of tags is read as
+    the OR of its tags; an already parsed query is returned as it is.
+    """
+    if isinstance(query, tuple):
+        return query
+    if not isinstance(query, str):
+        tags = normalize_tags(query)
+        if not tags:
+            raise ValueError("empty tag query")
+        node = ('tag', tags[0])
+        for tag in tags[1:]:
+            node = ('or', node, ('tag', tag))
+        return node
+
+    tokens = _TOKENS.findall(query)
+    position = 0
+
+    def peek():
+        return tokens[position].upper() if position < len(tokens) else None
+
+    def take():
+        nonlocal position
+        position += 1
+        return tokens[position - 1]
+
+    def parse_or():
+        node = parse_and()
+        while peek() == 'OR':
+            take()
+            node = ('or', node, parse_and())
+        return node
+
+    def parse_and():
+        node = parse_not()
+        while peek() not in (None, 'OR', ')'):
+            if peek() == 'AND':
+                take()
+            node = ('and', node, parse_not())
+        return node
+
+    def parse_not():
+        if peek() == 'NOT':
+            take()
+            return ('not', parse_not())
+        if peek() == '(':
+            take()
+            node = parse_or()
+            if peek() != ')':
+                raise ValueError(f"missing ')' in tag query {query!r}")
+            take()
+            return node
+        if peek() in (None, ')') or peek() in _OPERATORS:
+            raise ValueError(f"expected a tag in tag query {query!r}")
+        return ('tag', normalize_tag(take()))
+
+    node = parse_or()
+    if position != len(tokens):
+        raise ValueError(f"unexpected {tokens[position]!r} in tag query {query!r}")
+    return node
@@ -0,0 +1,253 @@
+from typing import Dict, List, Optional, Tuple, Union
+from array import array
+from bisect import bisect_left, insort
+import math
+import os
+import re
+import numpy as np
+from .indexes import postings_array
+from .instrumentation import INSTRUMENTATION
+from .snapshot import snapshot_fingerprint
+
+_TOKEN = re.compile(r'\w+')
+_SEPARATOR = '\x00'
+_TOKEN_OR_SEPARATOR = re.compile(r'\w+|\x00')
+
+# Score multiplier for a token that only starts with the query term.
+PREFIX_WEIGHT = 0.5
+
+Postings = Union[array, np.ndarray]
+
+
+def tokenize(text: str) -> List[str]:
+    """Lower-cased word tokens of `text`, each once, in order of appearance."""
+    return list(dict.fromkeys(_TOKEN.findall(text.lower())))
+
+
+class TextIndex:
+    """Inverted index from description tokens to the rows containing them.
+
+    Queries match every term, each either exactly or as a token prefix
+    ('amaz ref' finds 'Amazon refund'), and rank results by the terms'
+    inverse document frequency, counting prefix matches at PREFIX_WEIGHT
+    and favouring short descriptions. Like the other derived structures it
+    is built on first use, kept current as rows are added, and filters
+    retired rows at query time. It can be saved next to a binary snapshot
+    so that reopening a ledger does not re-tokenize every description;
+    the saved index is only read once a query needs it.
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self._postings: Optional[Dict[str, Postings]] = None
+        self._terms: List[str] = []
+        self._lengths = np.zeros(0, dtype=np.int32)
+        # A saved index not read yet, and the rows added since it was found.
+        self._saved: Optional[Tuple[str, str]] = None
+        self._added_since_load: List[np.ndarray] = []
+        store.subscribe(self)
+
+    def reset(self) -> None:
+        self._postings = None
+        self._saved = None
+        self._added_since_load = []
+
+    def build(self) -> None:
+        """Index every live row in one pass.
+
+        All descriptions are tokenized by a single regex scan over their
+        concatenation, then (row, token) pairs are deduplicated and grouped
+        into posting lists with numpy, instead of row by row.
+        """
+        store = self.store
+        rows = np.flatnonzero(store._live[:store._rows])
+        text = _SEPARATOR.join([store._descriptions[row] for row in rows.tolist()]).lower()
+        vocabulary: Dict[str, int] = {_SEPARATOR: 0}
+        codes = np.array([vocabulary.setdefault(token, len(vocabulary))
+                          for token in _TOKEN_OR_SEPARATOR.findall(text)], dtype=np.int64)
+        owners = np.cumsum(codes == 0)
+        words = codes != 0
+        pairs = np.sort(owners[words] * len(vocabulary) + codes[words])
+        pairs = pairs[np.concatenate(([True], pairs[1:] != pairs[:-1]))]
+        owners, codes = pairs // len(vocabulary), pairs % len(vocabulary)
+
+        self._lengths = np.zeros(store._rows, dtype=np.int32)
+        self._lengths[rows] = np.bincount(owners, minlength=len(rows))
+        by_code = np.argsort(codes, kind='stable')
+        postings = rows[owners[by_code]]
+        offsets = np.zeros(len(vocabulary) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(codes, minlength=len(vocabulary)), out=offsets[1:])
+        postings = {token: postings[offsets[code]:offsets[code + 1]] for token, code in vocabulary.items() if code}
+        self._terms = sorted(postings)
+        # Set last: readers take a non-None _postings to mean the index is ready.
+        self._postings = postings
+
+    def _index(self, rows: np.ndarray) -> List[str]:
+        """Add rows to the postings; return the tokens seen for the first time."""
+        store = self.store
+        postings = self._postings
+        new_tokens = []
+        if len(self._lengths) < store._rows:
+            grown = np.zeros(max(store._rows, 2 * len(self._lengths)), dtype=np.int32)
+            grown[:len(self._lengths)] = self._lengths
+            self._lengths = grown
+        for row in rows.tolist():
+            tokens = tokenize(store._descriptions[row])
+            self._lengths[row] = len(tokens)
+            for token in tokens:
+                rows_with_token = postings.get(token)
+                if rows_with_token is None:
+                    postings[token] = array('q', (row,))
+                    new_tokens.append(token)
+                else:
+                    if isinstance(rows_with_token, np.ndarray):
+                        # Loaded from disk; copied on first write.
+                        postings[token] = rows_with_token = array('q', rows_with_token.tobytes())
+                    rows_with_token.append(row)
+        return new_tokens
+
+    def rows_added(self, rows: np.ndarray) -> None:
+        if self._saved is not None:
+            self._added_since_load.append(rows)
+            return
+        if self._postings is None:
+            return
+        if len(rows) > 1024:
+            self.reset()
+        else:
+            for token in self._index(rows):
+                insort(self._terms, token)
+
+    def rows_retired(self, rows: np.ndarray) -> None:
+        pass
+
+    def _ensure(self) -> None:
+        """Read the saved index if one is pending, else build if needed."""
+        if self._saved is None and self._postings is not None:
+            return
+        with self.store.lock:
+            self._ensure_locked()
+
+    def _ensure_locked(self) -> None:
+        if self._saved is not None:
+            saved, added = self._saved, self._added_since_load
+            self._saved, self._added_since_load = None, []
+            if self._read(*saved):
+                for rows in added:
+                    self.rows_added(rows)
+        if self._postings is None:
+            self.build()
+
+    # -- queries ---------------------------------------------------------------
+
+    def _expand(self, term: str) -> List[str]:
+        """Indexed tokens starting with `term`."""
+        start = bisect_left(self._terms, term)
+        stop = start
+        while stop < len(self._terms) and self._terms[stop].startswith(term):
+            stop += 1
+        return self._terms[start:stop]
+
+    def search(self, query: str) -> Tuple[np.ndarray, np.ndarray]:
+        """Return (rows, scores) of the live rows matching every query term.
+
+        Rows come back in ascending row order.
+        """
+        self._ensure()
+        store = self.store
+        empty = np.empty(0, dtype=np.int64), np.empty(0)
+        documents = max(len(store), 1)
+        matched: Optional[Tuple[np.ndarray, np.ndarray]] = None
+        for term in tokenize(query):
+            parts, weights = [], []
+            for token in self._expand(term):
+                rows = postings_array(self._postings[token])
+                weight = math.log(1 + documents / len(rows)) * (1.0 if token == term else PREFIX_WEIGHT)
+                parts.append(rows)
+                weights.append(np.full(len(rows), weight))
+            if not parts:
+                return empty
+            rows, scores = np.concatenate(parts), np.concatenate(weights)
+            INSTRUMENTATION.count(rows_scanned=len(rows))
+            # Keep the best-scoring token per row.
+            order = np.lexsort((-scores, rows))
+            rows, scores = rows[order], scores[order]
+            first = np.ones(len(rows), dtype=bool)
+            first[1:] = rows[1:] != rows[:-1]
+            rows, scores = rows[first], scores[first]
+            if matched is None:
+                matched = rows, scores
+            else:
+                common, left, right = np.intersect1d(matched[0], rows, assume_unique=True, return_indices=True)
+                matched = common, matched[1][left] + scores[right]
+        if matched is None:
+            return empty
+        rows, scores = matched
+        live = store._live[rows]
+        rows, scores = rows[live], scores[live]
+        return rows, scores / np.sqrt(np.maximum(self._lengths[rows], 1))
+
+    # -- persistence -------------------------------------------------------------
+
+    def save(self, path: str, snapshot_path: str) -> None:
+        """Persist the index, tied to the snapshot it was built alongside.
+
+        The snapshot stores the live rows in list order, so row ids are
+        renumbered to list positions on the way out.
+        """
+        self._ensure()
+        store = self.store
+        order = store.order()
+        position = np.full(store._rows, -1, dtype=np.int64)
+        position[order] = np.arange(len(order))
+
+        terms = self._terms
+        counts = [len(self._postings[term]) for term in terms]
+        rows = np.concatenate([np.asarray(self._postings[term], dtype=np.int64) for term in terms]) \
+            if terms else np.empty(0, dtype=np.int64)
+        term_ids = np.repeat(np.arange(len(terms)), counts)
+        rows = position[rows]
+        live = rows >= 0
+        rows, term_ids = rows[live], term_ids[live]
+        by_term = np.lexsort((rows, term_ids))
+        rows, term_ids = rows[by_term], term_ids[by_term]
+        offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(term_ids, minlength=len(terms)), out=offsets[1:])
+
+        temp_path = path + '.tmp'
+        with open(temp_path, 'wb') as f:
+            np.savez(f, snapshot=np.array(snapshot_fingerprint(snapshot_path), dtype=np.int64),
+                     terms=np.array(terms, dtype=str), offsets=offsets, rows=rows,
+                     lengths=self._lengths[order])
+        os.replace(temp_path, path)
+
+    def load(self, path: str, snapshot_path: str) -> bool:
+        """Adopt a saved index, on first use, if it exists; return whether it does.
+
+        It is checked against the snapshot as it is now, since the store
+        holds that snapshot's rows, but read only once a query needs it.
+        """
+        self.reset()
+        if not os.path.exists(path):
+            return False
+        self._saved = (path, snapshot_fingerprint(snapshot_path))
+        return True
+
+    def _read(self, path: str, fingerprint: list) -> bool:
+        """Adopt a saved index if it belongs to the snapshot; return whether it did."""
+        try:
+            data = np.load(path)
+        except (FileNotFoundError, ValueError, OSError):
+            return False
+        with data:
+            if data['snapshot'].tolist() != fingerprint:
+                return False
+            terms = data['terms'].tolist()
+            offsets = data['offsets'].tolist()
+            rows = data['rows']
+            self._lengths = data['lengths'].copy()
+        postings = {term: rows[start:stop] for term, start, stop in zip(terms, offsets, offsets[1:])
+                    if stop > start}
+        self._terms = [term for term in terms if term in postings]
+        self._postings = postings
+        return True
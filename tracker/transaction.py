@@ -1,16 +1,102 @@
-from typing import List
-from datetime import datetime
+from typing import List, Tuple
+from datetime import date as Date
+from functools import lru_cache
+import sys
+
+# Amounts are held as whole cents, so sums of them are exact.
+CENTS = 100
+
+
+def to_cents(amount) -> int:
+    """Convert an amount to the nearest whole number of cents."""
+    if isinstance(amount, int):
+        return amount * CENTS
+    return round(float(amount) * CENTS)
+
+
+def add_amounts(first: float, second: float) -> float:
+    """Add two amounts of whole cents without floating-point drift."""
+    return (to_cents(first) + to_cents(second)) / CENTS
+
+
+@lru_cache(maxsize=4096)
+def parse_date(value: str) -> int:
+    """Day ordinal of an ISO date string; recently parsed dates share one int."""
+    return Date.fromisoformat(value).toordinal()
+
+
+@lru_cache(maxsize=4096)
+def day_to_str(day: int) -> str:
+    return Date.fromordinal(day).isoformat()
+
+
+_intern = sys.intern
+
+
+@lru_cache(maxsize=4096)
+def _shared_tags(tags: Tuple[str, ...]) -> Tuple[str, ...]:
+    return tuple(_intern(tag) for tag in tags)
+
+
+def intern_tags(tags) -> Tuple[str, ...]:
+    """One shared tuple per distinct, recently seen list of tags, holding interned strings."""
+    return _shared_tags(tuple(tags))
+
+
+@lru_cache(maxsize=4096)
+def _shared_text(value: str) -> str:
+    """The first of equal, recently seen strings, so repeated descriptions share one."""
+    return value
+
 
 class Transaction:
-    def __init__(self, amount: float, category: str, description: str, 
-                 date: str = None, transaction_type: str = "expense", 
+    """One income or expense.
+
+    Kept compact, as ledgers hold many of these: no per-instance dict, the
+    amount as integer cents, the date as a day ordinal and the category,
+    type and tags as interned strings shared by every transaction using them.
+    Repeated descriptions and tag lists are shared too; `tags` becomes the
+    transaction's own list when it is first read, so it can be edited in place.
+    """
+    __slots__ = ('cents', 'category', 'description', 'day', 'transaction_type', '_tags')
+
+    def __init__(self, amount: float, category: str, description: str,
+                 date: str = None, transaction_type: str = "expense",
                  tags: List[str] = None):
-        self.amount: float = float(amount)
-        self.category: str = category
-        self.description: str = description
-        self.date: str = date or datetime.now().strftime("%Y-%m-%d")
-        self.transaction_type: str = transaction_type
-        self.tags: List[str] = tags or []
+        # to_cents and intern_tags inlined: this runs once per loaded row.
+        self.cents: int = round(amount * CENTS) if amount.__class__ is float else to_cents(amount)
+        self.category: str = _intern(category)
+        self.description: str = _shared_text(description)
+        self.day: int = parse_date(date) if date else Date.today().toordinal()
+        self.transaction_type: str = _intern(transaction_type)
+        self._tags = _shared_tags(tuple(tags)) if tags else ()
+
+    @property
+    def amount(self) -> float:
+        return self.cents / CENTS
+
+    @amount.setter
+    def amount(self, value):
+        self.cents = to_cents(value)
+
+    @property
+    def date(self) -> str:
+        return day_to_str(self.day)
+
+    @date.setter
+    def date(self, value):
+        self.day = parse_date(value)
+
+    @property
+    def tags(self) -> List[str]:
+        tags = self._tags
+        if tags.__class__ is tuple:
+            tags = self._tags = list(tags)
+        return tags
+
+    @tags.setter
+    def tags(self, value):
+        self._tags = intern_tags(value) if value else ()
 
     def to_dict(self) -> dict:
         return {
@@ -19,19 +105,13 @@ class Transaction:
             "description": self.description,
             "date": self.date,
             "transaction_type": self.transaction_type,
-            "tags": self.tags
+            "tags": list(self._tags)
         }
 
     @staticmethod
     def from_dict(data: dict) -> 'Transaction':
-        return Transaction(
-            amount=data["amount"],
-            category=data["category"],
-            description=data["description"],
-            date=data["date"],
-            transaction_type=data["transaction_type"],
-            tags=data.get("tags", [])
-        )
+        return Transaction(data["amount"], data["category"], data["description"], data["date"],
+                           data["transaction_type"], data.get("tags"))
 
     def __str__(self) -> str:
-        return f"{self.date} - {self.transaction_type.capitalize()}: ${self.amount:.2f} ({self.category}) - {self.description}"
\ No newline at end of file
+        return f"{self.date} - {self.transaction_type.capitalize()}: ${self.amount:.2f} ({self.category}) - {self.description}"